@@ -0,0 +1,44 @@
+"""Graph view: background layout time and the cost of a pan/zoom query.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_graph_layout [scene counts...]
+
+"view" looks up a 1200x800 window at 1:1 zoom at random places in the
+layout, which is what every redraw of the graph view does.
+"""
+import random
+import sys
+import time
+
+from benchmarks.bench_scene_graph import make_scene
+from core.graph_analysis import adjacency_of
+from core.graph_layout import layered_layout
+from core.scene_graph import SceneGraph
+
+DEFAULT_SIZES = (1_000, 10_000, 50_000)
+QUERIES = 200
+VIEW = (1200, 800)
+
+
+def main(sizes):
+    print(f"{'scenes':>8} {'layout s':>9} {'view ms':>8} {'drawn':>6}")
+    for count in sizes:
+        graph = SceneGraph([make_scene(index, count) for index in range(count)])
+        start = time.perf_counter()
+        layout = layered_layout(list(graph.ids()), adjacency_of(graph), graph.start_id)
+        build = time.perf_counter() - start
+
+        x0, y0, x1, y1 = layout.bounds
+        drawn = 0
+        start = time.perf_counter()
+        for _ in range(QUERIES):
+            x, y = random.uniform(x0, x1), random.uniform(y0, y1)
+            drawn += len(layout.nodes_in(x, y, x + VIEW[0], y + VIEW[1]))
+            drawn += len(layout.edges_in(x, y, x + VIEW[0], y + VIEW[1]))
+        query = (time.perf_counter() - start) / QUERIES
+        print(f"{count:>8} {build:9.2f} {query * 1e3:8.2f} {drawn // QUERIES:6}")
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or DEFAULT_SIZES)
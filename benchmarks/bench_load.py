@@ -0,0 +1,87 @@
+"""Project load time: the old UI-thread path vs core.yaml_loader.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_load [scene counts...]
+
+The old path is yaml.safe_load (pure-Python loader) followed by the scene
+loop MainWindow used to run. The new path is load_scenes, which uses
+libyaml's CSafeLoader when PyYAML was built with it. Synthetic project
+files are written to a temporary directory and removed afterwards.
+"""
+import os
+import sys
+import tempfile
+import time
+
+import yaml
+
+from core.yaml_loader import HAS_LIBYAML, ProjectLoader, load_scenes, scene_from_yaml
+
+DEFAULT_SIZES = (10_000, 100_000)
+
+
+def write_project(file_path, count):
+    videos = {}
+    options = {}
+    for index in range(count):
+        scene_id = f"s{index}"
+        videos[scene_id] = f"videos/Scene{index % 500}.mp4"
+        options[scene_id] = {
+            "scene_type": "Question",
+            "question_heading": f"What happens after scene {index}?",
+            "choices": {
+                f"Option A {index}": {"next": f"s{(index + 1) % count}", "image": f"images/{index % 300}-A.jpg"},
+                f"Option B {index}": {"next": f"s{(index * 7 + 3) % count}", "image": f"images/{index % 300}-B.jpg"},
+            },
+        }
+    dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+    with open(file_path, "w") as yaml_file:
+        yaml.dump({"start": "s0", "videos": videos, "options": options}, yaml_file,
+                  Dumper=dumper, sort_keys=False, default_flow_style=False)
+
+
+def old_load(file_path):
+    with open(file_path, "r") as yaml_file:
+        loaded_yaml = yaml.safe_load(yaml_file)
+    return [
+        scene_from_yaml(scene_id, video_path, loaded_yaml["options"].get(scene_id, {}))
+        for scene_id, video_path in loaded_yaml["videos"].items()
+    ]
+
+
+def threaded_load(file_path):
+    loader = ProjectLoader(file_path).start()
+    scenes = []
+    while True:
+        message = loader.messages.get()
+        if message[0] == "scenes":
+            scenes.extend(message[1])
+        elif message[0] != "progress":
+            break
+    return scenes
+
+
+def timed(func, file_path):
+    start = time.perf_counter()
+    scenes = func(file_path)
+    return time.perf_counter() - start, len(scenes)
+
+
+def main(sizes):
+    print(f"libyaml available: {HAS_LIBYAML}")
+    print(f"{'scenes':>8} {'MB':>6} {'old s':>8} {'new s':>8} {'thread s':>9} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in sizes:
+            file_path = os.path.join(tmp, f"project_{count}.yaml")
+            write_project(file_path, count)
+            size_mb = os.path.getsize(file_path) / 1e6
+            old, old_count = timed(old_load, file_path)
+            new, new_count = timed(load_scenes, file_path)
+            threaded, threaded_count = timed(threaded_load, file_path)
+            assert old_count == new_count == threaded_count == count
+            print(f"{count:>8} {size_mb:6.1f} {old:8.2f} {new:8.2f} {threaded:9.2f} {old / new:7.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
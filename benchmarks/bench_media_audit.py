@@ -0,0 +1,65 @@
+"""Media audit throughput: duplicate detection over a generated media folder.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_media_audit [--files 40] [--mb 25] [--workers 1 4]
+
+Writes a source folder of random "videos" to a temporary directory: every
+file has the same size (the worst case for size bucketing), a quarter of
+them are copies of another file and a quarter differ from one only in the
+middle (so they survive the first hashing pass). Then audit() runs with
+each worker count; the page cache is warm after the first run, so the
+numbers are hashing throughput rather than disk speed.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from core.media_audit import HEAD_BYTES, audit
+
+
+def write_media(folder, files, size):
+    os.makedirs(os.path.join(folder, "videos"))
+    os.makedirs(os.path.join(folder, "images"))
+    rng = random.Random(0)
+    originals = []
+    for number in range(files):
+        path = os.path.join(folder, "videos", f"Scene{number}.mp4")
+        kind = number % 4
+        if kind < 2 or not originals:
+            data = bytearray(os.urandom(size))
+            originals.append(data)
+        elif kind == 2:
+            data = rng.choice(originals)  # Exact copy
+        else:
+            data = bytearray(rng.choice(originals))
+            data[size // 2] ^= 0xFF  # Same ends, different middle
+        with open(path, "wb") as media_file:
+            media_file.write(data)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the media audit on generated files.")
+    parser.add_argument("--files", type=int, default=40)
+    parser.add_argument("--mb", type=int, default=25, help="size of every file")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args(argv)
+
+    size = max(args.mb << 20, 4 * HEAD_BYTES)
+    with tempfile.TemporaryDirectory() as folder:
+        write_media(folder, args.files, size)
+        total_mb = args.files * size / (1 << 20)
+        print(f"{args.files} files, {total_mb:.0f} MB")
+        print(f"{'workers':>8} {'seconds':>8} {'MB/s':>8} {'duplicate sets':>15}")
+        audit([], folder, 1)  # Warm the page cache
+        for workers in args.workers:
+            started = time.perf_counter()
+            report = audit([], folder, workers)
+            elapsed = time.perf_counter() - started
+            print(f"{workers:>8} {elapsed:>8.2f} {total_mb / elapsed:>8.0f} {len(report.duplicates):>15}")
+
+
+if __name__ == "__main__":
+    main()
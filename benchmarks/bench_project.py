@@ -0,0 +1,92 @@
+"""Chapter load time in a multi-file project, and a check of edits made meanwhile.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_project [scenes per chapter...]
+
+A two-chapter project from benchmarks.story_generator is saved to a
+temporary directory and reopened with nothing loaded. The first chapter is
+streamed in, then the second one twice: once rolled back as if cancelled,
+once to the end. During each second-chapter load a scene is saved, like
+MainWindow.save_scene does, and it must stay in the current chapter (the
+first one), at the end of that chapter's scenes, and survive the
+rollback. The run exits with an error if not.
+"""
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.story_generator import generate_scenes
+from core.project import Project, read_root
+from core.scene_graph import SceneGraph
+
+DEFAULT_SIZES = (2_000, 10_000)
+
+
+def check(condition, message):
+    if not condition:
+        sys.exit(f"error: {message}")
+
+
+def save_project(root_path, scenes):
+    graph = SceneGraph(scenes[:len(scenes) // 2])
+    project = Project.create(graph, root_path)
+    project.add_chapter("Chapter 2")
+    graph.extend(scenes[len(scenes) // 2:])
+    saver = project.save_job()
+    saver.thread.join()
+    project.close()
+
+
+def load_chapter(project, chapter, edit=None, ok=True):
+    """Stream chapter in; edit(project) runs after the first batch. Returns the seconds taken."""
+    start = time.perf_counter()
+    loader = project.begin_load(chapter)
+    while True:
+        message = loader.messages.get()
+        if message[0] == "scenes":
+            project.add_loaded(message[1])
+            if edit:
+                edit(project)
+                edit = None
+        elif message[0] != "progress":
+            break
+    check(message[0] == "done", f"loading {chapter.name} failed: {message[1:]}")
+    project.finish_load(ok)
+    return time.perf_counter() - start
+
+
+def save_new_scene(project):
+    scene = dict(project.scene_graph[0])
+    scene["scene_id"] = "saved-during-load"
+    project.insert_scene(scene, project.current)
+
+
+def main(sizes):
+    print(f"{'per chapter':>11} {'first s':>8} {'rollback s':>11} {'second s':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in sizes:
+            root_path = os.path.join(tmp, f"story{count}.project.yaml")
+            save_project(root_path, generate_scenes(2 * count))
+            graph = SceneGraph()
+            project = Project(graph, root_path, read_root(root_path))
+            first, second = project.chapters
+
+            first_time = load_chapter(project, first)
+            rollback_time = load_chapter(project, second, save_new_scene, ok=False)
+            check(len(graph) == count + 1, f"rollback left {len(graph)} scenes, expected {count + 1}")
+            check(project.chapter_of("saved-during-load") is first, "the saved scene left the current chapter")
+            graph.remove("saved-during-load")
+
+            second_time = load_chapter(project, second, save_new_scene)
+            check(len(graph) == 2 * count + 1, f"{len(graph)} scenes loaded, expected {2 * count + 1}")
+            check(project.chapter_of("saved-during-load") is first, "the saved scene joined the loading chapter")
+            check(graph.index_of("saved-during-load") == count, "the saved scene is not at the end of its chapter")
+            check(first.size == count + 1 and second.size == count, "chapter sizes are off")
+            project.close()
+            print(f"{count:>11} {first_time:8.2f} {rollback_time:11.2f} {second_time:9.2f}")
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,61 @@
+"""Publish time: first publish vs republishing with nothing or a few files changed.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_publish [--scenes 2000] [--mb 0.5] [--changed 5]
+
+A generated story (benchmarks.story_generator) gets a source folder with
+every video and image it uses, each file --mb in size, in a temporary
+directory. The story is published three times: into an empty folder,
+again unchanged, and after --changed videos were rewritten.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.story_generator import generate_scenes
+from core.publish import publish, referenced_media
+
+
+def write_media(source_folder, scenes, size):
+    for relative in referenced_media(scenes):
+        path = os.path.join(source_folder, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as media_file:
+            media_file.write(os.urandom(size))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time publishing a generated story.")
+    parser.add_argument("--scenes", type=int, default=2000)
+    parser.add_argument("--mb", type=float, default=0.5, help="size of every media file")
+    parser.add_argument("--changed", type=int, default=5, help="videos rewritten before the last publish")
+    parser.add_argument("--link", action="store_true", help="hard-link instead of copying")
+    args = parser.parse_args(argv)
+
+    scenes = generate_scenes(args.scenes)
+    size = int(args.mb * (1 << 20))
+    with tempfile.TemporaryDirectory() as folder:
+        source_folder = os.path.join(folder, "source")
+        bundle = os.path.join(folder, "bundle")
+        write_media(source_folder, scenes, size)
+        files = referenced_media(scenes)
+        print(f"{len(scenes)} scenes, {len(files)} files, {len(files) * size / (1 << 30):.2f} GB")
+
+        def run(label):
+            started = time.perf_counter()
+            result = publish(scenes, source_folder, bundle, link=args.link)
+            print(f"{label:<12} {time.perf_counter() - started:>8.2f} s   {result.summary()}")
+
+        run("first")
+        run("unchanged")
+        videos = [relative for relative in files if relative.startswith("videos/")]
+        for relative in videos[:args.changed]:
+            with open(os.path.join(source_folder, relative), "wb") as media_file:
+                media_file.write(os.urandom(size))
+        run("changed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Scene-switch latency in the SceneEditor (needs a display).
+
+Run from the repository root:
+
+    python -m benchmarks.bench_scene_editor [choices per scene...]
+
+"rebuild" destroys the editor and builds a new one for every switch, the
+way MainWindow used to; "rebind" loads the next scene into the one editor.
+Each switch is timed until Tk has laid the editor out.
+"""
+import sys
+import time
+import tkinter as tk
+
+from gui.scene_editor import SceneEditor
+
+DEFAULT_CHOICES = (2, 20, 200)
+SWITCHES = 50
+
+
+def make_scenes(choice_count):
+    return [
+        {
+            "scene_id": f"s{index}",
+            "video": f"{index}.mp4",
+            "scene_type": "Question",
+            "heading": f"Scene {index}",
+            "choices": [
+                {"option": f"Option {number}", "next_scene": f"s{number}", "image": None, "temporary": False}
+                for number in range(choice_count)
+            ],
+        }
+        for index in range(SWITCHES)
+    ]
+
+
+def percentile(timings, fraction):
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1e3
+
+
+def main(choice_counts):
+    root = tk.Tk()
+    root.geometry("500x700")
+    print(f"{'choices':>8} {'mode':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for choice_count in choice_counts:
+        scenes = make_scenes(choice_count)
+        for mode in ("rebuild", "rebind"):
+            editor = None
+            timings = []
+            for scene in scenes:
+                start = time.perf_counter()
+                if editor is None or mode == "rebuild":
+                    if editor is not None:
+                        editor.frame.destroy()
+                    editor = SceneEditor(root, None, lambda scene: None, scene_data=scene)
+                else:
+                    editor.load(scene)
+                root.update_idletasks()
+                timings.append(time.perf_counter() - start)
+                root.update()
+            editor.frame.destroy()
+            print(f"{choice_count:>8} {mode:>8} {percentile(timings, 0.5):8.2f} {percentile(timings, 0.99):8.2f}")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main([int(count) for count in sys.argv[1:]] or DEFAULT_CHOICES)
@@ -0,0 +1,117 @@
+"""Per-operation cost of save, lookup and duplicate as the project grows.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_scene_graph
+
+The "list" column replays the old MainWindow behaviour (a plain list of
+scene dicts scanned on every call); it is skipped for the largest size
+because it is quadratic to build.
+"""
+import random
+import time
+
+from core.scene_graph import SceneGraph
+
+SIZES = (1_000, 10_000, 100_000)
+LIST_LIMIT = 10_000
+OPS = 2_000
+
+
+def make_scene(index, count):
+    return {
+        "scene_id": f"s{index}",
+        "video": f"Scene{index}.mp4",
+        "scene_type": "Question",
+        "heading": f"Heading {index}",
+        "choices": [
+            {"option": "Left", "next_scene": f"s{(index + 1) % count}", "image": None, "temporary": False},
+            {"option": "Right", "next_scene": f"s{(index * 7 + 3) % count}", "image": None, "temporary": False},
+        ],
+    }
+
+
+class ListScenes:
+    """The pre-SceneGraph storage: linear scans over a list of dicts."""
+
+    def __init__(self, scenes):
+        self.scenes = list(scenes)
+
+    def scene_exists(self, scene_id):
+        return any(scene["scene_id"] == scene_id for scene in self.scenes)
+
+    def save(self, updated_scene):
+        for i, scene in enumerate(self.scenes):
+            if scene["scene_id"] == updated_scene["scene_id"]:
+                self.scenes[i] = updated_scene
+                break
+        else:
+            self.scenes.append(updated_scene)
+        for choice in updated_scene["choices"]:
+            self.scene_exists(choice["next_scene"])
+
+    def duplicate(self, index):
+        scene = self.scenes[index].copy()
+        base_id = scene["scene_id"]
+        new_id = f"{base_id}_copy"
+        count = 1
+        while self.scene_exists(new_id):
+            count += 1
+            new_id = f"{base_id}_copy{count}"
+        scene["scene_id"] = new_id
+        self.scenes.insert(index + 1, scene)
+
+
+class GraphScenes:
+    """The same operations routed through SceneGraph, as MainWindow does now."""
+
+    def __init__(self, scenes):
+        self.scenes = SceneGraph(scenes)
+
+    def scene_exists(self, scene_id):
+        return scene_id in self.scenes
+
+    def save(self, updated_scene):
+        self.scenes.put(updated_scene)
+        for choice in updated_scene["choices"]:
+            self.scene_exists(choice["next_scene"])
+
+    def duplicate(self, index):
+        scene = self.scenes[index].copy()
+        scene["scene_id"] = self.scenes.unique_id(scene["scene_id"])
+        self.scenes.insert(index + 1, scene)
+
+
+def time_per_op(func, args_list):
+    start = time.perf_counter()
+    for args in args_list:
+        func(*args)
+    return (time.perf_counter() - start) / len(args_list) * 1e6
+
+
+def run(store_cls, count):
+    rng = random.Random(count)
+    store = store_cls(make_scene(i, count) for i in range(count))
+    picks = [rng.randrange(count) for _ in range(OPS)]
+    results = {
+        "save": time_per_op(store.save, [(make_scene(i, count),) for i in picks]),
+        "lookup": time_per_op(store.scene_exists, [(f"s{i}",) for i in picks]),
+    }
+    # Duplicate the same few scenes repeatedly, the worst case for ID probing
+    hot = [(rng.randrange(count),) for _ in range(10)] * (OPS // 10)
+    results["duplicate"] = time_per_op(store.duplicate, hot)
+    return results
+
+
+def main():
+    print(f"{'scenes':>8} {'op':>10} {'list us/op':>12} {'graph us/op':>12}")
+    for count in SIZES:
+        graph = run(GraphScenes, count)
+        legacy = run(ListScenes, count) if count <= LIST_LIMIT else {}
+        for op, value in graph.items():
+            old = f"{legacy[op]:12.1f}" if op in legacy else f"{'-':>12}"
+            print(f"{count:>8} {op:>10} {old} {value:12.1f}")
+
+
+if __name__ == "__main__":
+    main()
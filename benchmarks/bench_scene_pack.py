@@ -0,0 +1,86 @@
+"""Player start-up: parsing the exported YAML vs opening a compiled scene pack.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_scene_pack [scene counts...]
+
+Each size is also a round-trip check: the pack is rendered back to YAML and
+must match generate_yaml byte for byte, and every scene must resolve by id.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+import yaml
+
+from benchmarks.bench_scene_graph import make_scene
+from core.scene_pack import ScenePack, write_pack
+from core.yaml_export import generate_yaml
+from core.yaml_loader import SafeLoader
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+LOOKUPS = 1_000
+
+
+def make_scenes(count):
+    scenes = [make_scene(index, count) for index in range(count)]
+    for index, scene in enumerate(scenes):
+        # Exercise images, temporary flags, Continue scenes and non-ASCII text
+        scene["choices"][0]["image"] = f"{index % 300}-A.jpg"
+        scene["choices"][1]["temporary"] = index % 3 == 0
+        if index % 5 == 0:
+            scene["scene_type"] = "Continue"
+            scene["heading"] = f"Weiter zu Szene {index} — ça va"
+    return scenes
+
+
+def check_round_trip(scenes, pack_path):
+    """Exit with an error unless the pack renders back to the same YAML and resolves every id."""
+    with ScenePack(pack_path) as pack:
+        if pack.to_yaml() != generate_yaml(scenes):
+            sys.exit(f"error: {pack_path} does not round-trip to the same YAML")
+        for scene in scenes:
+            found = pack.scene(scene["scene_id"])
+            if found is None or found["scene_id"] != scene["scene_id"]:
+                sys.exit(f"error: {pack_path} does not resolve scene {scene['scene_id']!r}")
+        if pack.scene("no-such-scene") is not None:
+            sys.exit(f"error: {pack_path} resolves an id it does not hold")
+
+
+def main(sizes):
+    print(f"{'scenes':>8} {'YAML MB':>8} {'pack MB':>8} {'parse s':>8} {'open ms':>8} {'lookup us':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in sizes:
+            scenes = make_scenes(count)
+            yaml_path = os.path.join(tmp, f"story_{count}.yaml")
+            pack_path = os.path.join(tmp, f"story_{count}.scpk")
+            with open(yaml_path, "w") as yaml_file:
+                yaml_file.write(generate_yaml(scenes))
+            write_pack(scenes, pack_path)
+            check_round_trip(scenes, pack_path)
+
+            start = time.perf_counter()
+            with open(yaml_path, "rb") as yaml_file:
+                yaml.load(yaml_file, Loader=SafeLoader)
+            parse = time.perf_counter() - start
+
+            start = time.perf_counter()
+            pack = ScenePack(pack_path)
+            pack.scene(pack.start_id)
+            opened = time.perf_counter() - start
+
+            ids = [random.choice(scenes)["scene_id"] for _ in range(LOOKUPS)]
+            start = time.perf_counter()
+            for scene_id in ids:
+                pack.scene(scene_id)
+            lookup = (time.perf_counter() - start) / LOOKUPS
+            pack.close()
+
+            print(f"{count:>8} {os.path.getsize(yaml_path) / 1e6:8.1f} {os.path.getsize(pack_path) / 1e6:8.1f} "
+                  f"{parse:8.2f} {opened * 1e3:8.2f} {lookup * 1e6:10.1f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,53 @@
+"""Search index: build time, typing latency and the cost of keeping it current.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_search [scene counts...]
+
+Queries are typed a character at a time, like the search box sees them;
+each prefix is timed with the panel's result limit.
+"""
+import sys
+import time
+
+from benchmarks.bench_scene_pack import make_scenes
+from core.scene_graph import SceneGraph
+from core.search_index import SearchIndex
+from gui.search_panel import MAX_RESULTS
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+QUERIES = ("s4711", "weiter", "next:s12", "heading szene 9", "87-a.jpg", "wieter")  # Last one is a typo
+SAVES = 1_000
+
+
+def main(sizes):
+    print(f"{'scenes':>8} {'build s':>8} {'p50 ms':>8} {'max ms':>8} {'save us':>8}")
+    for count in sizes:
+        graph = SceneGraph(make_scenes(count))
+        index = SearchIndex(graph)
+
+        start = time.perf_counter()
+        index.rebuild()
+        build = time.perf_counter() - start
+
+        timings = []
+        for query in QUERIES:
+            for end in range(1, len(query) + 1):
+                start = time.perf_counter()
+                index.search(query[:end], MAX_RESULTS + 1)
+                timings.append(time.perf_counter() - start)
+        timings.sort()
+
+        start = time.perf_counter()
+        for number in range(SAVES):
+            scene = dict(graph[number % count])
+            scene["heading"] = f"Edited heading {number}"
+            graph.put(scene)
+        save = (time.perf_counter() - start) / SAVES
+
+        print(f"{count:>8} {build:8.2f} {timings[len(timings) // 2] * 1e3:8.2f} "
+              f"{timings[-1] * 1e3:8.2f} {save * 1e6:8.1f}")
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,120 @@
+"""Startup: import time and restoring the last session, JSON journal vs session cache.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_startup [scene counts...]
+
+The import time is that of gui.main_window in a fresh interpreter (the
+best of a few runs). For each size a session of a generated story is
+closed once the way the editor closes it, then restored both ways:
+
+    journal   the JSON snapshot and journal, then every scene's YAML
+              rendered again for the preview (what a restart after a
+              crash does)
+    cache     session.cache, with the fragments the preview had rendered
+
+With a display, the editor itself is then started on that session
+(main.py --startup-timing, with XDG_CACHE_HOME pointed at the temporary
+session so the real one is never touched) and its time to interactive,
+from the start of main.py's imports to the first idle moment, is printed
+as well. benchmarks.suite records the same number in its history.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.story_generator import generate_scenes
+from core.journal import Journal, read_session
+from core.scene_graph import SceneGraph
+from core.yaml_export import YamlFragmentCache
+
+DEFAULT_SIZES = (10_000, 100_000)
+IMPORT_RUNS = 5
+INTERACTIVE_RUNS = 3
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_time(module="gui.main_window"):
+    script = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    return min(
+        float(subprocess.run([sys.executable, "-c", script], capture_output=True, text=True,
+                             cwd=ROOT, check=True).stdout)
+        for _ in range(IMPORT_RUNS)
+    )
+
+
+def session_directory(cache_home):
+    """Where the editor keeps its session when XDG_CACHE_HOME is cache_home."""
+    return os.path.join(cache_home, "yaml_scene_manager", "session")
+
+
+def interactive_time(cache_home, runs=INTERACTIVE_RUNS):
+    """Best time to interactive (s) of the editor restoring cache_home's session; None without a display."""
+    env = dict(os.environ, XDG_CACHE_HOME=cache_home)
+    best = None
+    for _ in range(runs):
+        process = subprocess.run([sys.executable, "main.py", "--startup-timing"], capture_output=True,
+                                 text=True, cwd=ROOT, env=env)
+        if process.returncode:
+            if "TclError" in process.stderr:
+                return None  # No display to open the window on
+            raise RuntimeError(f"main.py --startup-timing failed:\n{process.stderr}")
+        seconds = json.loads(process.stdout.splitlines()[-1])["startup.interactive"]
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def write_session(directory, scenes):
+    graph = SceneGraph()
+    fragments = YamlFragmentCache(graph)
+    journal = Journal(graph, directory=directory)
+    graph.load(scenes)
+    fragments.render()  # The preview has shown every scene
+    journal.close({"fragments": fragments.export(list(graph)), "source": None})
+
+
+def restore_journal(directory):
+    graph = SceneGraph()
+    fragments = YamlFragmentCache(graph)
+    graph.load(read_session(directory)[0])
+    fragments.render()
+    return len(graph)
+
+
+def restore_cache(directory):
+    graph = SceneGraph()
+    fragments = YamlFragmentCache(graph)
+    journal = Journal(graph, directory=directory)
+    fragments.preload(list(graph), journal.cached_extra["fragments"])
+    fragments.render()
+    return journal
+
+
+def timed(func, directory):
+    start = time.perf_counter()
+    result = func(directory)
+    return time.perf_counter() - start, result
+
+
+def main(sizes):
+    print(f"import gui.main_window: {import_time() * 1e3:.1f} ms")
+    print(f"{'scenes':>8} {'journal s':>10} {'cache s':>8} {'speedup':>8} {'interactive s':>14}")
+    for count in sizes:
+        with tempfile.TemporaryDirectory() as cache_home:
+            directory = session_directory(cache_home)
+            write_session(directory, generate_scenes(count))
+            journal, journal_count = timed(restore_journal, directory)
+            cache, restored = timed(restore_cache, directory)
+            restored.close()
+            if not journal_count == restored.recovered == count:
+                sys.exit(f"error: restored {journal_count} and {restored.recovered} scenes, expected {count}")
+            interactive = interactive_time(cache_home)
+            interactive = "no display" if interactive is None else f"{interactive:.2f}"
+            print(f"{count:>8} {journal:>10.2f} {cache:>8.2f} {journal / cache:>7.1f}x {interactive:>14}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
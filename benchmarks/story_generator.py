@@ -0,0 +1,93 @@
+"""Synthetic scene projects in the start/videos/options schema, for benchmarks.
+
+    python -m benchmarks.story_generator --scenes 20000 --branching 2.5 out.yaml
+
+Scenes are laid out in story "beats": choices mostly lead one or two beats
+ahead, a share of them (loop_rate) lead back to an earlier beat, and the
+last beat holds the endings. Ids look like the template's ("s12.4": scene 4
+of beat 12). media_reuse is the share of videos and choice images that are
+files already used elsewhere, as when one clip serves several scenes.
+Everything comes from one seeded Random, so a configuration always yields
+the same project.
+"""
+import argparse
+import random
+
+from core.scene_graph import SceneGraph
+from core.yaml_writer import write_yaml
+
+BEAT_WIDTH = 40  # Scenes per beat
+WORDS = ("door", "road", "night", "river", "letter", "stranger", "market", "storm", "tower", "garden",
+         "promise", "secret", "train", "window", "fire", "mirror", "bridge", "key", "song", "shadow")
+VERBS = ("Open", "Follow", "Ignore", "Ask about", "Run from", "Wait for", "Look at", "Take", "Leave", "Call")
+
+
+def generate_scenes(count, branching=2.0, loop_rate=0.05, media_reuse=0.5, seed=0):
+    """Return count editor scene dicts (scene_id, video, scene_type, heading, choices)."""
+    rng = random.Random(seed)
+    beats = max(1, (count + BEAT_WIDTH - 1) // BEAT_WIDTH)
+    ids = [f"s{index // BEAT_WIDTH + 1}.{index % BEAT_WIDTH + 1}" for index in range(count)]
+    videos = []
+    images = []
+
+    def media(pool, prefix, extension):
+        if pool and rng.random() < media_reuse:
+            return rng.choice(pool)
+        name = f"{prefix}{len(pool) + 1}.{extension}"
+        pool.append(name)
+        return name
+
+    scenes = []
+    for index, scene_id in enumerate(ids):
+        beat = index // BEAT_WIDTH
+        choices = []
+        if beat < beats - 1:
+            # Between 1 and 2 * branching - 1 choices, branching on average
+            wanted = max(1, round(rng.uniform(1, 2 * branching - 1)))
+            for number in range(wanted):
+                if beat and rng.random() < loop_rate:
+                    target_beat = rng.randrange(beat)
+                else:
+                    target_beat = min(beats - 1, beat + rng.choice((1, 1, 1, 2)))
+                target = min(count - 1, target_beat * BEAT_WIDTH + rng.randrange(BEAT_WIDTH))
+                choices.append({
+                    "option": f"{rng.choice(VERBS)} the {rng.choice(WORDS)} ({number + 1})",
+                    "next_scene": ids[target],
+                    "image": media(images, "Choice", "jpg") if rng.random() < 0.7 else None,
+                    "temporary": rng.random() < 0.05,
+                })
+        scene_type = "Question" if len(choices) > 1 else "Continue"
+        heading = (f"What about the {rng.choice(WORDS)}?" if scene_type == "Question"
+                   else f"The {rng.choice(WORDS)} and the {rng.choice(WORDS)}")
+        scenes.append({
+            "scene_id": scene_id,
+            "video": media(videos, "Scene", "mp4"),
+            "scene_type": scene_type,
+            "heading": heading,
+            "choices": choices,
+        })
+    return scenes
+
+
+def write_story(file_path, count, **options):
+    """Generate a project and save it as YAML; returns the scenes."""
+    scenes = generate_scenes(count, **options)
+    write_yaml(SceneGraph(scenes), file_path)
+    return scenes
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Write a synthetic scene project.")
+    parser.add_argument("output", help="YAML file to write")
+    parser.add_argument("--scenes", type=int, default=10_000)
+    parser.add_argument("--branching", type=float, default=2.0, help="average choices per scene")
+    parser.add_argument("--loop-rate", type=float, default=0.05, help="share of choices leading back")
+    parser.add_argument("--media-reuse", type=float, default=0.5, help="share of media files used more than once")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    write_story(args.output, args.scenes, branching=args.branching, loop_rate=args.loop_rate,
+                media_reuse=args.media_reuse, seed=args.seed)
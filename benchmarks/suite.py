@@ -0,0 +1,271 @@
+"""Repeatable benchmark suite over generated projects, with a JSON history.
+
+Run from the repository root:
+
+    python -m benchmarks.suite [--sizes 1000 10000] [--repeat 5] [--only load save]
+
+Every case runs `repeat` times per project size on a project from
+benchmarks.story_generator (same seed, so the same project every run);
+the median and the fastest run are printed and appended to the history
+file (benchmarks/history.json by default) together with the commit,
+Python version and settings. Each run is compared with the last recorded
+run that used the same settings, so a regression shows up as a ratio
+above 1.
+
+Cases:
+    load           parse a project file into scene dicts
+    generate_yaml  yaml.dump of the whole document (the uncached path)
+    render_cached  the preview's render from cached per-scene fragments
+    save           write_yaml to disk, reusing cached fragments
+    validate       missing next_scene references
+    story_check    reachability, dead ends and loops (StoryAnalyzer)
+    scene_list     one scene list refresh (needs a display; skipped without)
+    duplicate      one Duplicate Scene, with undo history and YAML cache attached
+    startup        main.py's time to interactive, restoring a session of the
+                   project (needs a display; skipped without)
+
+Nothing here needs a display except scene_list and startup.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from benchmarks.bench_startup import interactive_time, session_directory, write_session
+from benchmarks.story_generator import write_story
+from core.graph_analysis import StoryAnalyzer
+from core.history import History
+from core.scene_graph import SceneGraph
+from core.yaml_export import YamlFragmentCache, generate_yaml
+from core.yaml_loader import load_scenes
+from core.yaml_writer import write_yaml
+
+DEFAULT_SIZES = (1_000, 10_000)
+DEFAULT_REPEAT = 5
+HISTORY_PATH = os.path.join(os.path.dirname(__file__), "history.json")
+STORY_OPTIONS = {"branching": 2.0, "loop_rate": 0.05, "media_reuse": 0.5, "seed": 0}
+LIST_REFRESHES = 50  # Scene list refreshes per repetition
+DUPLICATES = 200  # Duplicates per repetition
+
+
+class Fixture:
+    """One generated project: the scene dicts, their file, and a scratch folder."""
+
+    def __init__(self, size, folder):
+        self.size = size
+        self.folder = folder
+        self.file_path = os.path.join(folder, f"story_{size}.yaml")
+        self.scenes = write_story(self.file_path, size, **STORY_OPTIONS)
+
+
+class Skipped(Exception):
+    """A case cannot run here (e.g. no display)."""
+
+
+def case_load(fixture):
+    started = time.perf_counter()
+    scenes = load_scenes(fixture.file_path)
+    elapsed = time.perf_counter() - started
+    assert len(scenes) == fixture.size
+    return elapsed
+
+
+def case_generate_yaml(fixture):
+    started = time.perf_counter()
+    generate_yaml(fixture.scenes)
+    return time.perf_counter() - started
+
+
+def case_render_cached(fixture):
+    fragments = YamlFragmentCache(SceneGraph(fixture.scenes))
+    fragments.render()  # Fill the cache, as loading does
+    started = time.perf_counter()
+    fragments.render()
+    return time.perf_counter() - started
+
+
+def case_save(fixture):
+    graph = SceneGraph(fixture.scenes)
+    fragments = YamlFragmentCache(graph)
+    fragments.render()
+    started = time.perf_counter()
+    write_yaml(graph, os.path.join(fixture.folder, "saved.yaml"), fragments)
+    return time.perf_counter() - started
+
+
+def case_validate(fixture):
+    graph = SceneGraph(fixture.scenes)
+    started = time.perf_counter()
+    graph.missing_references()
+    return time.perf_counter() - started
+
+
+def case_story_check(fixture):
+    graph = SceneGraph(fixture.scenes)
+    started = time.perf_counter()
+    StoryAnalyzer(graph).report()
+    return time.perf_counter() - started
+
+
+def case_scene_list(fixture):
+    """Per refresh, scrolled to the middle of the list."""
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:  # ImportError, or TclError without a display
+        raise Skipped(f"no display ({type(e).__name__})")
+    try:
+        from gui.scene_list import SceneList
+
+        scene_list = SceneList(root, SceneGraph(fixture.scenes), height=40)
+        scene_list.frame.pack(fill=tk.BOTH, expand=True)
+        root.update()
+        scene_list.see(fixture.size // 2)
+        started = time.perf_counter()
+        for _ in range(LIST_REFRESHES):
+            scene_list.refresh()
+            root.update_idletasks()
+        return (time.perf_counter() - started) / LIST_REFRESHES
+    finally:
+        root.destroy()
+
+
+def case_duplicate(fixture):
+    """Per duplicate, done the way MainWindow.duplicate_scene does it."""
+    graph = SceneGraph(fixture.scenes)
+    history = History(graph)
+    fragments = YamlFragmentCache(graph)
+    rng = random.Random(1)
+    indexes = [rng.randrange(fixture.size) for _ in range(DUPLICATES)]
+    started = time.perf_counter()
+    for index in indexes:
+        original = graph[index]
+        duplicate = dict(original)
+        duplicate["choices"] = [dict(choice) for choice in original.get("choices", [])]
+        duplicate["scene_id"] = graph.unique_id(original["scene_id"])
+        with history.group("Duplicate scene"):
+            graph.insert(index + 1, duplicate)
+        fragments.scene_fragments(duplicate)  # The preview renders the new scene
+    return (time.perf_counter() - started) / DUPLICATES
+
+
+def case_startup(fixture):
+    """Launch to first idle moment of a fresh editor process, restoring the project as its session."""
+    cache_home = os.path.join(fixture.folder, f"cache_{fixture.size}")
+    if not os.path.isdir(cache_home):
+        write_session(session_directory(cache_home), fixture.scenes)
+    seconds = interactive_time(cache_home, runs=1)
+    if seconds is None:
+        raise Skipped("no display")
+    return seconds
+
+
+CASES = {
+    "load": case_load,
+    "generate_yaml": case_generate_yaml,
+    "render_cached": case_render_cached,
+    "save": case_save,
+    "validate": case_validate,
+    "story_check": case_story_check,
+    "scene_list": case_scene_list,
+    "duplicate": case_duplicate,
+    "startup": case_startup,
+}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def read_history(file_path):
+    try:
+        with open(file_path, encoding="utf-8") as history_file:
+            return json.load(history_file)
+    except FileNotFoundError:
+        return []
+
+
+def write_history(file_path, runs):
+    temporary = file_path + ".tmp"
+    with open(temporary, "w", encoding="utf-8") as history_file:
+        json.dump(runs, history_file, indent=1)
+    os.replace(temporary, file_path)
+
+
+def run(sizes, repeat, names):
+    """Run the cases; returns {"<case>@<size>": {"median": s, "min": s} or {"skipped": reason}}."""
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        for size in sizes:
+            fixture = Fixture(size, folder)
+            for name in names:
+                key = f"{name}@{size}"
+                try:
+                    timings = [CASES[name](fixture) for _ in range(repeat)]
+                except Skipped as e:
+                    results[key] = {"skipped": str(e)}
+                    continue
+                results[key] = {"median": statistics.median(timings), "min": min(timings)}
+    return results
+
+
+def format_seconds(seconds):
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds * 1e6:.1f} us"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the benchmark suite and record it in a JSON history.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--only", nargs="+", choices=sorted(CASES), help="run just these cases")
+    parser.add_argument("--history", default=HISTORY_PATH, help="JSON file runs are appended to")
+    parser.add_argument("--no-record", action="store_true", help="do not append this run to the history")
+    args = parser.parse_args(argv)
+
+    names = args.only or list(CASES)
+    settings = {"sizes": args.sizes, "repeat": args.repeat, "story": STORY_OPTIONS}
+    history = read_history(args.history)
+    previous = next((entry for entry in reversed(history) if entry["settings"] == settings), None)
+
+    results = run(args.sizes, args.repeat, names)
+
+    print(f"{'case':<24} {'median':>10} {'min':>10} {'vs last':>8}")
+    for key, result in results.items():
+        if "skipped" in result:
+            print(f"{key:<24} {'skipped: ' + result['skipped']}")
+            continue
+        before = previous and previous["results"].get(key, {}).get("median")
+        ratio = f"{result['median'] / before:7.2f}x" if before else ""
+        print(f"{key:<24} {format_seconds(result['median']):>10} {format_seconds(result['min']):>10} {ratio:>8}")
+    if previous:
+        print(f"(compared with {previous['commit'] or 'unknown commit'} at {previous['time']})")
+
+    if not args.no_record:
+        history.append({
+            "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "settings": settings,
+            "results": results,
+        })
+        write_history(args.history, history)
+
+
+if __name__ == "__main__":
+    main()
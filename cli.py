@@ -0,0 +1,259 @@
+"""Headless validation and compilation of scene YAML files.
+
+    python cli.py validate story1.yaml story2.yaml ...
+    python cli.py compile --output-dir build/ stories/*.yaml
+    python cli.py pack --output-dir build/ stories/*.yaml
+    python cli.py paths --simulate 1000000 story.yaml
+    python cli.py audit --source-folder media/ story1.yaml story2.yaml
+    python cli.py publish --source-folder media/ --output dist/story [--zip] story.yaml
+
+Files are processed in parallel across a process pool and one JSON object
+per file is printed to stdout (JSON Lines). The exit status is 0 when every
+file loaded and has no invalid next_scene references, 1 otherwise; with
+--strict, unreachable scenes and dead ends (Question scenes without
+choices) fail too, while Continue scenes without choices are endings.
+Only core modules are imported, never tkinter.
+
+paths prints playthrough statistics instead: route counts to every ending
+and the scenes players rarely see, estimated from random playthroughs.
+
+audit checks one source folder's videos/ and images/ against the media
+every given file uses, and prints a single JSON object: unused files,
+references to files that don't exist and sets of identical files. It
+exits with 1 if anything is missing.
+
+publish writes one story and exactly the media it uses into a bundle
+folder (see core.publish); publishing into the same folder again only
+copies what changed. It exits with 1 if referenced media is missing.
+
+A multi-file project root (*.project.yaml) is treated as all of its
+chapters merged in order, so compile turns it into the flat file the
+player reads.
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from core.graph_analysis import StoryAnalyzer
+from core.media_audit import MAX_WORKERS, audit
+from core.path_analytics import WalkTable, analyze_paths, simulate
+from core.project import PROJECT_SUFFIX, load_merged
+from core.publish import publish
+from core.scene_graph import SceneGraph
+from core.scene_pack import write_pack
+from core.yaml_writer import write_yaml
+
+
+PACK_EXTENSION = ".scpk"
+WRITERS = {"compile": write_yaml, "pack": write_pack}
+
+
+def check_file(file_path, output_path=None, strict=False, command="compile"):
+    """Load, analyse and optionally re-emit one project file; returns a JSON-able dict."""
+    result = {"file": file_path, "ok": False}
+    try:
+        scenes = SceneGraph(load_merged(file_path))
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        return result
+
+    report = StoryAnalyzer(scenes).report()
+    result.update({
+        "scenes": len(scenes),
+        "start": scenes.start_id,
+        "missing": [list(pair) for pair in report.missing],
+        "unreachable": report.unreachable,
+        "dead_ends": report.dead_ends,
+        "loops": report.cycles,
+    })
+    result["ok"] = not report.missing and (not strict or not (report.unreachable or report.dead_ends))
+
+    if output_path and result["ok"]:
+        try:
+            WRITERS[command](scenes, output_path)
+            result["output"] = output_path
+        except OSError as e:
+            result["ok"] = False
+            result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def path_stats(file_path, playthroughs=0, seed=None, rare=10):
+    """Route counts per ending and the rarest scenes of one project file, as a JSON-able dict."""
+    result = {"file": file_path, "ok": False}
+    try:
+        scenes = SceneGraph(load_merged(file_path))
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        return result
+
+    report = analyze_paths(scenes)
+    result.update({
+        "ok": True,
+        "scenes": len(scenes),
+        "start": scenes.start_id,
+        "playthroughs": str(report.total_paths),  # Can be far beyond what JSON readers take as a number
+        "loops": report.loop_count,
+        "endings": [
+            {"scene": ending.scene_id, "routes": str(ending.paths), "shortest": ending.shortest,
+             "longest": ending.longest, "through_loops": ending.through_loops, "incomplete": ending.incomplete}
+            for ending in report.endings
+        ],
+        "rarest_routes": [[scene_id, share] for scene_id, share in report.rarest(rare)],
+    })
+    if playthroughs:
+        simulation = simulate(WalkTable(scenes), playthroughs, seed)
+        result["simulation"] = {
+            "playthroughs": simulation.playthroughs,
+            "endings": simulation.endings,
+            "stuck": simulation.stuck,
+            "broken": simulation.broken,
+            "rarest_seen": [[scene_id, share] for scene_id, share in simulation.rarest(rare)],
+        }
+    return result
+
+
+def audit_files(file_paths, source_folder, workers=MAX_WORKERS):
+    """Audit the media folders against every scene of file_paths; returns a JSON-able dict."""
+    scenes = []
+    for file_path in file_paths:
+        try:
+            scenes.extend(load_merged(file_path))
+        except Exception as e:
+            return {"files": file_paths, "ok": False, "error": f"{file_path}: {type(e).__name__}: {e}"}
+    report = audit(scenes, source_folder, workers)
+    return {
+        "files": file_paths,
+        "ok": not any(report.missing.values()),
+        "unused": {subfolder: names for subfolder, names in report.unused.items()},
+        "unused_bytes": report.unused_bytes,
+        "missing": {
+            subfolder: {name: [user if isinstance(user, str) else list(user) for user in users]
+                        for name, users in missing.items()}
+            for subfolder, missing in report.missing.items()
+        },
+        "duplicates": [[os.path.relpath(path, source_folder) for path in group] for group in report.duplicates],
+        "duplicate_bytes": report.duplicate_bytes,
+    }
+
+
+def publish_file(file_path, source_folder, output_dir, link=False, archive=False, workers=MAX_WORKERS):
+    """Publish one project file and its media into output_dir; returns a JSON-able dict."""
+    result = {"file": file_path, "ok": False}
+    try:
+        scenes = load_merged(file_path)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        return result
+    yaml_name = os.path.basename(file_path).replace(PROJECT_SUFFIX, ".yaml")
+    report = publish(scenes, source_folder, output_dir, yaml_name, link=link, archive=archive, max_workers=workers)
+    result.update({
+        "ok": not report.missing,
+        "output": output_dir,
+        "archive": report.archive,
+        "copied": len(report.copied),
+        "linked": len(report.linked),
+        "unchanged": len(report.unchanged),
+        "removed": report.removed,
+        "missing": report.missing,
+        "bytes_copied": report.bytes_copied,
+    })
+    return result
+
+
+def _check_file_args(args):
+    if args[0] == "paths":
+        return path_stats(*args[1:])
+    return check_file(*args[1:])
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Validate or compile scene YAML files without the GUI.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for name, help_text in (
+        ("validate", "check next_scene references, reachability, dead ends and loops"),
+        ("compile", "validate, then re-emit each file in the exported start/videos/options format"),
+        ("pack", "validate, then compile each file into a binary scene pack for the player"),
+        ("paths", "count playthroughs per ending and find rarely seen scenes"),
+    ):
+        command = subparsers.add_parser(name, help=help_text)
+        command.add_argument("files", nargs="+", help="scene YAML files")
+        command.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                             help="worker processes (default: CPU count)")
+        if name == "paths":
+            command.add_argument("--simulate", type=int, default=0, metavar="N",
+                                 help="also play N random playthroughs to estimate how often scenes are seen")
+            command.add_argument("--seed", type=int, help="random seed for --simulate")
+            command.add_argument("--rare", type=int, default=10, help="how many rarest scenes to list")
+            continue
+        command.add_argument("--strict", action="store_true",
+                             help="also fail on unreachable scenes and dead ends (Question scenes without "
+                                  "choices; Continue scenes without choices are endings)")
+        if name in WRITERS:
+            command.add_argument("-o", "--output-dir", required=True, help="where compiled files are written")
+
+    command = subparsers.add_parser("audit", help="find unused, missing and duplicate media files")
+    command.add_argument("files", nargs="+", help="scene YAML files that share the media folders")
+    command.add_argument("--source-folder", required=True, help="folder holding videos/ and images/")
+    command.add_argument("--threads", type=int, default=MAX_WORKERS, help="hashing threads")
+
+    command = subparsers.add_parser("publish", help="bundle a story with exactly the media it uses")
+    command.add_argument("file", help="scene YAML file")
+    command.add_argument("--source-folder", required=True, help="folder holding videos/ and images/")
+    command.add_argument("-o", "--output", required=True,
+                         help="bundle folder; publishing into it again copies only what changed")
+    command.add_argument("--link", action="store_true", help="hard-link media instead of copying where possible")
+    command.add_argument("--zip", action="store_true", help="also write <output>.zip")
+    command.add_argument("--threads", type=int, default=MAX_WORKERS, help="copying threads")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "audit":
+        return 0 if _emit([audit_files(args.files, args.source_folder, args.threads)]) else 1
+    if args.command == "publish":
+        result = publish_file(args.file, args.source_folder, args.output, args.link, args.zip, args.threads)
+        return 0 if _emit([result]) else 1
+
+    output_paths = [None] * len(args.files)
+    if args.command in WRITERS:
+        os.makedirs(args.output_dir, exist_ok=True)
+        output_paths = [
+            os.path.join(args.output_dir, os.path.basename(path).replace(PROJECT_SUFFIX, ".yaml"))
+            for path in args.files
+        ]
+        if args.command == "pack":
+            output_paths = [os.path.splitext(path)[0] + PACK_EXTENSION for path in output_paths]
+        if len(set(output_paths)) != len(output_paths):
+            print("error: input files share a file name; compile them in separate runs", file=sys.stderr)
+            return 2
+
+    if args.command == "paths":
+        work = [("paths", path, args.simulate, args.seed, args.rare) for path in args.files]
+    else:
+        work = [("check", path, output, args.strict, args.command) for path, output in zip(args.files, output_paths)]
+    jobs = max(1, min(args.jobs, len(work)))
+    if jobs == 1:
+        results = map(_check_file_args, work)
+        all_ok = _emit(results)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            all_ok = _emit(pool.map(_check_file_args, work, chunksize=max(1, len(work) // (jobs * 4))))
+    return 0 if all_ok else 1
+
+
+def _emit(results):
+    all_ok = True
+    for result in results:
+        all_ok = all_ok and result["ok"]
+        sys.stdout.write(json.dumps(result) + "\n")
+    sys.stdout.flush()
+    return all_ok
+
+
+if __name__ == "__main__":
+    sys.exit(main())
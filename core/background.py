@@ -0,0 +1,61 @@
+import queue
+import threading
+
+from core import perf
+
+
+class JobCancelled(Exception):
+    """Raised inside a job's run() to stop it early."""
+
+
+class BackgroundJob:
+    """Run self.run() on a daemon thread and report back through a queue.
+
+    Worker threads must not touch Tk, so jobs only post messages; the GUI
+    drains self.messages from its own event loop. run() may post its own
+    intermediate messages with self.post(...). When it returns, one of
+
+        ("done", result)
+        ("cancelled",)
+        ("error", exception)
+
+    is posted as the last message. Every run is timed as "job.<name>".
+    """
+
+    name = "BackgroundJob"
+
+    def __init__(self):
+        self.messages = queue.Queue()
+        self._cancelled = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def check_cancelled(self):
+        if self._cancelled.is_set():
+            raise JobCancelled()
+
+    def post(self, *message):
+        self.messages.put(message)
+
+    def run(self):
+        raise NotImplementedError
+
+    def _run(self):
+        try:
+            with perf.span(f"job.{self.name}"):
+                result = self.run()
+            self.post("done", result)
+        except JobCancelled:
+            self.post("cancelled")
+        except Exception as e:
+            self.post("error", e)
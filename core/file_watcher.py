@@ -0,0 +1,100 @@
+"""Notice files and folders changed by other programs, without blocking the UI.
+
+A FolderWatcher polls its targets on its own thread: a folder is listed
+with os.scandir (names, mtimes and sizes of the files directly in it), a
+file is just stat()ed, and each snapshot is compared with the last one
+reported. A change is only posted once two polls in a row agree, so a
+file that is still being written (a clip being copied in, a YAML file
+being saved) is reported once, when it has settled.
+
+    watcher = FolderWatcher().start()
+    watcher.watch("videos", "/project/videos")
+    # the GUI drains watcher.messages: ("changed", key, added, removed, modified)
+"""
+import os
+import threading
+
+from core import perf
+from core.background import BackgroundJob
+
+POLL_INTERVAL = 1.0  # Seconds between polls
+
+
+def snapshot(path):
+    """{name: (mtime_ns, size)} for the files in a folder, or for a single file; {} if missing."""
+    try:
+        if not os.path.isdir(path):
+            stat = os.stat(path)
+            return {os.path.basename(path): (stat.st_mtime_ns, stat.st_size)}
+        files = {}
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    stat = entry.stat()
+                    files[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        return files
+    except OSError:
+        return {}
+
+
+def diff(before, after):
+    """Return (added, removed, modified) names, each sorted."""
+    added = sorted(name for name in after if name not in before)
+    removed = sorted(name for name in before if name not in after)
+    modified = sorted(name for name, signature in after.items()
+                      if name in before and before[name] != signature)
+    return added, removed, modified
+
+
+class FolderWatcher(BackgroundJob):
+    """Poll watched paths until cancelled; posts ("changed", key, added, removed, modified).
+
+    watch() and unwatch() may be called from any thread. A path starts
+    out as it is when watch() is called, so only later changes are posted.
+    """
+
+    name = "FolderWatcher"
+
+    def __init__(self, interval=POLL_INTERVAL):
+        super().__init__()
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._targets = {}  # key -> [path, reported snapshot, previous poll's snapshot]
+
+    def watch(self, key, path):
+        """Start watching path under key (replacing whatever key watched before)."""
+        current = snapshot(path)
+        with self._lock:
+            self._targets[key] = [path, current, current]
+
+    def unwatch(self, key):
+        with self._lock:
+            self._targets.pop(key, None)
+
+    def watched(self, key):
+        """The path watched under key, or None."""
+        with self._lock:
+            target = self._targets.get(key)
+            return target[0] if target else None
+
+    def run(self):
+        while not self._cancelled.wait(self.interval):
+            self.poll()
+
+    def poll(self):
+        """One pass over every target (run() calls this on the watcher thread)."""
+        with self._lock:
+            targets = [(key, target[0]) for key, target in self._targets.items()]
+        with perf.span("watch.poll"):
+            for key, path in targets:
+                current = snapshot(path)
+                with self._lock:
+                    target = self._targets.get(key)
+                    if target is None or target[0] != path:
+                        continue  # Unwatched or retargeted while we were listing
+                    reported, previous = target[1], target[2]
+                    target[2] = current
+                    if current == reported or current != previous:
+                        continue  # Nothing new, or still changing: wait for it to settle
+                    target[1] = current
+                self.post("changed", key, *diff(reported, current))
@@ -1,8 +1,10 @@
 import os
+from core.media_catalog import MediaCatalog
 
 class FolderManager:
     def __init__(self):
         self.source_folder = None
+        self.media = MediaCatalog(self)  # Cached videos/ and images/ listings
 
     def validate_folder_structure(self, folder_path):
         """Check if the folder contains 'videos/' and 'images/' subfolders."""
@@ -0,0 +1,348 @@
+from core import perf
+from core.background import BackgroundJob
+
+
+# Whole-graph passes, O(V + E). adjacency maps every scene id to the list of
+# scene ids its choices lead to (targets that do not exist are left out).
+def reachable_from(start_id, adjacency):
+    """Breadth-first search; returns the set of scene ids reachable from start_id."""
+    if start_id is None or start_id not in adjacency:
+        return set()
+    reached = {start_id}
+    frontier = [start_id]
+    while frontier:
+        next_frontier = []
+        for scene_id in frontier:
+            for target in adjacency[scene_id]:
+                if target not in reached:
+                    reached.add(target)
+                    next_frontier.append(target)
+        frontier = next_frontier
+    return reached
+
+
+def strongly_connected_components(adjacency):
+    """Tarjan's algorithm, iterative so 100k-scene chains don't hit the recursion limit.
+
+    Returns {scene_id: component number}.
+    """
+    index_of = {}
+    lowlink = {}
+    on_stack = set()
+    stack = []
+    component = {}
+    counter = 0
+    components = 0
+
+    for root in adjacency:
+        if root in index_of:
+            continue
+        index_of[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(adjacency[root]))]
+        while work:
+            node, targets = work[-1]
+            advanced = False
+            for target in targets:
+                if target not in index_of:
+                    index_of[target] = lowlink[target] = counter
+                    counter += 1
+                    stack.append(target)
+                    on_stack.add(target)
+                    work.append((target, iter(adjacency[target])))
+                    advanced = True
+                    break
+                if target in on_stack and index_of[target] < lowlink[node]:
+                    lowlink[node] = index_of[target]
+            if advanced:
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                if lowlink[node] < lowlink[parent]:
+                    lowlink[parent] = lowlink[node]
+            if lowlink[node] == index_of[node]:
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component[member] = components
+                    if member == node:
+                        break
+                components += 1
+    return component
+
+
+def adjacency_of(scene_graph):
+    """Snapshot of the graph's existing-target adjacency, in scene order."""
+    return {
+        scene_id: [target for target in scene_graph.successors(scene_id) if target in scene_graph]
+        for scene_id in scene_graph.ids()
+    }
+
+
+class AnalysisReport:
+    """Issues found in the story graph; lists are in scene order."""
+
+    def __init__(self, unreachable, orphans, dead_ends, cycles, missing, complete):
+        self.unreachable = unreachable  # Scenes the player can never get to from start
+        self.orphans = orphans  # Unreachable scenes that nothing points at
+        self.dead_ends = dead_ends  # Question scenes without any choices (Continue ones are endings)
+        self.cycles = cycles  # Lists of scene ids that can loop back to themselves
+        self.missing = missing  # (scene_id, next_scene) pairs with no such scene
+        self.complete = complete  # False while a full pass is still pending
+
+    @property
+    def issue_count(self):
+        return len(self.unreachable) + len(self.dead_ends) + len(self.cycles) + len(self.missing)
+
+    def summary(self):
+        text = (
+            f"{len(self.unreachable)} unreachable, {len(self.dead_ends)} dead ends, "
+            f"{len(self.cycles)} loops, {len(self.missing)} missing references"
+        )
+        return text if self.complete else text + " (updating...)"
+
+
+class AnalysisJob(BackgroundJob):
+    """Reachability and SCC pass over an adjacency snapshot, off the UI thread."""
+
+    name = "StoryAnalysis"
+
+    def __init__(self, start_id, adjacency, version):
+        super().__init__()
+        self.start_id = start_id
+        self.adjacency = adjacency
+        self.version = version
+
+    def run(self):
+        reachable = reachable_from(self.start_id, self.adjacency)
+        self.check_cancelled()
+        return reachable, strongly_connected_components(self.adjacency)
+
+
+class StoryAnalyzer:
+    """Keeps reachability, dead ends, loops and missing references up to date.
+
+    Every SceneGraph change is applied incrementally where that is exact:
+    saves that keep the same targets touch nothing but the scene itself,
+    new edges from reachable scenes extend reachability with a local BFS,
+    and edges into scenes without choices (e.g. auto-created placeholders)
+    cannot close a loop. Changes that may shrink reachability or split a
+    loop mark the graph for a full O(V + E) pass, which the GUI runs as an
+    AnalysisJob in the background (or run_full() runs synchronously).
+    """
+
+    def __init__(self, scene_graph):
+        self.scene_graph = scene_graph
+        self._edges = {}  # scene_id -> set of targets, as last seen
+        self._dead_ends = set()
+        self._missing = set()  # Targets referenced by some choice that do not exist
+        self._reachable = set()
+        self._component = {}  # scene_id -> component number
+        self._component_size = {}  # component number -> member count
+        self._self_loops = set()
+        self._next_component = 0
+        self._start_id = None
+        self._version = 0  # Bumped on every change that a running full pass could miss
+        self._needs_full = False
+        scene_graph.add_listener(self._on_graph_change)
+        self.run_full()
+
+    # Full passes
+    @property
+    def needs_full(self):
+        return self._needs_full
+
+    def begin_full(self):
+        """Return a started AnalysisJob over a snapshot of the current graph."""
+        return AnalysisJob(self.scene_graph.start_id, adjacency_of(self.scene_graph), self._version).start()
+
+    def finish_full(self, job, result):
+        """Apply a finished job's result; returns False if the graph changed meanwhile."""
+        if job.version != self._version:
+            return False
+        self._apply_full(*result)
+        return True
+
+    def run_full(self):
+        """Recompute everything synchronously."""
+        adjacency = adjacency_of(self.scene_graph)
+        self._rebuild_local()
+        self._apply_full(
+            reachable_from(self.scene_graph.start_id, adjacency), strongly_connected_components(adjacency)
+        )
+
+    def _rebuild_local(self):
+        graph = self.scene_graph
+        self._edges = {scene["scene_id"]: set(graph.successors(scene["scene_id"])) for scene in graph}
+        self._dead_ends = {scene["scene_id"] for scene in graph if self._is_dead_end(scene)}
+        self._missing = {target for _, target in graph.missing_references()}
+        self._self_loops = {scene_id for scene_id, targets in self._edges.items() if scene_id in targets}
+        self._start_id = graph.start_id
+
+    def _apply_full(self, reachable, component):
+        self._reachable = reachable
+        self._component = component
+        sizes = {}
+        for number in component.values():
+            sizes[number] = sizes.get(number, 0) + 1
+        self._component_size = sizes
+        self._next_component = len(sizes)
+        self._needs_full = False
+
+    # Incremental maintenance
+    @staticmethod
+    def _is_dead_end(scene):
+        # A Continue scene without choices is an ending; a Question without any leads nowhere
+        return scene.get("scene_type") == "Question" and not scene.get("choices") and not scene.get("auto_created")
+
+    def _mark_full(self):
+        self._needs_full = True
+
+    def _on_graph_change(self, event, *args):
+        self._version += 1
+        if event in ("reset", "extend"):
+            self._rebuild_local()
+            self._mark_full()
+            return
+        if event in ("swap", "move"):
+            if self.scene_graph.start_id != self._start_id:
+                self._start_id = self.scene_graph.start_id
+                self._mark_full()
+            return
+
+        scene_id = args[1]
+        if event == "remove":
+            self._on_remove(scene_id)
+        else:
+            self._on_put(scene_id, event == "insert")
+
+        if self.scene_graph.start_id != self._start_id:
+            self._start_id = self.scene_graph.start_id
+            self._mark_full()
+
+    def _on_put(self, scene_id, inserted):
+        graph = self.scene_graph
+        scene = graph.get(scene_id)
+        old = self._edges.get(scene_id, set())
+        new = set(graph.successors(scene_id))
+        self._edges[scene_id] = new
+
+        if self._is_dead_end(scene):
+            self._dead_ends.add(scene_id)
+        else:
+            self._dead_ends.discard(scene_id)
+        if scene_id in new:
+            self._self_loops.add(scene_id)
+        else:
+            self._self_loops.discard(scene_id)
+
+        added = new - old
+        removed = old - new
+        for target in added:
+            if target not in graph:
+                self._missing.add(target)
+        for target in removed:
+            if target not in graph and not graph.reference_count(target):
+                self._missing.discard(target)
+
+        if inserted:
+            self._missing.discard(scene_id)
+            self._component[scene_id] = self._next_component
+            self._component_size[self._next_component] = 1
+            self._next_component += 1
+            # Choices that used to point at a missing scene are now real edges into it
+            if graph.reference_count(scene_id) and new:
+                self._mark_full()
+
+        if self._needs_full:
+            return
+
+        # Reachability
+        if scene_id in self._reachable and any(target in graph for target in removed):
+            self._mark_full()
+            return
+        if scene_id not in self._reachable and (
+            scene_id == graph.start_id
+            or any(source in self._reachable for source in graph.predecessors(scene_id))
+        ):
+            self._extend_reachable([scene_id])
+        elif scene_id in self._reachable:
+            self._extend_reachable([target for target in added if target in graph])
+
+        # Loops
+        component = self._component
+        for target in removed:
+            if target in graph and component.get(target) == component[scene_id] \
+                    and self._component_size[component[scene_id]] > 1:
+                self._mark_full()  # The loop may have been broken
+                return
+        for target in added:
+            if target not in graph or component.get(target) == component[scene_id]:
+                continue
+            if self._edges.get(target) and graph.reference_count(scene_id):
+                self._mark_full()  # The new choice may close a loop
+                return
+
+    def _on_remove(self, scene_id):
+        graph = self.scene_graph
+        old = self._edges.pop(scene_id, set())
+        self._dead_ends.discard(scene_id)
+        self._self_loops.discard(scene_id)
+        for target in old:
+            if target not in graph and not graph.reference_count(target):
+                self._missing.discard(target)
+        if graph.reference_count(scene_id):
+            self._missing.add(scene_id)
+
+        number = self._component.pop(scene_id, None)
+        was_reachable = scene_id in self._reachable
+        self._reachable.discard(scene_id)
+        if number is not None:
+            self._component_size[number] -= 1
+            if self._component_size[number] > 0:
+                self._mark_full()  # A loop lost a member
+        if was_reachable and any(target in graph for target in old):
+            self._mark_full()
+
+    def _extend_reachable(self, seeds):
+        reachable = self._reachable
+        graph = self.scene_graph
+        frontier = [seed for seed in seeds if seed not in reachable]
+        reachable.update(frontier)
+        while frontier:
+            next_frontier = []
+            for scene_id in frontier:
+                for target in self._edges.get(scene_id, ()):
+                    if target not in reachable and target in graph:
+                        reachable.add(target)
+                        next_frontier.append(target)
+            frontier = next_frontier
+
+    # Results
+    @perf.timed("analysis.report")
+    def report(self):
+        graph = self.scene_graph
+        in_order = lambda ids: sorted(ids, key=graph.index_of)
+
+        unreachable = [scene_id for scene_id in graph.ids() if scene_id not in self._reachable] \
+            if len(self._reachable) < len(graph) else []
+        orphans = [scene_id for scene_id in unreachable if not graph.reference_count(scene_id)]
+
+        members = {}
+        for scene_id, number in self._component.items():
+            if self._component_size.get(number, 0) > 1:
+                members.setdefault(number, []).append(scene_id)
+        cycles = [in_order(ids) for ids in members.values()]
+        cycles.extend([scene_id] for scene_id in self._self_loops if self._component_size.get(
+            self._component.get(scene_id), 1) == 1)
+        cycles.sort(key=lambda ids: graph.index_of(ids[0]))
+
+        missing = [(source, target) for target in self._missing for source in graph.predecessors(target)]
+        missing.sort(key=lambda pair: graph.index_of(pair[0]))
+
+        return AnalysisReport(
+            unreachable, orphans, in_order(self._dead_ends), cycles, missing, not self._needs_full
+        )
@@ -0,0 +1,319 @@
+"""Layered (Sugiyama-style) layout of the story graph for the graph view.
+
+1. Loops are broken by a depth-first search from the start scene: choices
+   that lead back to a scene still on the search stack are "back edges" and
+   are ignored while layering (they are still drawn).
+2. Every scene goes one layer below the deepest scene leading to it
+   (longest path), so the story reads top to bottom.
+3. Scenes within a layer are ordered by barycenter sweeps to cut down
+   crossings; long edges are drawn straight rather than through dummy nodes.
+
+All of it is O(V + E) per sweep and runs in a LayoutJob off the UI thread.
+The result carries a SpatialGrid so the view only draws what is on screen.
+"""
+import math
+import time
+
+from core.background import BackgroundJob
+from core.graph_analysis import adjacency_of
+
+NODE_WIDTH = 120
+NODE_HEIGHT = 36
+NODE_SPACING = 160  # Horizontal distance between neighbours in a layer
+LAYER_SPACING = 110
+SWEEPS = 4  # Down/up barycenter passes
+CELL_SIZE = 480  # Spatial grid cell, in layout units
+EDGE_CELLS = 8  # Edges longer than this many cells go to a coarser grid level
+EDGE_LEVEL_FACTOR = 8
+
+
+def break_loops(scene_ids, adjacency, start_id=None):
+    """Depth-first search from start_id, then from every scene not reached yet.
+
+    Returns (forward adjacency without back edges, scenes in discovery order).
+    """
+    forward = {scene_id: [] for scene_id in scene_ids}
+    state = {}  # scene_id -> 1 while on the stack, 2 once finished
+    discovered = []
+    roots = ([start_id] if start_id in forward else []) + list(scene_ids)
+    for root in roots:
+        if root in state:
+            continue
+        state[root] = 1
+        discovered.append(root)
+        work = [(root, iter(adjacency.get(root, ())))]
+        while work:
+            node, targets = work[-1]
+            for target in targets:
+                seen = state.get(target)
+                if seen == 1:
+                    continue  # Back edge: closes a loop
+                forward[node].append(target)
+                if seen is None:
+                    state[target] = 1
+                    discovered.append(target)
+                    work.append((target, iter(adjacency.get(target, ()))))
+                    break
+            else:
+                state[node] = 2
+                work.pop()
+    return forward, discovered
+
+
+def assign_layers(forward, discovered):
+    """Longest-path layering of the loop-free graph; returns {scene_id: layer}."""
+    indegree = dict.fromkeys(discovered, 0)
+    for targets in forward.values():
+        for target in targets:
+            indegree[target] += 1
+    layer = dict.fromkeys(discovered, 0)
+    ready = [scene_id for scene_id in reversed(discovered) if not indegree[scene_id]]
+    while ready:
+        scene_id = ready.pop()
+        depth = layer[scene_id] + 1
+        for target in forward[scene_id]:
+            if layer[target] < depth:
+                layer[target] = depth
+            indegree[target] -= 1
+            if not indegree[target]:
+                ready.append(target)
+    return layer
+
+
+def order_layers(layer, forward, discovered, sweeps=SWEEPS, check_cancelled=None):
+    """Order each layer by the barycenter of its neighbours; returns a list of layers."""
+    layers = [[] for _ in range(max(layer.values(), default=-1) + 1)]
+    for scene_id in discovered:  # Discovery order keeps siblings together to start with
+        layers[layer[scene_id]].append(scene_id)
+    backward = {scene_id: [] for scene_id in discovered}
+    for source, targets in forward.items():
+        for target in targets:
+            backward[target].append(source)
+
+    # Position as a fraction of the layer's width, so layers of any size compare
+    position = {}
+    for members in layers:
+        _place(members, position)
+    for sweep in range(sweeps):
+        if check_cancelled:
+            check_cancelled()
+        neighbours, sequence = (backward, layers[1:]) if sweep % 2 == 0 else (forward, reversed(layers[:-1]))
+        for members in sequence:
+            keys = {}
+            for scene_id in members:
+                linked = neighbours[scene_id]
+                keys[scene_id] = (sum(position[other] for other in linked) / len(linked)
+                                  if linked else position[scene_id])
+            members.sort(key=keys.__getitem__)
+            _place(members, position)
+    return layers
+
+
+def _place(members, position):
+    width = len(members)
+    for rank, scene_id in enumerate(members):
+        position[scene_id] = (rank + 0.5) / width
+
+
+class SpatialGrid:
+    """Uniform grid of cells for "what is inside this rectangle" queries.
+
+    Nodes are filed under the cell of their centre. Edges go into one of a
+    stack of ever coarser grids (each EDGE_LEVEL_FACTOR times coarser), the
+    finest one in which they cross only a few cells, so a choice spanning a
+    thousand layers costs as much to index as a short one.
+    """
+
+    def __init__(self, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.node_cells = {}  # (column, row) -> [scene_id, ...]
+        self.edge_levels = []  # Per level: (column, row) -> [edge number, ...]
+        self.segments = []  # Edge number -> (x0, y0, x1, y1)
+
+    def _cell(self, x, y, size=None):
+        size = size or self.cell_size
+        return int(x // size), int(y // size)
+
+    def add_node(self, scene_id, x, y):
+        self.node_cells.setdefault(self._cell(x, y), []).append(scene_id)
+
+    def add_edge(self, x0, y0, x1, y1):
+        number = len(self.segments)
+        self.segments.append((x0, y0, x1, y1))
+        length = math.hypot(x1 - x0, y1 - y0)
+        level, size = 0, self.cell_size
+        while length > EDGE_CELLS * size:
+            level += 1
+            size *= EDGE_LEVEL_FACTOR
+        while len(self.edge_levels) <= level:
+            self.edge_levels.append({})
+        for cell in self._walk(x0, y0, x1, y1, size):
+            self.edge_levels[level].setdefault(cell, []).append(number)
+        return number
+
+    def _walk(self, x0, y0, x1, y1, size):
+        """Every cell the segment passes through, in order (a grid walk, not samples)."""
+        column, row = self._cell(x0, y0, size)
+        last_column, last_row = self._cell(x1, y1, size)
+        dx, dy = x1 - x0, y1 - y0
+        column_step, row_step = (1 if dx > 0 else -1), (1 if dy > 0 else -1)
+        # Distance along the segment (0..1) to the next column and row boundary, and between boundaries
+        next_x = ((column + (dx > 0)) * size - x0) / dx if dx else math.inf
+        next_y = ((row + (dy > 0)) * size - y0) / dy if dy else math.inf
+        delta_x = size / abs(dx) if dx else math.inf
+        delta_y = size / abs(dy) if dy else math.inf
+        columns_left, rows_left = abs(last_column - column), abs(last_row - row)
+        cells = [(column, row)]
+        while columns_left or rows_left:
+            if not rows_left or (columns_left and next_x < next_y - 1e-9):
+                column += column_step
+                next_x += delta_x
+                columns_left -= 1
+            elif not columns_left or next_y < next_x - 1e-9:
+                row += row_step
+                next_y += delta_y
+                rows_left -= 1
+            else:
+                # Through a corner: file it under both cells that touch it
+                cells += [(column + column_step, row), (column, row + row_step)]
+                column, row = column + column_step, row + row_step
+                next_x, next_y = next_x + delta_x, next_y + delta_y
+                columns_left, rows_left = columns_left - 1, rows_left - 1
+            cells.append((column, row))
+        return cells
+
+    def _lookup(self, cells, x0, y0, x1, y1, margin=0, size=None):
+        """Contents of the cells covering the rectangle (widened by margin cells)."""
+        first_column, first_row = self._cell(x0, y0, size)
+        last_column, last_row = self._cell(x1, y1, size)
+        first_column, first_row = first_column - margin, first_row - margin
+        last_column, last_row = last_column + margin, last_row + margin
+        if (last_column - first_column + 1) * (last_row - first_row + 1) > len(cells):
+            # Zoomed far out: fewer occupied cells than cells in view
+            return [items for (column, row), items in cells.items()
+                    if first_column <= column <= last_column and first_row <= row <= last_row]
+        return [cells[column, row]
+                for column in range(first_column, last_column + 1)
+                for row in range(first_row, last_row + 1) if (column, row) in cells]
+
+    def nodes_in(self, x0, y0, x1, y1):
+        # Node boxes stick out of their centre's cell by up to half a node
+        return [scene_id for items in self._lookup(self.node_cells, x0, y0, x1, y1, margin=1)
+                for scene_id in items]
+
+    def edges_in(self, x0, y0, x1, y1):
+        found = set()
+        size = self.cell_size
+        for level, edge_cells in enumerate(self.edge_levels):
+            candidates = set()
+            for items in self._lookup(edge_cells, x0, y0, x1, y1, size=size):
+                candidates.update(items)
+            if level:  # Coarse cells are much bigger than the view; check the segments
+                candidates = {number for number in candidates
+                              if _crosses(self.segments[number], x0, y0, x1, y1)}
+            found |= candidates
+            size *= EDGE_LEVEL_FACTOR
+        return found
+
+    def density(self, x0, y0, x1, y1):
+        """(column, row, node count) of the occupied cells in the rectangle."""
+        first_column, first_row = self._cell(x0, y0)
+        last_column, last_row = self._cell(x1, y1)
+        return [(column, row, len(items)) for (column, row), items in self.node_cells.items()
+                if first_column <= column <= last_column and first_row <= row <= last_row]
+
+
+def _crosses(segment, x0, y0, x1, y1):
+    """True if the segment passes through the rectangle (Liang-Barsky clipping)."""
+    sx0, sy0, sx1, sy1 = segment
+    dx, dy = sx1 - sx0, sy1 - sy0
+    low, high = 0.0, 1.0
+    for p, q in ((-dx, sx0 - x0), (dx, x1 - sx0), (-dy, sy0 - y0), (dy, y1 - sy0)):
+        if p == 0:
+            if q < 0:
+                return False
+        else:
+            t = q / p
+            if p < 0:
+                low = max(low, t)
+            else:
+                high = min(high, t)
+            if low > high:
+                return False
+    return True
+
+
+class GraphLayout:
+    """Node positions (centres, in layout units), edges and their spatial index."""
+
+    def __init__(self, positions, edges, seconds=0.0):
+        self.positions = positions  # scene_id -> (x, y)
+        self.edges = edges  # (source, target, is_back_edge)
+        self.seconds = seconds  # Time the layout took
+        self.grid = SpatialGrid()
+        for scene_id, (x, y) in positions.items():
+            self.grid.add_node(scene_id, x, y)
+        for source, target, _ in edges:
+            self.grid.add_edge(*positions[source], *positions[target])
+        xs = [x for x, _ in positions.values()] or [0]
+        ys = [y for _, y in positions.values()] or [0]
+        self.bounds = (min(xs) - NODE_WIDTH, min(ys) - NODE_HEIGHT, max(xs) + NODE_WIDTH, max(ys) + NODE_HEIGHT)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def nodes_in(self, x0, y0, x1, y1):
+        """Scenes whose box overlaps the rectangle."""
+        half_width, half_height = NODE_WIDTH / 2, NODE_HEIGHT / 2
+        positions = self.positions
+        return [scene_id for scene_id in self.grid.nodes_in(x0, y0, x1, y1)
+                if x0 - half_width <= positions[scene_id][0] <= x1 + half_width
+                and y0 - half_height <= positions[scene_id][1] <= y1 + half_height]
+
+    def edges_in(self, x0, y0, x1, y1):
+        """Numbers of the edges that may pass through the rectangle."""
+        return self.grid.edges_in(x0, y0, x1, y1)
+
+    def node_at(self, x, y):
+        """The scene whose box contains the point, or None."""
+        for scene_id in self.grid.nodes_in(x, y, x, y):
+            node_x, node_y = self.positions[scene_id]
+            if abs(node_x - x) <= NODE_WIDTH / 2 and abs(node_y - y) <= NODE_HEIGHT / 2:
+                return scene_id
+        return None
+
+
+def layered_layout(scene_ids, adjacency, start_id=None, check_cancelled=None):
+    """Lay out scenes top to bottom; adjacency maps each scene to its existing targets."""
+    started = time.perf_counter()
+    forward, discovered = break_loops(scene_ids, adjacency, start_id)
+    if check_cancelled:
+        check_cancelled()
+    layers = order_layers(assign_layers(forward, discovered), forward, discovered,
+                          check_cancelled=check_cancelled)
+
+    positions = {}
+    for depth, members in enumerate(layers):
+        offset = (len(members) - 1) / 2  # Centre every layer on x = 0
+        for rank, scene_id in enumerate(members):
+            positions[scene_id] = ((rank - offset) * NODE_SPACING, depth * LAYER_SPACING)
+
+    forward_edges = {(source, target) for source, targets in forward.items() for target in targets}
+    edges = [(source, target, (source, target) not in forward_edges)
+             for source in scene_ids for target in adjacency.get(source, ())]
+    return GraphLayout(positions, edges, time.perf_counter() - started)
+
+
+class LayoutJob(BackgroundJob):
+    """Compute a GraphLayout over a snapshot of the graph, off the UI thread."""
+
+    name = "GraphLayout"
+
+    def __init__(self, scene_graph):
+        super().__init__()
+        self.scene_ids = list(scene_graph.ids())
+        self.adjacency = adjacency_of(scene_graph)
+        self.start_id = scene_graph.start_id
+
+    def run(self):
+        return layered_layout(self.scene_ids, self.adjacency, self.start_id, self.check_cancelled)
@@ -0,0 +1,189 @@
+from collections import deque
+
+HISTORY_LIMIT = 5000  # Oldest steps are dropped beyond this
+
+
+class History:
+    """Undo/redo for a SceneGraph, recorded from its change events.
+
+    Scene dicts in the graph are never edited in place, so a step only keeps
+    references to the scenes it replaced, added or removed; every other scene
+    is shared with the graph. A save on a 50k-scene project costs a couple
+    of references, and undo/redo replays just the scenes the step touched.
+
+    Changes made between begin() and end() (or inside `with history.group()`)
+    become one step, e.g. a save together with the placeholders it auto-creates.
+    """
+
+    def __init__(self, scene_graph, limit=HISTORY_LIMIT):
+        self.scene_graph = scene_graph
+        self._undo = deque(maxlen=limit)  # (label, [change, ...]) per step
+        self._redo = []
+        self._open = None  # Changes of the group being recorded
+        self._label = None
+        self._depth = 0
+        self._replaying = False
+        scene_graph.add_listener(self._on_graph_change)
+
+    # Recording
+    def begin(self, label):
+        """Start collecting changes into one step (groups nest; the outer label wins)."""
+        if self._depth == 0:
+            self._open = []
+            self._label = label
+        self._depth += 1
+
+    def end(self):
+        """Finish the current group; it becomes one undo step if anything changed."""
+        self._depth -= 1
+        if self._depth == 0:
+            changes, self._open = self._open, None
+            self._commit(self._label, changes)
+
+    def abort(self):
+        """Close every open group and roll its changes back instead of keeping them."""
+        if self._depth == 0:
+            return
+        changes, self._open = self._open, None
+        self._depth = 0
+        self._replay(changes, undo=True)
+
+    def group(self, label):
+        return _Group(self, label)
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+
+    def _commit(self, label, changes):
+        if changes:
+            self._undo.append((label, changes))
+            self._redo.clear()
+
+    def _on_graph_change(self, event, *args):
+        if self._replaying:
+            return
+        graph = self.scene_graph
+        if event == "insert":
+            change = ("insert", args[0], graph.get(args[1]))
+        elif event == "update":
+            change = ("update", args[2], graph.get(args[1]))
+        elif event == "remove":
+            change = ("remove", args[0], args[2])
+        elif event == "extend":
+            start, count = args
+            change = ("extend", start, [graph[index] for index in range(start, start + count)])
+        elif event == "reset":
+            change = ("reset", args[0], list(graph))
+        else:  # "swap" and "move"
+            change = (event, args[0], args[1])
+
+        if self._open is not None:
+            self._open.append(change)
+        else:
+            self._commit(_LABELS.get(event, event), [change])
+
+    # Undo / redo
+    @property
+    def can_undo(self):
+        return bool(self._undo) and self._depth == 0
+
+    @property
+    def can_redo(self):
+        return bool(self._redo) and self._depth == 0
+
+    def undo(self):
+        """Revert the last step; returns its label, or None if there was nothing to undo."""
+        if not self.can_undo:
+            return None
+        label, changes = self._undo.pop()
+        self._replay(changes, undo=True)
+        self._redo.append((label, changes))
+        return label
+
+    def redo(self):
+        """Re-apply the last undone step; returns its label, or None."""
+        if not self.can_redo:
+            return None
+        label, changes = self._redo.pop()
+        self._replay(changes, undo=False)
+        self._undo.append((label, changes))
+        return label
+
+    def _replay(self, changes, undo):
+        graph = self.scene_graph
+        self._replaying = True
+        try:
+            if undo:
+                # A reset restores everything before it in one go; later changes are moot
+                for position, change in enumerate(changes):
+                    if change[0] == "reset":
+                        graph.load(change[1])
+                        changes = changes[:position]
+                        break
+                for change in reversed(changes):
+                    self._revert(change)
+            else:
+                for change in changes:
+                    self._apply(change)
+        finally:
+            self._replaying = False
+
+    def _apply(self, change):
+        graph = self.scene_graph
+        kind = change[0]
+        if kind == "insert":
+            graph.insert(change[1], change[2])
+        elif kind == "update":
+            graph.put(change[2])
+        elif kind == "remove":
+            graph.remove(change[2]["scene_id"])
+        elif kind == "extend":
+            graph.extend(change[2], change[1])
+        elif kind == "reset":
+            graph.load(change[2])
+        elif kind == "swap":
+            graph.swap(change[1], change[2])
+        elif kind == "move":
+            graph.move(change[1], change[2])
+
+    def _revert(self, change):
+        graph = self.scene_graph
+        kind = change[0]
+        if kind == "insert":
+            graph.remove(change[2]["scene_id"])
+        elif kind == "update":
+            graph.put(change[1])
+        elif kind == "remove":
+            graph.insert(change[1], change[2])
+        elif kind == "extend":
+            for scene in reversed(change[2]):
+                graph.remove(scene["scene_id"])
+        elif kind == "swap":
+            graph.swap(change[1], change[2])
+        elif kind == "move":
+            graph.move(change[2], change[1])
+
+
+_LABELS = {
+    "insert": "Add scene",
+    "update": "Edit scene",
+    "remove": "Delete scene",
+    "extend": "Add scenes",
+    "reset": "Replace scenes",
+    "swap": "Reorder scenes",
+    "move": "Reorder scenes",
+}
+
+
+class _Group:
+    def __init__(self, history, label):
+        self.history = history
+        self.label = label
+
+    def __enter__(self):
+        self.history.begin(self.label)
+        return self.history
+
+    def __exit__(self, *exc_info):
+        self.history.end()
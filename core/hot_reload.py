@@ -0,0 +1,173 @@
+"""Merge a project file that changed on disk into the open scenes.
+
+The SourceMap of the loaded file is the common base: scene dicts are never
+edited in place, so a scene was edited here exactly when the graph holds a
+different dict than the map, and ReloadJob tells which scenes changed on
+disk by comparing the new file's scenes with the map's. merge_reload()
+then does a three-way merge keyed by scene id:
+
+    changed on disk only        the disk version replaces it
+    changed here only           kept
+    changed on both sides       kept, and reported as a conflict unless equal
+    new on disk                 inserted
+    deleted on disk             removed, unless edited here (a conflict)
+
+The order follows the file unless only the editor reordered scenes. Every
+change is a plain SceneGraph operation, so the scene list, the YAML
+fragments and the search index update just the affected scenes.
+"""
+import io
+
+from core.background import BackgroundJob
+from core.yaml_loader import iter_scenes, parse_yaml
+from core.yaml_roundtrip import build_source_map
+
+MAX_MOVES = 200  # Reorders beyond this reload the whole list at once
+
+
+class ReloadJob(BackgroundJob):
+    """Read a changed project file against its old SourceMap.
+
+    "done" carries (scenes, source map): the file's scenes in order, with
+    every scene that did not change on disk replaced by the very dict the
+    old map holds (so it still matches the graph by identity), and the map
+    of the new file, or None if it cannot be mapped.
+    """
+
+    name = "ReloadJob"
+
+    def __init__(self, source_map):
+        super().__init__()
+        self.base = source_map
+        self.file_path = source_map.file_path
+
+    def run(self):
+        with open(self.file_path, "rb") as yaml_file:
+            data = yaml_file.read()
+        self.check_cancelled()
+        base = self.base.scenes
+        scenes = []
+        for scene in iter_scenes(parse_yaml(io.BytesIO(data))):
+            original = base.get(scene["scene_id"])
+            scenes.append(original if original is not None and original == scene else scene)
+        self.check_cancelled()
+        return scenes, build_source_map(self.file_path, data, scenes)
+
+
+class MergeResult:
+    """What merge_reload changed; lists of scene ids."""
+
+    def __init__(self):
+        self.updated = []
+        self.added = []
+        self.removed = []
+        self.conflicts = []  # Edited here and changed or deleted on disk; the editor's version was kept
+        self.reordered = False
+
+    @property
+    def changed(self):
+        return bool(self.updated or self.added or self.removed or self.reordered)
+
+    def summary(self):
+        parts = [f"{len(self.updated)} updated", f"{len(self.added)} added", f"{len(self.removed)} removed"]
+        if self.reordered:
+            parts.append("reordered")
+        return ", ".join(parts)
+
+
+def merge_reload(graph, base_map, scenes):
+    """Three-way merge of a reloaded file's scenes (from ReloadJob) into graph; returns a MergeResult."""
+    result = MergeResult()
+    base = base_map.scenes
+    theirs = {scene["scene_id"]: scene for scene in scenes}
+
+    for scene_id, scene in theirs.items():
+        local = graph.get(scene_id)
+        original = base.get(scene_id)
+        if local is scene:
+            continue
+        if original is None:  # New on disk
+            if local is None:
+                continue  # Inserted below, in its place in the order
+            if local != scene:
+                result.conflicts.append(scene_id)  # Both sides added this id
+        elif scene is original:
+            continue  # Unchanged on disk; any edit here stands
+        elif local is original:
+            graph.put(scene)
+            result.updated.append(scene_id)
+        elif local is None or local != scene:
+            result.conflicts.append(scene_id)  # Deleted or edited here
+    for scene_id, original in base.items():
+        if scene_id in theirs:
+            continue
+        local = graph.get(scene_id)
+        if local is original:
+            graph.remove(scene_id)
+            result.removed.append(scene_id)
+        elif local is not None:
+            result.conflicts.append(scene_id)  # Edited here, deleted on disk
+
+    new_ids = {scene_id for scene_id in theirs if scene_id not in base and graph.get(scene_id) is None}
+    order = _merged_order(graph, base_map.order, scenes, new_ids)
+    _apply_order(graph, order, theirs, new_ids, result)
+    return result
+
+
+def _merged_order(graph, base_order, scenes, new_ids):
+    """Target order of ids.
+
+    If the file kept the order of the scenes it shares with the base, the
+    editor's order stands (it may have been changed here) and scenes new on
+    disk go after the scene they follow in the file. Otherwise the file's
+    order wins and scenes that exist only here go after the scene they
+    follow in the editor.
+    """
+    local_ids = graph.ids()
+    disk_ids = [scene["scene_id"] for scene in scenes]
+    common = set(base_order).intersection(disk_ids)
+    if [scene_id for scene_id in base_order if scene_id in common] == \
+            [scene_id for scene_id in disk_ids if scene_id in common]:
+        return _interleave(local_ids, disk_ids, new_ids) if new_ids else local_ids
+    in_graph = set(local_ids)
+    skeleton = [scene_id for scene_id in disk_ids if scene_id in in_graph or scene_id in new_ids]
+    return _interleave(skeleton, local_ids, in_graph.difference(disk_ids))
+
+
+def _interleave(skeleton, sequence, placing):
+    """skeleton with every id in placing put right after the last skeleton id before it in sequence."""
+    in_skeleton = set(skeleton)
+    after = {}  # skeleton id (None for the very start) -> ids placed after it
+    anchor = None
+    for scene_id in sequence:
+        if scene_id in in_skeleton:
+            anchor = scene_id
+        elif scene_id in placing:
+            after.setdefault(anchor, []).append(scene_id)
+    order = list(after.get(None, ()))
+    for scene_id in skeleton:
+        order.append(scene_id)
+        order.extend(after.get(scene_id, ()))
+    return order
+
+
+def _apply_order(graph, order, theirs, new_ids, result):
+    """Insert the scenes new on disk and move everything into order."""
+    result.added = [scene_id for scene_id in order if scene_id in new_ids]
+    if not new_ids and order == graph.ids():
+        return  # The usual case: scenes were edited, none added or moved
+    moves = 0
+    for index, scene_id in enumerate(order):
+        if scene_id in new_ids:
+            graph.insert(index, theirs[scene_id])
+            continue
+        current = graph.index_of(scene_id)
+        if current == index:
+            continue
+        result.reordered = True
+        if moves == MAX_MOVES:
+            # Mostly a new order: one reset is cheaper than thousands of moves
+            graph.load([graph.get(scene_id) or theirs[scene_id] for scene_id in order])
+            return
+        graph.move(current, index)
+        moves += 1
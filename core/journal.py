@@ -0,0 +1,279 @@
+"""Crash recovery: an append-only journal of scene changes plus a snapshot.
+
+The session directory holds these files:
+
+    session.snapshot   {"generation": n, "scenes": [...]}, replaced atomically
+    session.journal    {"generation": n} on the first line, then one JSON
+                       array per change made after that snapshot
+    session.cache      the snapshot again as marshal data, plus whatever the
+                       app handed to close() (e.g. rendered YAML); written
+                       on a clean exit only
+
+Records are encoded and written by a background thread that fsyncs at most
+once per flush interval, so a burst of edits costs one fsync. When enough
+records pile up (and on a clean exit) the journal is folded into a new
+snapshot. A journal whose generation does not match the snapshot is left
+over from a compaction that was interrupted and is already included.
+
+The cache is only trusted while the journal is exactly the header of its
+generation, i.e. nothing happened after the clean exit that wrote it;
+loading it is several times faster than parsing the JSON snapshot. After a
+crash the snapshot and journal are replayed as before.
+"""
+import json
+import marshal
+import os
+import queue
+import threading
+
+from core.scene_graph import SceneGraph
+from core.yaml_writer import atomic_file
+
+FLUSH_INTERVAL = 0.5  # Seconds between fsyncs while changes keep coming
+COMPACT_RECORDS = 10000  # Scene records written before the journal is folded into a snapshot
+
+SNAPSHOT_NAME = "session.snapshot"
+JOURNAL_NAME = "session.journal"
+CACHE_NAME = "session.cache"
+CACHE_VERSION = 1
+
+
+def default_session_dir():
+    """Per-user location of the autosave session."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.environ.get("LOCALAPPDATA") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "yaml_scene_manager", "session")
+
+
+def _dumps(record):
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def _apply(graph, record):
+    kind = record[0]
+    if kind == "put":
+        graph.put(record[1])
+    elif kind == "insert":
+        graph.insert(record[1], record[2])
+    elif kind == "remove":
+        graph.remove(record[1])
+    elif kind == "extend":
+        graph.extend(record[1], *record[2:])
+    elif kind == "reset":
+        graph.load(record[1])
+    elif kind == "swap":
+        graph.swap(record[1], record[2])
+    elif kind == "move":
+        graph.move(record[1], record[2])
+    else:
+        raise ValueError(f"Unknown journal record {kind!r}")
+
+
+def read_session(directory):
+    """Return (scenes, record count) rebuilt from the snapshot and journal in directory.
+
+    Replay stops at the first record that is torn or no longer applies, so a
+    crash in the middle of a write loses at most that last batch.
+    """
+    generation = None
+    graph = SceneGraph()
+    try:
+        with open(os.path.join(directory, SNAPSHOT_NAME), "r", encoding="utf-8") as snapshot_file:
+            snapshot = json.load(snapshot_file)
+        generation = snapshot["generation"]
+        graph.load(snapshot["scenes"])
+    except (OSError, ValueError, KeyError, TypeError):
+        graph.clear()
+
+    replayed = 0
+    try:
+        with open(os.path.join(directory, JOURNAL_NAME), "r", encoding="utf-8") as journal_file:
+            header = journal_file.readline()
+            if not header.endswith("\n") or json.loads(header).get("generation") != generation:
+                return list(graph), 0
+            for line in journal_file:
+                if not line.endswith("\n"):
+                    break  # Torn final write
+                _apply(graph, json.loads(line))
+                replayed += 1
+    except (OSError, ValueError, KeyError, TypeError, IndexError, AttributeError):
+        pass
+    return list(graph), replayed
+
+
+def read_cache(directory):
+    """Return (generation, scenes, extra) from a cache that is still current, or None."""
+    try:
+        with open(os.path.join(directory, JOURNAL_NAME), "r", encoding="utf-8") as journal_file:
+            header = journal_file.readline()
+            if not header.endswith("\n") or journal_file.read(1):
+                return None  # Changes were recorded after the cache was written
+            generation = json.loads(header).get("generation")
+        with open(os.path.join(directory, CACHE_NAME), "rb") as cache_file:
+            cache = marshal.loads(cache_file.read())  # marshal.load() reads a file in tiny pieces
+        if cache["version"] != CACHE_VERSION or cache["generation"] != generation:
+            return None
+        return generation, cache["scenes"], cache["extra"]
+    except (OSError, ValueError, EOFError, KeyError, TypeError, AttributeError):
+        return None  # Missing, torn, or from another Python's marshal format
+
+
+class Journal:
+    """Autosave a SceneGraph's changes to directory and restore them on startup.
+
+    Creating a Journal first replays the previous session into the graph
+    (recovered holds the number of scenes restored), then starts recording.
+    Call close() on exit to flush and compact; the extra it is given comes
+    back as cached_extra next time if the session is restored from the cache.
+    """
+
+    def __init__(self, scene_graph, directory=None, flush_interval=FLUSH_INTERVAL,
+                 compact_records=COMPACT_RECORDS):
+        self.scene_graph = scene_graph
+        self.directory = directory or default_session_dir()
+        self.flush_interval = flush_interval
+        self.compact_records = compact_records
+        self.error = None  # Set if the journal could not be written; recording then stops
+        self._queue = queue.Queue()
+        self._closing = threading.Event()
+        self._pending_records = 0
+        self.cached_extra = None  # What the last clean exit passed to close(), if restored from the cache
+        self._generation = None  # Generation to keep appending to when restored from the cache
+
+        scenes, replayed = [], 0
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            cached = read_cache(self.directory)
+            if cached is not None:
+                self._generation, scenes, self.cached_extra = cached
+            else:
+                scenes, replayed = read_session(self.directory)
+        except OSError as e:
+            self.error = e
+        self.recovered = len(scenes)
+        if scenes:
+            scene_graph.load(scenes)
+
+        self._thread = threading.Thread(target=self._run, name="Journal", daemon=True)
+        if self.error is None:
+            if self._generation is None:
+                # Start from a fresh snapshot of the restored session
+                self._queue.put(("snapshot", scenes))
+            scene_graph.add_listener(self._on_graph_change)
+            self._thread.start()
+
+    def _on_graph_change(self, event, *args):
+        if self.error is not None:
+            self.scene_graph.remove_listener(self._on_graph_change)
+            return
+        graph = self.scene_graph
+        if event == "insert":
+            record = ("insert", args[0], graph.get(args[1]))
+        elif event == "update":
+            record = ("put", graph.get(args[1]))
+        elif event == "remove":
+            record = ("remove", args[1])
+        elif event == "extend":
+            start, count = args
+            record = ("extend", [graph[index] for index in range(start, start + count)], start)
+        elif event == "reset":
+            record = ("reset", list(graph))
+        else:  # "swap" and "move"
+            record = (event, args[0], args[1])
+        # Scene dicts are never edited in place, so they can be encoded later on the writer thread
+        self._queue.put(("record", record))
+
+        self._pending_records += len(record[1]) if event in ("extend", "reset") else 1
+        if self._pending_records >= self.compact_records:
+            self.compact()
+
+    def compact(self):
+        """Fold everything written so far into a new snapshot (on the writer thread)."""
+        self._pending_records = 0
+        self._queue.put(("snapshot", list(self.scene_graph)))
+
+    def close(self, extra=None):
+        """Compact, write the cache, flush and stop the writer thread.
+
+        extra (anything marshal can store) is saved in the cache with the scenes.
+        """
+        if not self._thread.is_alive():
+            return
+        self.scene_graph.remove_listener(self._on_graph_change)
+        self.compact()
+        self._queue.put(("cache", extra))
+        self._queue.put(None)
+        self._closing.set()
+        self._thread.join()
+
+    # Writer thread
+    def _run(self):
+        journal_file = None
+        snapshot = None  # Scenes of the newest snapshot written
+        generation = self._read_generation() if self._generation is None else self._generation
+        try:
+            if self._generation is not None:
+                # The snapshot on disk is the restored session; keep appending to its journal
+                journal_file = open(os.path.join(self.directory, JOURNAL_NAME), "a", encoding="utf-8")
+            while True:
+                items = [self._queue.get()]
+                while True:
+                    try:
+                        items.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                # Only the newest snapshot in a batch matters; records before it are part of it
+                last_snapshot = max((index for index, item in enumerate(items)
+                                     if item is not None and item[0] == "snapshot"), default=-1)
+                if last_snapshot >= 0:
+                    if journal_file is not None:
+                        journal_file.close()
+                    generation += 1
+                    snapshot = items[last_snapshot][1]
+                    journal_file = self._write_snapshot(snapshot, generation)
+                for item in items[last_snapshot + 1:]:
+                    if item is not None and item[0] == "record":
+                        journal_file.write(_dumps(item[1]))
+                journal_file.flush()
+                os.fsync(journal_file.fileno())
+                for item in items[last_snapshot + 1:]:
+                    if item is not None and item[0] == "cache" and snapshot is not None:
+                        # Only sent by close(), after its snapshot and with no records following
+                        self._write_cache(snapshot, generation, item[1])
+
+                if items[-1] is None:
+                    return
+                self._closing.wait(self.flush_interval)  # Group commit: batch up the next changes
+        except (OSError, TypeError, ValueError) as e:
+            self.error = e
+        finally:
+            if journal_file is not None:
+                journal_file.close()
+
+    def _read_generation(self):
+        try:
+            with open(os.path.join(self.directory, SNAPSHOT_NAME), "r", encoding="utf-8") as snapshot_file:
+                return int(json.load(snapshot_file)["generation"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return 0
+
+    def _write_snapshot(self, scenes, generation):
+        """Replace the snapshot, then start a new journal for it; returns the open journal."""
+        self._replace(SNAPSHOT_NAME, "w", lambda f: json.dump(
+            {"generation": generation, "scenes": scenes}, f, ensure_ascii=False, separators=(",", ":")
+        ))
+        self._replace(JOURNAL_NAME, "w", lambda f: f.write(_dumps({"generation": generation})))
+        return open(os.path.join(self.directory, JOURNAL_NAME), "a", encoding="utf-8")
+
+    def _write_cache(self, scenes, generation, extra):
+        cache = {"version": CACHE_VERSION, "generation": generation, "scenes": scenes, "extra": extra}
+        try:
+            self._replace(CACHE_NAME, "wb", lambda f: f.write(marshal.dumps(cache)))
+        except ValueError:
+            pass  # extra held something marshal can't store; the snapshot is still there
+
+    def _replace(self, name, mode, write):
+        """Write a file in the session directory through a temporary file and an atomic rename."""
+        encoding = None if "b" in mode else "utf-8"
+        with atomic_file(os.path.join(self.directory, name), mode, encoding) as temp_file:
+            write(temp_file)
@@ -0,0 +1,205 @@
+"""Media audit: unused, missing and duplicate files in videos/ and images/.
+
+usage_index() maps every media file the scenes refer to onto the scenes
+(and, for images, the choices) that use it; audit() joins it against what
+the source folder holds. A scene without a video is exported as
+videos/default.mp4, so that placeholder counts as used by those scenes.
+
+Duplicates are found without reading most files at all: files are grouped
+by size first (a file with a unique size cannot have a copy), then
+same-size files are told apart by a hash of their first and last
+HEAD_BYTES, and only files still tied are hashed in full. Reads are
+fixed-size chunks into one reused buffer per worker thread, so memory
+stays at workers * CHUNK_SIZE however big the videos are; hashlib
+releases the GIL while it hashes, so the pool hashes files in parallel.
+Hard links to the same file count once.
+"""
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
+
+from core.background import BackgroundJob
+from core.media_catalog import MEDIA_FOLDERS
+
+PLACEHOLDER_VIDEO = "default.mp4"  # What the export writes for scenes without a video
+CHUNK_SIZE = 1 << 20
+HEAD_BYTES = 64 * 1024  # Read from each end of a file for the first hashing pass
+MAX_WORKERS = 4
+
+_worker = threading.local()  # Each hashing thread's read buffer
+
+
+def usage_index(scenes):
+    """Return {"videos": {name: [scene_id, ...]}, "images": {name: [(scene_id, option), ...]}}."""
+    usage = {"videos": {}, "images": {}}
+    for scene in scenes:
+        scene_id = scene["scene_id"]
+        usage["videos"].setdefault(scene["video"] or PLACEHOLDER_VIDEO, []).append(scene_id)
+        for choice in scene.get("choices", []):
+            if choice["image"]:
+                usage["images"].setdefault(choice["image"], []).append((scene_id, choice["option"]))
+    return usage
+
+
+def list_media(source_folder):
+    """Return {"videos": {name: (path, stat)}, "images": {...}} for every file under the media folders.
+
+    Names are relative to their folder with "/" separators, as the scenes use them.
+    """
+    files = {}
+    for subfolder in MEDIA_FOLDERS:
+        found = files[subfolder] = {}
+        stack = [(os.path.join(source_folder, subfolder), "")]
+        while stack:
+            directory, prefix = stack.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.name.startswith("."):
+                            continue  # Hidden files, e.g. .DS_Store and our own temporary files
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append((entry.path, prefix + entry.name + "/"))
+                        elif entry.is_file():
+                            found[prefix + entry.name] = (entry.path, entry.stat())
+            except OSError:
+                continue
+    return files
+
+
+def _hash_file(path, size, head_only):
+    """blake2b of the whole file, or of its first and last HEAD_BYTES; None if it can't be read."""
+    digest = hashlib.blake2b(digest_size=20)
+    if not hasattr(_worker, "buffer"):
+        _worker.buffer = bytearray(CHUNK_SIZE)
+    view = memoryview(_worker.buffer)
+    try:
+        with open(path, "rb", buffering=0) as media_file:
+            if head_only and size > 2 * HEAD_BYTES:
+                for offset in (0, size - HEAD_BYTES):
+                    media_file.seek(offset)
+                    count = media_file.readinto(view[:HEAD_BYTES])
+                    digest.update(view[:count])
+            else:
+                while True:
+                    count = media_file.readinto(view)
+                    if not count:
+                        break
+                    digest.update(view[:count])
+    except OSError:
+        return None
+    return digest.digest()
+
+
+def find_duplicates(files, max_workers=MAX_WORKERS, check_cancelled=None, progress=None):
+    """Group byte-identical files.
+
+    files is an iterable of (path, size, file key), where files sharing a key
+    (device, inode) are the same file seen twice. Returns a list of groups,
+    each a sorted list of paths, largest waste first. progress(fraction)
+    follows the bytes read.
+    """
+    by_size = {}
+    for path, size, key in files:
+        by_size.setdefault(size, {}).setdefault(key, []).append(path)
+    # Only sizes held by two different files can hide copies; empty files are not worth reporting
+    candidates = [(size, list(links.values())) for size, links in by_size.items() if size and len(links) > 1]
+
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="MediaAudit")
+    read = 0
+    try:
+        # Both ends of each file first, then whole files for those still tied
+        # (files up to 2 * HEAD_BYTES are read whole the first time and are settled)
+        for head_only in (True, False):
+            if head_only:
+                pending, candidates = candidates, []
+            else:
+                pending = [(size, group) for size, group in candidates if size > 2 * HEAD_BYTES]
+                candidates = [(size, group) for size, group in candidates if size <= 2 * HEAD_BYTES]
+            work = [(number, size, links) for number, (size, group) in enumerate(pending) for links in group]
+            total = read + sum(min(size, 2 * HEAD_BYTES) if head_only else size for _, size, _ in work)
+            digests = pool.map(_hash_file, [links[0] for _, _, links in work], [size for _, size, _ in work],
+                               repeat(head_only))
+            buckets = {}
+            for (number, size, links), digest in zip(work, digests):
+                if check_cancelled:
+                    check_cancelled()
+                if digest is not None:
+                    buckets.setdefault((number, digest), []).append(links)
+                read += min(size, 2 * HEAD_BYTES) if head_only else size
+                if progress:
+                    progress(read / total)
+            candidates.extend((pending[number][0], same) for (number, _), same in buckets.items() if len(same) > 1)
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+    candidates.sort(key=lambda item: -item[0] * (len(item[1]) - 1))
+    return [sorted(path for links in group for path in links) for _, group in candidates]
+
+
+class AuditReport:
+    """What the audit found; names are relative to their media folder, as the scenes use them."""
+
+    def __init__(self, usage, media, duplicates):
+        self.usage = usage  # From usage_index()
+        self.paths = {  # subfolder -> {name: path} of every file found
+            subfolder: {name: path for name, (path, _) in media[subfolder].items()} for subfolder in MEDIA_FOLDERS
+        }
+        self.sizes = {  # path -> bytes
+            path: stat.st_size for subfolder in MEDIA_FOLDERS for path, stat in media[subfolder].values()
+        }
+        self.unused = {}  # subfolder -> names no scene refers to
+        self.missing = {}  # subfolder -> {name: users} for references to files that don't exist
+        for subfolder in MEDIA_FOLDERS:
+            present = self.paths[subfolder]
+            used = usage[subfolder]
+            self.unused[subfolder] = sorted((name for name in present if name not in used), key=str.lower)
+            self.missing[subfolder] = {name: users for name, users in used.items() if name not in present}
+        self.duplicates = duplicates  # Lists of paths with identical contents, largest waste first
+
+    @property
+    def unused_bytes(self):
+        return sum(self.sizes[self.paths[subfolder][name]]
+                   for subfolder in MEDIA_FOLDERS for name in self.unused[subfolder])
+
+    @property
+    def duplicate_bytes(self):
+        """Space the extra copies take (each group keeps one)."""
+        return sum(self.sizes[group[0]] * (len(group) - 1) for group in self.duplicates)
+
+    def summary(self):
+        unused = sum(len(names) for names in self.unused.values())
+        missing = sum(len(names) for names in self.missing.values())
+        return (
+            f"{unused} unused ({self.unused_bytes / (1 << 20):.1f} MB), {missing} missing, "
+            f"{len(self.duplicates)} sets of duplicates ({self.duplicate_bytes / (1 << 20):.1f} MB extra)"
+        )
+
+
+def audit(scenes, source_folder, max_workers=MAX_WORKERS, check_cancelled=None, progress=None):
+    """Audit the media folders of source_folder against scenes; returns an AuditReport."""
+    media = list_media(source_folder)
+    files = [
+        # Without inode numbers (some Windows filesystems) every path is its own file
+        (path, stat.st_size, (stat.st_dev, stat.st_ino) if stat.st_ino else path)
+        for subfolder in MEDIA_FOLDERS for path, stat in media[subfolder].values()
+    ]
+    duplicates = find_duplicates(files, max_workers, check_cancelled, progress)
+    return AuditReport(usage_index(scenes), media, duplicates)
+
+
+class MediaAudit(BackgroundJob):
+    """Run audit() on a snapshot of the scenes; posts ("progress", fraction) while hashing."""
+
+    name = "MediaAudit"
+
+    def __init__(self, scenes, source_folder, max_workers=MAX_WORKERS):
+        super().__init__()
+        self.scenes = list(scenes)  # Snapshot taken on the caller's thread
+        self.source_folder = source_folder
+        self.max_workers = max_workers
+
+    def run(self):
+        return audit(self.scenes, self.source_folder, self.max_workers, self.check_cancelled,
+                     lambda fraction: self.post("progress", fraction))
@@ -0,0 +1,99 @@
+import os
+import time
+
+from core import perf
+
+MEDIA_FOLDERS = ("videos", "images")
+CHECK_INTERVAL = 1.0  # Seconds between directory mtime checks
+MTIME_SLACK = 2.0  # Coarse filesystem timestamps: rescan if the folder changed this close to a scan
+
+
+class _Listing:
+    """One scanned folder: sorted names, a set for membership tests, and when it was taken."""
+
+    def __init__(self, folder_path):
+        self.folder_path = folder_path
+        names = []
+        started = time.perf_counter()
+        try:
+            self.mtime = os.stat(folder_path).st_mtime
+            with os.scandir(folder_path) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        names.append(entry.name)
+        except OSError:
+            self.mtime = None
+        names.sort(key=str.lower)
+        perf.record("media.scandir", time.perf_counter() - started, started)
+        self.names = names
+        self.name_set = frozenset(names)
+        self.scanned_at = time.time()
+        self.checked_at = time.monotonic()
+
+    def is_stale(self):
+        try:
+            mtime = os.stat(self.folder_path).st_mtime
+        except OSError:
+            return self.mtime is not None
+        if mtime != self.mtime:
+            return True
+        # A change in the same timestamp tick as the scan would be invisible
+        return mtime >= self.scanned_at - MTIME_SLACK
+
+
+class MediaCatalog:
+    """Cached listing of the source folder's videos/ and images/ subfolders.
+
+    Each folder is scanned once with os.scandir. Later calls only stat the
+    folder (at most once per CHECK_INTERVAL) and rescan when its mtime moved,
+    so filling fifty image dropdowns costs one listing, not fifty.
+    """
+
+    def __init__(self, folder_manager):
+        self.folder_manager = folder_manager
+        self._listings = {}  # subfolder -> _Listing
+        self._source_folder = None
+
+    def _listing(self, subfolder):
+        source_folder = self.folder_manager.source_folder
+        if source_folder != self._source_folder:
+            self._listings.clear()
+            self._source_folder = source_folder
+        if not source_folder:
+            return None
+
+        listing = self._listings.get(subfolder)
+        now = time.monotonic()
+        if listing is not None and now - listing.checked_at < CHECK_INTERVAL:
+            return listing
+        if listing is None or listing.is_stale():
+            listing = _Listing(os.path.join(source_folder, subfolder))
+            self._listings[subfolder] = listing
+        else:
+            listing.checked_at = now
+        return listing
+
+    def files(self, subfolder):
+        """Return the file names in subfolder, sorted case-insensitively."""
+        listing = self._listing(subfolder)
+        return list(listing.names) if listing else []
+
+    def has(self, subfolder, name):
+        """True if subfolder contains a file called name."""
+        listing = self._listing(subfolder)
+        return bool(listing) and name in listing.name_set
+
+    def exists(self, media_path):
+        """True if a path as written in the YAML (e.g. "videos/Scene1.mp4") exists."""
+        subfolder, _, name = media_path.replace("\\", "/").partition("/")
+        if subfolder not in MEDIA_FOLDERS or not name or "/" in name:
+            source_folder = self.folder_manager.source_folder
+            return bool(source_folder) and os.path.isfile(os.path.join(source_folder, media_path))
+        return self.has(subfolder, name)
+
+    def refresh(self, subfolder=None):
+        """Drop cached listings so the next access rescans."""
+        if subfolder is None:
+            self._listings.clear()
+        else:
+            self._listings.pop(subfolder, None)
@@ -0,0 +1,290 @@
+import os
+import sqlite3
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_WORKERS = 4
+SCHEMA_VERSION = 1
+
+# JPEG start-of-frame markers (the ones that carry the image size)
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+_MP4_CONTAINERS = {b"moov", b"trak", b"mdia", b"minf", b"stbl"}
+
+
+def default_cache_path():
+    """Per-user cache location for the metadata database."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.environ.get("LOCALAPPDATA") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "yaml_scene_manager", "media_metadata.sqlite3")
+
+
+# Header parsers; each reads only the few bytes it needs and never decodes media
+def _iter_boxes(f, start, end):
+    """Yield (type, payload offset, payload end) for ISO-BMFF boxes in [start, end)."""
+    offset = start
+    while end is None or offset + 8 <= end:
+        f.seek(offset)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        size, box_type = struct.unpack(">I4s", header)
+        payload = offset + 8
+        if size == 1:
+            large = f.read(8)
+            if len(large) < 8:
+                return
+            size = struct.unpack(">Q", large)[0]
+            payload += 8
+        elif size == 0:
+            size = os.fstat(f.fileno()).st_size - offset if end is None else end - offset
+        if size < payload - offset:
+            return
+        yield box_type, payload, offset + size
+        offset += size
+
+
+def _read_mp4(f):
+    info = {}
+    for box_type, payload, box_end in _iter_boxes(f, 0, None):
+        if box_type == b"moov":
+            _read_mp4_container(f, payload, box_end, info)
+            break
+    return info
+
+
+def _read_mp4_container(f, start, end, info):
+    for box_type, payload, box_end in _iter_boxes(f, start, end):
+        if box_type == b"mvhd":
+            f.seek(payload)
+            version = f.read(1)
+            if version == b"\x01":
+                f.seek(payload + 20)
+                timescale, duration = struct.unpack(">IQ", f.read(12))
+            else:
+                f.seek(payload + 12)
+                timescale, duration = struct.unpack(">II", f.read(8))
+            if timescale:
+                info["duration"] = duration / timescale
+        elif box_type == b"tkhd" and "width" not in info:
+            f.seek(payload)
+            version = f.read(1)
+            # Width/height (16.16 fixed point) sit after the matrix at the end of the box
+            f.seek(payload + (88 if version == b"\x01" else 76))
+            data = f.read(8)
+            if len(data) == 8:
+                width, height = struct.unpack(">II", data)
+                if width and height:
+                    info["width"] = width >> 16
+                    info["height"] = height >> 16
+        elif box_type in _MP4_CONTAINERS:
+            _read_mp4_container(f, payload, box_end, info)
+
+
+def _read_png(f):
+    data = f.read(24)
+    if len(data) == 24 and data[12:16] == b"IHDR":
+        width, height = struct.unpack(">II", data[16:24])
+        return {"width": width, "height": height}
+    return {}
+
+
+def _read_gif(f):
+    data = f.read(10)
+    width, height = struct.unpack("<HH", data[6:10])
+    return {"width": width, "height": height}
+
+
+def _read_jpeg(f):
+    f.seek(2)
+    while True:
+        byte = f.read(1)
+        while byte and byte != b"\xff":
+            byte = f.read(1)
+        while byte == b"\xff":  # Skip fill bytes
+            byte = f.read(1)
+        if not byte:
+            return {}
+        marker = byte[0]
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            continue  # Markers without a length
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return {}
+        length = struct.unpack(">H", length_bytes)[0]
+        if marker in _JPEG_SOF:
+            data = f.read(5)
+            if len(data) < 5:
+                return {}
+            height, width = struct.unpack(">HH", data[1:5])
+            return {"width": width, "height": height}
+        if marker == 0xDA:  # Start of scan without a frame header: give up
+            return {}
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def read_metadata(path):
+    """Return {"kind", "size", "mtime", and when known "duration", "width", "height"}."""
+    stat = os.stat(path)
+    info = {"kind": "unknown", "size": stat.st_size, "mtime": stat.st_mtime}
+    with open(path, "rb") as f:
+        head = f.read(12)
+        f.seek(0)
+        try:
+            if head[4:8] in (b"ftyp", b"moov", b"mdat", b"free", b"wide", b"skip"):
+                info["kind"] = "video"
+                info.update(_read_mp4(f))
+            elif head.startswith(b"\x89PNG\r\n\x1a\n"):
+                info["kind"] = "image"
+                info.update(_read_png(f))
+            elif head.startswith(b"\xff\xd8"):
+                info["kind"] = "image"
+                info.update(_read_jpeg(f))
+            elif head[:6] in (b"GIF87a", b"GIF89a"):
+                info["kind"] = "image"
+                info.update(_read_gif(f))
+        except (struct.error, OSError, ValueError):
+            pass  # Truncated or odd file: keep what we have
+    return info
+
+
+def describe(info):
+    """Short human-readable summary, e.g. "1:05 · 1920×1080 · 12.3 MB"."""
+    if not info:
+        return ""
+    parts = []
+    if info.get("duration") is not None:
+        minutes, seconds = divmod(int(round(info["duration"])), 60)
+        parts.append(f"{minutes}:{seconds:02d}")
+    if info.get("width") and info.get("height"):
+        parts.append(f"{info['width']}×{info['height']}")
+    size = info.get("size", 0)
+    if size >= 1 << 30:
+        parts.append(f"{size / (1 << 30):.1f} GB")
+    elif size >= 1 << 20:
+        parts.append(f"{size / (1 << 20):.1f} MB")
+    else:
+        parts.append(f"{size / 1024:.0f} KB")
+    return " · ".join(parts)
+
+
+class MetadataCache:
+    """Media metadata, extracted on a thread pool and persisted in SQLite.
+
+    Entries are keyed by (path, size, mtime), so an edited or replaced file
+    is re-read while everything else is served from memory or the database.
+    get() never blocks on file parsing: it returns None and queues the work,
+    so callers ask again a little later.
+    """
+
+    def __init__(self, db_path=None, max_workers=MAX_WORKERS):
+        self.db_path = db_path or default_cache_path()
+        self._memory = {}  # abs path -> info
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="MediaMetadata")
+        self._db = None
+        try:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS media ("
+                "path TEXT PRIMARY KEY, size INTEGER, mtime REAL, version INTEGER, "
+                "kind TEXT, duration REAL, width INTEGER, height INTEGER)"
+            )
+            self._db.commit()
+        except (OSError, sqlite3.Error):
+            self._db = None  # Still works, just without persistence
+
+    def get(self, path):
+        """Return cached metadata for path, or None if it is being (re)extracted."""
+        path = os.path.abspath(path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            info = self._memory.get(path)
+            if info and info["size"] == stat.st_size and info["mtime"] == stat.st_mtime:
+                return info
+            info = self._load(path, stat)
+            if info:
+                self._memory[path] = info
+                return info
+            self._submit(path)
+        return None
+
+    def prefetch(self, paths):
+        """Queue extraction for every path not already cached (stat happens on the pool)."""
+        with self._lock:
+            for path in paths:
+                path = os.path.abspath(path)
+                if path not in self._memory:
+                    self._submit(path, check_cache=True)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _submit(self, path, check_cache=False):
+        # Caller holds self._lock
+        if path not in self._pending:
+            self._pending.add(path)
+            self._executor.submit(self._extract, path, check_cache)
+
+    def _load(self, path, stat):
+        # Caller holds self._lock
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT kind, duration, width, height FROM media "
+                "WHERE path = ? AND size = ? AND mtime = ? AND version = ?",
+                (path, stat.st_size, stat.st_mtime, SCHEMA_VERSION),
+            ).fetchone()
+        except sqlite3.Error:
+            return None  # E.g. locked by another instance: extract the file again instead
+        if row is None:
+            return None
+        info = {"kind": row[0], "size": stat.st_size, "mtime": stat.st_mtime}
+        for key, value in zip(("duration", "width", "height"), row[1:]):
+            if value is not None:
+                info[key] = value
+        return info
+
+    def _extract(self, path, check_cache):
+        info = None
+        try:
+            if check_cache:
+                stat = os.stat(path)
+                with self._lock:
+                    info = self._load(path, stat)
+            if info is None:
+                info = read_metadata(path)
+                self._store(path, info)
+        except OSError:
+            pass  # Gone or unreadable; the next get() tries again
+        finally:
+            # Whatever happened, the path must not stay pending or it is never extracted again
+            with self._lock:
+                if info is not None:
+                    self._memory[path] = info
+                self._pending.discard(path)
+
+    def _store(self, path, info):
+        with self._lock:
+            if self._db is None:
+                return
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO media VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (path, info["size"], info["mtime"], SCHEMA_VERSION, info["kind"],
+                     info.get("duration"), info.get("width"), info.get("height")),
+                )
+                self._db.commit()
+            except sqlite3.Error:
+                pass
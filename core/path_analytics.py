@@ -0,0 +1,360 @@
+"""Playthrough analytics: how many routes there are, and what players see.
+
+Exact numbers come from dynamic programming over the condensed story graph
+(every loop, i.e. strongly connected group of scenes, collapsed into one
+node), which is loop-free and so can be walked once in topological order.
+Loops can be gone round any number of times, so a route counts each loop
+it passes through once and "longest" is measured in condensed steps.
+
+Estimates of how often players actually reach each scene come from random
+playthroughs over a CSR (compressed sparse row) table of the choices,
+optionally weighted per choice. With NumPy installed whole batches of
+walkers advance together; without it a plain Python loop gives the same
+results, only slower.
+"""
+import importlib.util
+import random
+from bisect import bisect_right
+from collections import deque
+
+from core.background import BackgroundJob
+from core.graph_analysis import adjacency_of, reachable_from, strongly_connected_components
+from core.scene_graph import SceneGraph
+
+MAX_STEPS = 10_000  # A playthrough still going after this many choices counts as stuck in a loop
+BATCH_SIZE = 1 << 16  # Walkers advanced together per NumPy batch
+TRAIL_FLUSH = 1 << 22  # Positions buffered before they are counted (and loop visits deduplicated)
+SCAN_DEGREE = 16  # Weighted scenes with more choices than this are searched, not scanned
+MISSING = -1  # Target index of a choice whose next_scene does not exist
+
+
+def has_numpy():
+    """True if NumPy is installed; it is only imported once a simulation runs."""
+    return importlib.util.find_spec("numpy") is not None  # Optional; simulate() falls back to pure Python
+
+
+class EndingStats:
+    def __init__(self, scene_id, paths, shortest, longest, through_loops, incomplete):
+        self.scene_id = scene_id
+        self.paths = paths  # Routes from the start that end here
+        self.shortest = shortest  # Fewest choices to get here
+        self.longest = longest  # Most steps over the condensed graph
+        self.through_loops = through_loops  # Some route here can go round a loop
+        self.incomplete = incomplete  # An auto-created placeholder rather than a real ending
+
+
+class PathReport:
+    """Exact route counts from the start scene; see analyze_paths()."""
+
+    def __init__(self, start_id, endings, route_share, loop_count):
+        self.start_id = start_id
+        self.endings = endings  # EndingStats, in scene order
+        self.route_share = route_share  # scene_id -> fraction of all routes through it
+        self.loop_count = loop_count  # Loops reachable from the start
+
+    @property
+    def total_paths(self):
+        return sum(ending.paths for ending in self.endings)
+
+    def rarest(self, limit=10):
+        """The reachable scenes the fewest routes pass through, as (scene_id, share)."""
+        return sorted(self.route_share.items(), key=lambda item: item[1])[:limit]
+
+
+def analyze_paths(scene_graph):
+    """Count routes from the start to every ending (a reachable scene without choices)."""
+    start_id = scene_graph.start_id
+    adjacency = {scene_id: list(dict.fromkeys(targets)) for scene_id, targets in adjacency_of(scene_graph).items()}
+    reached = reachable_from(start_id, adjacency)
+    if not reached:
+        return PathReport(start_id, [], {}, 0)
+    adjacency = {scene_id: targets for scene_id, targets in adjacency.items() if scene_id in reached}
+
+    # Tarjan numbers components in reverse topological order: every edge between
+    # two components goes from a higher number to a lower one
+    component = strongly_connected_components(adjacency)
+    count = max(component.values()) + 1
+    size = [0] * count
+    looped = [False] * count
+    for scene_id, number in component.items():
+        size[number] += 1
+        if scene_id in adjacency[scene_id]:
+            looped[number] = True
+    successors = [set() for _ in range(count)]
+    for scene_id, targets in adjacency.items():
+        for target in targets:
+            if component[target] != component[scene_id]:
+                successors[component[scene_id]].add(component[target])
+    for number in range(count):
+        looped[number] = looped[number] or size[number] > 1
+
+    endings = [scene_id for scene_id in scene_graph.ids()
+               if scene_id in reached and not scene_graph.get(scene_id).get("choices")]
+    endings_in = [0] * count
+    for scene_id in endings:
+        endings_in[component[scene_id]] += 1
+
+    # Forward: routes from the start into each component, and the longest of them
+    ways = [0] * count
+    longest = [0] * count
+    via_loop = list(looped)
+    ways[component[start_id]] = 1
+    for number in range(count - 1, -1, -1):
+        for target in successors[number]:
+            ways[target] += ways[number]
+            longest[target] = max(longest[target], longest[number] + 1)
+            via_loop[target] = via_loop[target] or via_loop[number]
+    # Backward: routes from each component on to an ending
+    onward = list(endings_in)
+    for number in range(count):
+        onward[number] += sum(onward[target] for target in successors[number])
+
+    shortest = _distances(start_id, adjacency)
+    total = onward[component[start_id]]
+    route_share = {
+        scene_id: (ways[number] * onward[number] / total if total else 0.0)
+        for scene_id, number in component.items()
+    }
+    stats = [
+        EndingStats(scene_id, ways[component[scene_id]], shortest[scene_id], longest[component[scene_id]],
+                    via_loop[component[scene_id]], bool(scene_graph.get(scene_id).get("auto_created")))
+        for scene_id in endings
+    ]
+    return PathReport(start_id, stats, route_share, sum(looped))
+
+
+def _distances(start_id, adjacency):
+    """Fewest choices from start_id to every reachable scene (breadth-first)."""
+    distance = {start_id: 0}
+    queue = deque([start_id])
+    while queue:
+        scene_id = queue.popleft()
+        for target in adjacency[scene_id]:
+            if target not in distance:
+                distance[target] = distance[scene_id] + 1
+                queue.append(target)
+    return distance
+
+
+class WalkTable:
+    """Choices in CSR form: row i holds scene i's targets and cumulative weights.
+
+    weights maps (scene_id, choice number) to a relative weight (default 1);
+    a scene whose choices all weigh 0 ends the playthrough like one without
+    choices.
+    """
+
+    def __init__(self, scene_graph, weights=None):
+        self.scene_ids = list(scene_graph.ids())
+        index = {scene_id: number for number, scene_id in enumerate(self.scene_ids)}
+        self.start = index.get(scene_graph.start_id)
+        self.indptr = [0]
+        self.targets = []
+        self.cumulative = []  # Per row, rising to exactly 1.0
+        self.uniform = not weights  # Every choice of a scene equally likely
+        for scene_id in self.scene_ids:
+            choices = scene_graph.get(scene_id).get("choices") or []
+            choice_weights = [
+                max(0.0, float(weights.get((scene_id, number), 1.0))) if weights else 1.0
+                for number in range(len(choices))
+            ]
+            total = sum(choice_weights)
+            if total > 0:
+                running = 0.0
+                for choice, weight in zip(choices, choice_weights):
+                    running += weight
+                    self.targets.append(index.get(choice.get("next_scene"), MISSING))
+                    self.cumulative.append(running / total)
+                self.cumulative[-1] = 1.0
+            self.indptr.append(len(self.targets))
+
+        # Scenes that can be seen twice in one playthrough; the rest need no deduplication
+        adjacency = {number: [target for target in self.targets[self.indptr[number]:self.indptr[number + 1]]
+                              if target != MISSING] for number in range(len(self.scene_ids))}
+        component = strongly_connected_components(adjacency)
+        sizes = {}
+        for number in component.values():
+            sizes[number] = sizes.get(number, 0) + 1
+        self.looped = [sizes[component[number]] > 1 or number in adjacency[number]
+                       for number in range(len(self.scene_ids))]
+
+    def __len__(self):
+        return len(self.scene_ids)
+
+
+class SimulationResult:
+    def __init__(self, scene_ids, playthroughs, reach, visits, endings, stuck, broken):
+        self.scene_ids = scene_ids
+        self.playthroughs = playthroughs
+        self.reach = reach  # Per scene: playthroughs that saw it at least once
+        self.visits = visits  # Per scene: total visits, loops included
+        self.endings = endings  # scene_id -> playthroughs that ended there
+        self.stuck = stuck  # Still looping after MAX_STEPS choices
+        self.broken = broken  # Took a choice whose next_scene does not exist
+
+    def seen_share(self, scene_id):
+        """Fraction of playthroughs that reached scene_id."""
+        return self.reach[self.scene_ids.index(scene_id)] / self.playthroughs if self.playthroughs else 0.0
+
+    def rarest(self, limit=10, include_unseen=False):
+        """(scene_id, share of playthroughs) for the least-seen scenes."""
+        shares = [(scene_id, count / self.playthroughs)
+                  for scene_id, count in zip(self.scene_ids, self.reach) if count or include_unseen]
+        return sorted(shares, key=lambda item: item[1])[:limit]
+
+
+def simulate(table, playthroughs, seed=None, max_steps=MAX_STEPS, progress=None, check_cancelled=None):
+    """Play the story playthroughs times from the start, picking choices at random."""
+    if table.start is None or playthroughs <= 0:
+        size = len(table)
+        return SimulationResult(table.scene_ids, 0, [0] * size, [0] * size, {}, 0, 0)
+    run = _simulate_numpy if has_numpy() else _simulate_python
+    return run(table, playthroughs, seed, max_steps, progress, check_cancelled)
+
+
+def _simulate_numpy(table, playthroughs, seed, max_steps, progress, check_cancelled):
+    import numpy as np
+    size = len(table)
+    rng = np.random.default_rng(seed)
+    indptr = np.asarray(table.indptr, dtype=np.int64)
+    degree = np.diff(indptr)
+    targets = np.asarray(table.targets, dtype=np.int64)
+    cumulative = np.asarray(table.cumulative)
+    widest = int(degree.max()) if size else 0
+    if not table.uniform and widest > SCAN_DEGREE:
+        # Row number + cumulative weight rises across the whole table, so one
+        # searchsorted picks a choice for every walker at once
+        keys = np.repeat(np.arange(size, dtype=np.float64), degree) + cumulative
+    looped = np.asarray(table.looped, dtype=bool)
+    has_loops = bool(looped.any())
+    has_missing = bool((targets == MISSING).any())
+
+    # Outside loops a playthrough sees a scene at most once, so there visits
+    # are also the reach; only visits inside loops need deduplicating
+    visits = np.zeros(size, dtype=np.int64)
+    loop_reach = np.zeros(size, dtype=np.int64)
+    ended = np.zeros(size, dtype=np.int64)
+    stuck = broken = 0
+    done = 0
+    while done < playthroughs:
+        if check_cancelled:
+            check_cancelled()
+        batch = min(BATCH_SIZE, playthroughs - done)
+        position = np.full(batch, table.start, dtype=np.int64)
+        walker = np.arange(batch, dtype=np.int64)
+        trail = [position]  # Every position taken, counted in bulk
+        buffered = batch
+        repeats = [walker * size + table.start] if looped[table.start] else []  # walker * size + scene
+        for _ in range(max_steps):
+            choice_count = degree[position]
+            at_end = choice_count == 0
+            if at_end.any():
+                ended += np.bincount(position[at_end], minlength=size)
+                keep = ~at_end
+                position, choice_count = position[keep], choice_count[keep]
+                if has_loops:
+                    walker = walker[keep]
+            if not len(position):
+                break
+            first = indptr[position]
+            roll = rng.random(len(position))
+            if table.uniform:
+                pick = first + (roll * choice_count).astype(np.int64)
+            elif widest <= SCAN_DEGREE:
+                # Count the choices whose cumulative weight the roll passed; the
+                # last one (1.0) never counts, so clip reads to the row's end
+                last = first + choice_count - 1
+                pick = first.copy()
+                for offset in range(widest - 1):
+                    pick += cumulative[np.minimum(first + offset, last)] <= roll
+            else:
+                pick = np.searchsorted(keys, position + roll, side="right")
+            position = targets[pick]
+            if has_missing:
+                valid = position != MISSING
+                broken += len(position) - int(valid.sum())
+                position = position[valid]
+                if has_loops:
+                    walker = walker[valid]
+            trail.append(position)
+            buffered += len(position)
+            if has_loops:
+                in_loop = looped[position]
+                if in_loop.any():
+                    repeats.append(walker[in_loop] * size + position[in_loop])
+            if buffered > TRAIL_FLUSH:
+                visits += np.bincount(np.concatenate(trail), minlength=size)
+                trail, buffered = [], 0
+                if len(repeats) > 1:
+                    repeats = [np.unique(np.concatenate(repeats))]
+        stuck += len(position)
+        visits += np.bincount(np.concatenate(trail), minlength=size)
+        if repeats:
+            loop_reach += np.bincount(np.unique(np.concatenate(repeats)) % size, minlength=size)
+        done += batch
+        if progress:
+            progress(done / playthroughs)
+
+    reach = np.where(looped, loop_reach, visits)
+    endings = {table.scene_ids[number]: int(count) for number, count in enumerate(ended) if count}
+    return SimulationResult(table.scene_ids, playthroughs, reach.tolist(), visits.tolist(), endings, stuck, broken)
+
+
+def _simulate_python(table, playthroughs, seed, max_steps, progress, check_cancelled):
+    size = len(table)
+    rng = random.Random(seed)
+    indptr, targets, cumulative = table.indptr, table.targets, table.cumulative
+    reach = [0] * size
+    visits = [0] * size
+    ended = {}
+    stuck = broken = 0
+    report_every = max(1, playthroughs // 100)
+    for number in range(playthroughs):
+        if check_cancelled and number % report_every == 0:
+            check_cancelled()
+        position = table.start
+        seen = {position}
+        visits[position] += 1
+        for _ in range(max_steps):
+            first, last = indptr[position], indptr[position + 1]
+            if first == last:
+                ended[position] = ended.get(position, 0) + 1
+                break
+            position = targets[bisect_right(cumulative, rng.random(), first, last)]
+            if position == MISSING:
+                broken += 1
+                break
+            visits[position] += 1
+            seen.add(position)
+        else:
+            stuck += 1
+        for scene in seen:
+            reach[scene] += 1
+        if progress and (number + 1) % report_every == 0:
+            progress((number + 1) / playthroughs)
+
+    endings = {table.scene_ids[number]: count for number, count in ended.items()}
+    return SimulationResult(table.scene_ids, playthroughs, reach, visits, endings, stuck, broken)
+
+
+class AnalyticsJob(BackgroundJob):
+    """Exact route counts plus a simulation, off the UI thread; posts ("progress", fraction)."""
+
+    name = "PathAnalytics"
+
+    def __init__(self, scene_graph, playthroughs, weights=None, seed=None):
+        super().__init__()
+        # Both passes read the graph, so work on a snapshot of it
+        self.scenes = SceneGraph(list(scene_graph))
+        self.playthroughs = playthroughs
+        self.weights = weights
+        self.seed = seed
+
+    def run(self):
+        report = analyze_paths(self.scenes)
+        self.check_cancelled()
+        result = simulate(
+            WalkTable(self.scenes, self.weights), self.playthroughs, self.seed,
+            progress=lambda fraction: self.post("progress", fraction), check_cancelled=self.check_cancelled,
+        )
+        return report, result
@@ -0,0 +1,166 @@
+"""Timings and counters for the app's hot paths.
+
+    with perf.span("preview.render"):
+        ...
+
+    @perf.timed("scene_list.render")
+    def _render(self): ...
+
+    perf.count("yaml.dump")
+
+Recording costs two perf_counter() calls and a deque append per span, so
+it stays on; only coarse operations are timed (per-scene work is counted).
+Recent durations per operation give p50/p99, and the spans themselves are
+kept in a ring buffer that export_chrome_trace() writes out for
+chrome://tracing or Perfetto. Safe to call from background jobs.
+"""
+import functools
+import io
+import json
+import os
+import threading
+import time
+from collections import deque
+
+SAMPLES = 1024  # Recent durations kept per operation, for percentiles
+TRACE_EVENTS = 100_000  # Spans kept for the trace export
+
+
+class Recorder:
+    """Per-operation durations and counters, plus a ring buffer of spans."""
+
+    def __init__(self, samples=SAMPLES, trace_events=TRACE_EVENTS):
+        self.samples = samples
+        self.epoch = time.perf_counter()  # Trace timestamps count from here
+        self._durations = {}  # name -> deque of recent durations, in seconds
+        self._calls = {}  # name -> (calls, total seconds) since the start
+        self._counters = {}  # name -> count
+        self._trace = deque(maxlen=trace_events)  # (name, start, duration, thread id)
+        self._lock = threading.Lock()
+
+    def span(self, name):
+        """Context manager timing its body as one call of name."""
+        return _Span(self, name)
+
+    def timed(self, name):
+        """Decorator: time every call of the function as name."""
+        def wrap(function):
+            @functools.wraps(function)
+            def timed_function(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.record(name, time.perf_counter() - started, started)
+            return timed_function
+        return wrap
+
+    def record(self, name, seconds, started=None):
+        """Add one call of name that took seconds (and began at perf_counter() time started)."""
+        if started is None:
+            started = time.perf_counter() - seconds
+        with self._lock:
+            durations = self._durations.get(name)
+            if durations is None:
+                durations = self._durations[name] = deque(maxlen=self.samples)
+            durations.append(seconds)
+            calls, total = self._calls.get(name, (0, 0.0))
+            self._calls[name] = (calls + 1, total + seconds)
+            self._trace.append((name, started, seconds, threading.get_ident()))
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def stats(self):
+        """{name: (calls, total s, p50 s, p99 s, max s)}; percentiles over the recent samples."""
+        with self._lock:
+            snapshot = {name: (self._calls[name], sorted(durations))
+                        for name, durations in self._durations.items()}
+        stats = {}
+        for name, ((calls, total), ordered) in snapshot.items():
+            last = len(ordered) - 1
+            stats[name] = (calls, total, ordered[last // 2], ordered[round(last * 0.99)], ordered[last])
+        return stats
+
+    def counters(self):
+        with self._lock:
+            return dict(self._counters)
+
+    def reset(self):
+        with self._lock:
+            self._durations.clear()
+            self._calls.clear()
+            self._counters.clear()
+            self._trace.clear()
+
+    def export_chrome_trace(self, file_path):
+        """Write the buffered spans as Chrome trace JSON; returns how many were written."""
+        with self._lock:
+            events = list(self._trace)
+            counters = dict(self._counters)
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        pid = os.getpid()
+        trace = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+             "args": {"name": names.get(tid, f"thread {tid}")}}
+            for tid in {event[3] for event in events}
+        ]
+        trace.extend(
+            {"name": name, "ph": "X", "pid": pid, "tid": tid,
+             "ts": (started - self.epoch) * 1e6, "dur": seconds * 1e6}
+            for name, started, seconds, tid in events
+        )
+        with open(file_path, "w", encoding="utf-8") as trace_file:
+            json.dump({"traceEvents": trace, "otherData": {"counters": counters}}, trace_file)
+        return len(events)
+
+
+class _Span:
+    __slots__ = ("recorder", "name", "started")
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.recorder.record(self.name, time.perf_counter() - self.started, self.started)
+
+
+class ProfileCapture:
+    """On-demand cProfile of the thread that starts it (the Tk thread, from the menu)."""
+
+    def __init__(self):
+        self.profile = None
+
+    @property
+    def running(self):
+        return self.profile is not None
+
+    def start(self):
+        import cProfile  # With pstats, only loaded when a capture is asked for
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def stop(self, file_path=None, limit=30):
+        """Stop, save the raw stats to file_path (for snakeviz etc.) and return a text summary."""
+        profile, self.profile = self.profile, None
+        profile.disable()
+        if file_path:
+            profile.dump_stats(file_path)
+        import pstats
+        out = io.StringIO()
+        pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()
+
+
+# The app's recorder; modules time themselves through these
+RECORDER = Recorder()
+span = RECORDER.span
+timed = RECORDER.timed
+record = RECORDER.record
+count = RECORDER.count
@@ -0,0 +1,389 @@
+"""Projects split across chapter files.
+
+A project root file (name ending in .project.yaml) lists the chapters:
+
+    chapters:
+    - name: Chapter 1
+      file: chapters/chapter-1.yaml
+      scenes: [s1, s2, s3]
+
+Each chapter file is an ordinary start/videos/options document, so it can be
+opened on its own too. "scenes" is an index of the chapter's scene ids,
+rewritten on every save; it lets the editor know which ids exist in
+chapters that have not been loaded yet. The flat export the player reads
+is all chapters merged in order (see merge_chapters / load_merged).
+"""
+import os
+
+from core.background import BackgroundJob
+from core.yaml_loader import ProjectFormatError, ProjectLoader, load_scenes, parse_yaml
+from core.yaml_writer import atomic_file, write_yaml
+
+PROJECT_SUFFIX = ".project.yaml"
+CHAPTER_FOLDER = "chapters"
+EMPTY_CHAPTER = "start: null\nvideos: {}\noptions: {}\n"
+
+
+def is_project_file(file_path):
+    return file_path.endswith(PROJECT_SUFFIX)
+
+
+class Chapter:
+    def __init__(self, name, file_name, scene_ids=None):
+        self.name = name
+        self.file_name = file_name  # Relative to the root file's folder
+        self.scene_ids = list(scene_ids or [])  # Index from the root file, used until loaded
+        self.loaded = False
+        self.size = 0  # Scenes of this chapter in the SceneGraph
+        self.version = 0  # Bumped on every change, so a save only clears what it wrote
+        self.saved_version = 0
+
+    @property
+    def dirty(self):
+        return self.version != self.saved_version
+
+
+def read_root(root_path):
+    """Return the Chapter list of a project root file."""
+    with open(root_path, "rb") as root_file:
+        document = parse_yaml(root_file)
+    if not isinstance(document, dict) or not isinstance(document.get("chapters"), list):
+        raise ProjectFormatError("The project file does not list any chapters.")
+    chapters = []
+    for entry in document["chapters"]:
+        if not isinstance(entry, dict) or not entry.get("file"):
+            raise ProjectFormatError("Every chapter needs a file.")
+        chapters.append(Chapter(
+            str(entry.get("name") or entry["file"]), entry["file"], [str(s) for s in entry.get("scenes") or []]
+        ))
+    return chapters
+
+
+def root_document(chapters, chapter_ids):
+    """Render the root file; chapter_ids maps each chapter to its ordered scene ids."""
+    import yaml
+    return yaml.dump(
+        {"chapters": [
+            {"name": chapter.name, "file": chapter.file_name, "scenes": chapter_ids[chapter]}
+            for chapter in chapters
+        ]},
+        sort_keys=False, default_flow_style=False, allow_unicode=True,
+    )
+
+
+def merge_chapters(chapter_scenes):
+    """Concatenate (chapter name, scenes) pairs in order, refusing duplicate scene ids."""
+    merged = []
+    seen = {}
+    for name, scenes in chapter_scenes:
+        for scene in scenes:
+            scene_id = scene["scene_id"]
+            if scene_id in seen:
+                raise ProjectFormatError(f"Scene '{scene_id}' appears in both '{seen[scene_id]}' and '{name}'.")
+            seen[scene_id] = name
+            merged.append(scene)
+    return merged
+
+
+def load_merged(file_path):
+    """Scenes of a plain project file, or of every chapter of a root file merged in order."""
+    if not is_project_file(file_path):
+        return load_scenes(file_path)
+    folder = os.path.dirname(os.path.abspath(file_path))
+    return merge_chapters(
+        (chapter.name, load_scenes(os.path.join(folder, chapter.file_name)))
+        for chapter in read_root(file_path)
+    )
+
+
+class Project:
+    """Chapters of an open project and which of their scenes are in the SceneGraph.
+
+    Only loaded chapters have scenes in the graph, kept together in chapter
+    order. New scenes join the current chapter, or the one insert_scene()
+    names, at the end of its block. Every change marks the chapters it
+    touches dirty, and save_job() writes just those (plus the root file's
+    index).
+    """
+
+    def __init__(self, scene_graph, root_path, chapters):
+        self.scene_graph = scene_graph
+        self.root_path = root_path
+        self.chapters = chapters
+        self.current = chapters[0] if chapters else None  # Chapter new scenes are added to
+        self._owner = {}  # scene_id -> Chapter, for loaded scenes and unloaded chapter indexes
+        self._loading = None  # [chapter, next insert index] while a chapter streams in
+        self._adding = False  # True while add_loaded() extends the graph with a chapter's batch
+        self._inserting = None  # Chapter that insert_scene() is adding to
+        for chapter in chapters:
+            for scene_id in chapter.scene_ids:
+                self._owner.setdefault(scene_id, chapter)
+        scene_graph.add_listener(self._on_graph_change)
+
+    @classmethod
+    def create(cls, scene_graph, root_path):
+        """Start a project whose first chapter holds the scenes currently in the graph."""
+        stem = os.path.basename(root_path)[:-len(PROJECT_SUFFIX)] or "story"
+        chapter = Chapter("Chapter 1", f"{CHAPTER_FOLDER}/{stem}-1.yaml")
+        project = cls(scene_graph, root_path, [chapter])
+        chapter.loaded = True
+        for scene in scene_graph:
+            project._owner[scene["scene_id"]] = chapter
+        chapter.size = len(scene_graph)
+        chapter.version += 1
+        return project
+
+    def close(self):
+        self.scene_graph.remove_listener(self._on_graph_change)
+
+    @property
+    def folder(self):
+        return os.path.dirname(os.path.abspath(self.root_path))
+
+    def path_of(self, chapter):
+        return os.path.join(self.folder, chapter.file_name)
+
+    def chapter_of(self, scene_id):
+        return self._owner.get(scene_id)
+
+    def knows(self, scene_id):
+        """True if scene_id exists, loaded or in a chapter not loaded yet."""
+        return scene_id in self.scene_graph or scene_id in self._owner
+
+    def is_unloaded(self, scene_id):
+        chapter = self._owner.get(scene_id)
+        return chapter is not None and not chapter.loaded
+
+    @property
+    def dirty(self):
+        return any(chapter.dirty for chapter in self.chapters)
+
+    def add_chapter(self, name):
+        """Append a new, empty (and loaded) chapter and make it current."""
+        taken = {chapter.file_name for chapter in self.chapters}
+        number = len(self.chapters) + 1
+        stem = os.path.basename(self.root_path)[:-len(PROJECT_SUFFIX)] or "story"
+        while f"{CHAPTER_FOLDER}/{stem}-{number}.yaml" in taken:
+            number += 1
+        chapter = Chapter(name, f"{CHAPTER_FOLDER}/{stem}-{number}.yaml")
+        chapter.loaded = True
+        chapter.version += 1
+        self.chapters.append(chapter)
+        self.current = chapter
+        return chapter
+
+    def reassign(self, scene_id, chapter):
+        """Move a loaded scene's ownership to chapter (a renamed scene goes back to its own)."""
+        current = self._owner.get(scene_id)
+        if current is chapter or chapter is None:
+            return
+        if current is not None:
+            current.size -= 1
+            self._touch(current)
+        self._owner[scene_id] = chapter
+        chapter.size += 1
+        self._touch(chapter)
+
+    def block_end(self, chapter):
+        """Graph index just after the last scene of chapter, or of the loaded chapters before it.
+
+        Scenes are added there rather than at the end of the graph, so each
+        chapter's scenes stay in one block in chapter order, as the merged
+        export has them (even after drags moved scenes between chapters).
+        """
+        rank = {other: number for number, other in enumerate(self.chapters)}
+        limit = rank[chapter]
+        graph = self.scene_graph
+        for index in range(len(graph) - 1, -1, -1):
+            owner = self._owner.get(graph[index]["scene_id"])
+            if owner is not None and rank[owner] <= limit:
+                return index + 1
+        return 0
+
+    def insert_scene(self, scene, chapter, index=None):
+        """Insert a new scene into chapter, at index or else at the end of the chapter's block."""
+        if index is None:
+            index = self.block_end(chapter)
+        self._inserting = chapter
+        try:
+            return self.scene_graph.insert(index, scene)
+        finally:
+            self._inserting = None
+
+    @property
+    def fully_loaded(self):
+        return all(chapter.loaded for chapter in self.chapters)
+
+    # Loading chapters
+    def begin_load(self, chapter, prepare=None):
+        """Start streaming an unloaded chapter in; feed its batches to add_loaded()."""
+        self._loading = [chapter, self.block_end(chapter)]  # Its own scenes are not in the graph yet
+        return ProjectLoader(self.path_of(chapter), prepare=prepare).start()
+
+    def add_loaded(self, scenes):
+        chapter, index = self._loading
+        self._adding = True
+        try:
+            self.scene_graph.extend(scenes, index)
+        finally:
+            self._adding = False
+        self._loading[1] += len(scenes)
+
+    def finish_load(self, ok):
+        """Mark the chapter loaded, or take back the scenes of a failed load."""
+        chapter = self._loading[0]
+        if not ok:
+            for scene_id in [scene_id for scene_id, owner in self._owner.items()
+                             if owner is chapter and scene_id in self.scene_graph]:
+                self.scene_graph.remove(scene_id)
+            self._loading = None
+            return
+        self._loading = None
+        for scene_id in chapter.scene_ids:
+            if self._owner.get(scene_id) is chapter and scene_id not in self.scene_graph:
+                del self._owner[scene_id]  # Stale index entry
+        chapter.scene_ids = []
+        chapter.loaded = True
+
+    # Change tracking
+    def _touch(self, chapter):
+        if chapter is not None:
+            chapter.version += 1
+
+    def _on_graph_change(self, event, *args):
+        graph = self.scene_graph
+        if event in ("insert", "remove") and self._loading is not None and args[0] < self._loading[1]:
+            # Edited while a chapter streams in: keep its next batch in place
+            self._loading[1] += 1 if event == "insert" else -1
+        if event == "insert":
+            self._adopt(args[1])
+        elif event == "update":
+            self._touch(self._owner.get(args[1]))
+        elif event == "remove":
+            chapter = self._owner.get(args[1])
+            if chapter is None:
+                return
+            chapter.size -= 1
+            if chapter.loaded:
+                del self._owner[args[1]]
+                self._touch(chapter)
+            # Otherwise a failed load is being rolled back; the id stays in the chapter's index
+        elif event == "extend":
+            start, count = args
+            for index in range(start, start + count):
+                self._adopt(graph[index]["scene_id"])
+        elif event == "swap":
+            for index in args:
+                self._touch(self._owner.get(graph[index]["scene_id"]))
+        elif event == "move":
+            self._touch(self._owner.get(graph[args[1]]["scene_id"]))
+        elif event == "reset":
+            # The whole graph was replaced: whatever is there now belongs to loaded chapters
+            for chapter in self.chapters:
+                if chapter.loaded:
+                    chapter.size = 0
+                    self._touch(chapter)
+            for scene_id, chapter in list(self._owner.items()):
+                if chapter.loaded:
+                    del self._owner[scene_id]
+            for scene in graph:
+                self._adopt(scene["scene_id"])
+
+    def _adopt(self, scene_id):
+        if self._adding:
+            chapter = self._loading[0]
+            self._owner[scene_id] = chapter
+            chapter.size += 1
+            return
+        chapter = self._owner.get(scene_id)
+        if chapter is None or not chapter.loaded:
+            chapter = self._inserting or self.current
+            self._owner[scene_id] = chapter
+        chapter.size += 1
+        self._touch(chapter)
+
+    # Saving
+    def chapter_scenes(self):
+        """Snapshot {chapter: [scene, ...]} of the loaded chapters, in graph order."""
+        scenes = {chapter: [] for chapter in self.chapters if chapter.loaded}
+        for scene in self.scene_graph:
+            chapter = self._owner.get(scene["scene_id"])
+            if chapter in scenes:
+                scenes[chapter].append(scene)
+        return scenes
+
+    def save_job(self):
+        """Start a ProjectSaver for the dirty chapters; None if nothing changed."""
+        if not self.dirty:
+            return None
+        scenes = self.chapter_scenes()
+        chapter_ids = {
+            chapter: [scene["scene_id"] for scene in scenes[chapter]] if chapter.loaded else chapter.scene_ids
+            for chapter in self.chapters
+        }
+        writes = [
+            (chapter, chapter.version, self.path_of(chapter), scenes[chapter])
+            for chapter in self.chapters if chapter.loaded and chapter.dirty
+        ]
+        return ProjectSaver(self.root_path, root_document(self.chapters, chapter_ids), writes).start()
+
+    def finish_save(self, job):
+        """Mark what the job wrote as clean (chapters edited meanwhile stay dirty)."""
+        for chapter, version, _, _ in job.writes:
+            chapter.saved_version = version
+
+    def export_job(self, file_path, fragment_cache=None):
+        """Start a MergedExport of every chapter (unloaded ones are read from disk)."""
+        scenes = self.chapter_scenes()
+        parts = [
+            (chapter.name, scenes[chapter] if chapter.loaded else self.path_of(chapter))
+            for chapter in self.chapters
+        ]
+        return MergedExport(parts, file_path, fragment_cache).start()
+
+
+class ProjectSaver(BackgroundJob):
+    """Write the given chapter files and the root file, each atomically."""
+
+    name = "ProjectSaver"
+
+    def __init__(self, root_path, root_text, writes):
+        super().__init__()
+        self.root_path = root_path
+        self.root_text = root_text
+        self.writes = writes  # (chapter, version, file path, scenes)
+
+    def run(self):
+        for _, _, file_path, scenes in self.writes:
+            self.check_cancelled()
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            if scenes:
+                write_yaml(scenes, file_path)
+            else:
+                with atomic_file(file_path) as chapter_file:
+                    chapter_file.write(EMPTY_CHAPTER)
+        with atomic_file(self.root_path) as root_file:
+            root_file.write(self.root_text)
+        return len(self.writes)
+
+
+class MergedExport(BackgroundJob):
+    """Write the flat start/videos/options file for the player from every chapter."""
+
+    name = "MergedExport"
+
+    def __init__(self, parts, file_path, fragment_cache=None):
+        super().__init__()
+        self.parts = parts  # (chapter name, scenes or path of an unloaded chapter file)
+        self.file_path = file_path
+        self.fragment_cache = fragment_cache
+
+    def run(self):
+        chapter_scenes = []
+        for name, scenes in self.parts:
+            self.check_cancelled()
+            chapter_scenes.append((name, load_scenes(scenes) if isinstance(scenes, str) else scenes))
+        return write_yaml(
+            merge_chapters(chapter_scenes), self.file_path, self.fragment_cache,
+            progress=lambda fraction: self.post("progress", fraction), check_cancelled=self.check_cancelled,
+        )
@@ -0,0 +1,293 @@
+"""Publish a story: its YAML plus exactly the media it uses, in one folder.
+
+    bundle/
+        story.yaml              the exported document (generate_yaml's text)
+        videos/...              every file the document points at
+        images/...
+        publish-manifest.json   {relative path: {"size", "mtime_ns", "hash"}}
+
+The manifest records each source file as it was when it was published.
+Publishing into the same folder again skips every file whose size and
+mtime still match (and whose copy is still there), re-hashes a file whose
+timestamp moved to tell a touch from an edit, copies only what really
+changed and deletes files the story no longer uses. Copies are streamed
+through a hash on a thread pool and land under a temporary name first, so
+an interrupted publish never leaves a half-copied file that looks done.
+With link=True files are hard-linked instead of copied where the
+filesystem allows it.
+
+archive=True also writes <bundle>.zip (media stored, not recompressed);
+the zip is rewritten only when something in the bundle changed.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from core.background import BackgroundJob
+from core.media_catalog import MEDIA_FOLDERS
+from core.yaml_export import scene_to_yaml
+from core.yaml_writer import atomic_file, write_yaml
+
+MANIFEST_NAME = "publish-manifest.json"
+MANIFEST_VERSION = 1
+CHUNK_SIZE = 1 << 20
+MAX_WORKERS = 4
+
+_worker = threading.local()  # Each copying thread's buffer
+
+
+def referenced_media(scenes):
+    """Sorted relative paths ("videos/x.mp4", "images/y.jpg") of every file the export points at."""
+    paths = set()
+    for scene in scenes:
+        video_path, scene_data = scene_to_yaml(scene)
+        paths.add(video_path)
+        for choice in scene_data["choices"].values():
+            if "image" in choice:
+                paths.add(choice["image"])
+    return sorted(paths)
+
+
+def _safe_relative(path):
+    """path normalised with "/" separators, or None if it would leave the media folders."""
+    normalised = os.path.normpath(path.replace("\\", "/")).replace(os.sep, "/")
+    if os.path.isabs(normalised) or normalised.split("/")[0] not in MEDIA_FOLDERS:
+        return None
+    return normalised
+
+
+def _buffer():
+    if not hasattr(_worker, "buffer"):
+        _worker.buffer = bytearray(CHUNK_SIZE)
+    return memoryview(_worker.buffer)
+
+
+def file_hash(path, check_cancelled=None):
+    digest = hashlib.blake2b(digest_size=20)
+    view = _buffer()
+    with open(path, "rb", buffering=0) as source:
+        while True:
+            if check_cancelled:
+                check_cancelled()
+            count = source.readinto(view)
+            if not count:
+                return digest.hexdigest()
+            digest.update(view[:count])
+
+
+def _copy_file(source_path, target_path, stat, check_cancelled=None):
+    """Copy through a temporary file, hashing on the way; returns the hash."""
+    directory = os.path.dirname(target_path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(target_path)}.", suffix=".tmp")
+    digest = hashlib.blake2b(digest_size=20)
+    view = _buffer()
+    try:
+        with open(source_path, "rb", buffering=0) as source, os.fdopen(fd, "wb", buffering=0) as target:
+            while True:
+                if check_cancelled:
+                    check_cancelled()
+                count = source.readinto(view)
+                if not count:
+                    break
+                digest.update(view[:count])
+                target.write(view[:count])
+        os.chmod(temp_path, stat.st_mode & 0o777)  # Not mkstemp's 0600: the bundle is shared
+        os.utime(temp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.replace(temp_path, target_path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+    return digest.hexdigest()
+
+
+def _link_file(source_path, target_path):
+    """Hard-link source_path into place; False if this filesystem can't."""
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    temp_path = os.path.join(os.path.dirname(target_path), f".{os.path.basename(target_path)}.link")
+    try:
+        if os.path.lexists(temp_path):
+            os.unlink(temp_path)
+        os.link(source_path, temp_path)
+    except OSError:
+        return False  # Other device, FAT, no permission...
+    os.replace(temp_path, target_path)
+    return True
+
+
+def read_manifest(bundle_dir):
+    try:
+        with open(os.path.join(bundle_dir, MANIFEST_NAME), "r", encoding="utf-8") as manifest_file:
+            manifest = json.load(manifest_file)
+        if manifest.get("version") == MANIFEST_VERSION:
+            return manifest
+    except (OSError, ValueError, AttributeError):
+        pass
+    return {"version": MANIFEST_VERSION, "files": {}, "archive": None}
+
+
+class PublishResult:
+    """What a publish did; lists of relative paths."""
+
+    def __init__(self, bundle_dir):
+        self.bundle_dir = bundle_dir
+        self.copied = []
+        self.linked = []
+        self.unchanged = []
+        self.removed = []
+        self.missing = []  # Referenced but not in the source folder (or outside videos/ and images/)
+        self.bytes_copied = 0
+        self.archive = None  # Path of the zip, if one was asked for
+
+    def summary(self):
+        text = (f"{len(self.copied)} copied ({self.bytes_copied / (1 << 20):.1f} MB), "
+                f"{len(self.linked)} linked, {len(self.unchanged)} unchanged, {len(self.removed)} removed")
+        if self.missing:
+            text += f", {len(self.missing)} missing"
+        return text
+
+
+def publish(scenes, source_folder, bundle_dir, yaml_name="story.yaml", link=False, archive=False,
+            fragment_cache=None, max_workers=MAX_WORKERS, progress=None, check_cancelled=None):
+    """Bring bundle_dir up to date with scenes and their media; returns a PublishResult."""
+    scenes = list(scenes)
+    result = PublishResult(bundle_dir)
+    os.makedirs(bundle_dir, exist_ok=True)
+    manifest = read_manifest(bundle_dir)
+    old_files = manifest["files"]
+    new_files = {}
+
+    # Decide what each file needs from a stat of the source and of the copy
+    work = []  # (relative path, source path, target path, stat, recorded entry or None)
+    for media_path in referenced_media(scenes):
+        relative = _safe_relative(media_path)
+        if relative is None:
+            result.missing.append(media_path)
+            continue
+        source_path = os.path.join(source_folder, relative)
+        target_path = os.path.join(bundle_dir, relative)
+        try:
+            stat = os.stat(source_path)
+        except OSError:
+            result.missing.append(media_path)
+            continue
+        entry = old_files.get(relative)
+        try:
+            target_size = os.stat(target_path).st_size
+        except OSError:
+            target_size = None
+        if entry is not None and target_size != entry["size"]:
+            entry = None  # The copy is gone or was changed; the record says nothing about it
+        if entry is not None and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            new_files[relative] = entry
+            result.unchanged.append(relative)
+        else:
+            work.append((relative, source_path, target_path, stat, entry))
+
+    total = sum(stat.st_size for _, _, _, stat, _ in work) or 1
+    done = [0]
+    lock = threading.Lock()
+
+    def sync(item):
+        relative, source_path, target_path, stat, entry = item
+        if entry is not None and entry["size"] == stat.st_size:
+            # Only the timestamp moved: reading the source is cheaper than copying it
+            digest = file_hash(source_path, check_cancelled)
+            action = "unchanged" if digest == entry["hash"] else None
+        else:
+            digest = action = None
+        if action is None and link and _link_file(source_path, target_path):
+            action = "linked"
+            digest = digest or file_hash(source_path, check_cancelled)
+        if action is None:
+            digest = _copy_file(source_path, target_path, stat, check_cancelled)
+            action = "copied"
+        with lock:
+            done[0] += stat.st_size
+            if progress:
+                progress(done[0] / total)
+        return relative, action, digest, stat
+
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="Publish")
+    try:
+        for relative, action, digest, stat in pool.map(sync, work):
+            new_files[relative] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": digest}
+            getattr(result, action).append(relative)
+            if action == "copied":
+                result.bytes_copied += stat.st_size
+    except BaseException:
+        # Cancelled or failed: keep what was copied so far for the next run
+        pool.shutdown(cancel_futures=True)
+        _write_manifest(bundle_dir, {"files": {**old_files, **new_files}, "yaml": None, "archive": None})
+        raise
+    pool.shutdown()
+
+    # Files an earlier publish put there that the story no longer uses
+    for relative in sorted(set(old_files) - set(new_files)):
+        try:
+            os.unlink(os.path.join(bundle_dir, relative))
+            result.removed.append(relative)
+        except FileNotFoundError:
+            pass
+
+    write_yaml(scenes, os.path.join(bundle_dir, yaml_name), fragment_cache)
+    with open(os.path.join(bundle_dir, yaml_name), "rb") as yaml_file:
+        yaml_hash = hashlib.blake2b(yaml_file.read(), digest_size=20).hexdigest()
+
+    archive_path = os.path.normpath(bundle_dir) + ".zip"
+    state = {"files": new_files, "yaml": [yaml_name, yaml_hash]}
+    if archive:
+        result.archive = archive_path
+        fingerprint = hashlib.blake2b(json.dumps(state, sort_keys=True).encode(), digest_size=20).hexdigest()
+        if manifest.get("archive") != fingerprint or not os.path.exists(archive_path):
+            write_archive(bundle_dir, archive_path, [yaml_name] + sorted(new_files), check_cancelled)
+        state["archive"] = fingerprint
+    else:
+        state["archive"] = None
+
+    _write_manifest(bundle_dir, state)
+    if progress:
+        progress(1.0)
+    return result
+
+
+def _write_manifest(bundle_dir, state):
+    with atomic_file(os.path.join(bundle_dir, MANIFEST_NAME)) as manifest_file:
+        json.dump({"version": MANIFEST_VERSION, **state}, manifest_file, indent=1, sort_keys=True)
+
+
+def write_archive(bundle_dir, archive_path, names, check_cancelled=None):
+    """Zip names (relative to bundle_dir) into archive_path atomically; media are stored as they are."""
+    with atomic_file(archive_path, "wb") as archive_file:
+        with zipfile.ZipFile(archive_file, "w", allowZip64=True) as archive:
+            for name in names:
+                if check_cancelled:
+                    check_cancelled()
+                compression = zipfile.ZIP_DEFLATED if name.endswith(".yaml") else zipfile.ZIP_STORED
+                archive.write(os.path.join(bundle_dir, name), name, compress_type=compression)
+
+
+class Publisher(BackgroundJob):
+    """Run publish() on a snapshot of the scenes; posts ("progress", fraction)."""
+
+    name = "Publisher"
+
+    def __init__(self, scenes, source_folder, bundle_dir, fragment_cache=None, **options):
+        super().__init__()
+        self.scenes = list(scenes)  # Snapshot taken on the caller's thread
+        self.source_folder = source_folder
+        self.bundle_dir = bundle_dir
+        self.fragment_cache = fragment_cache
+        self.options = options
+
+    def run(self):
+        return publish(self.scenes, self.source_folder, self.bundle_dir, fragment_cache=self.fragment_cache,
+                       progress=lambda fraction: self.post("progress", fraction),
+                       check_cancelled=self.check_cancelled, **self.options)
@@ -0,0 +1,288 @@
+class SceneGraph:
+    """Ordered, indexed store for scene dicts and the choice edges between them.
+
+    Scenes keep the same dict shape the editor produces ("scene_id", "video",
+    "scene_type", "heading", "choices"). Lookups go through an id -> scene
+    hash index, positions are cached per id and only recomputed from the
+    first position that actually moved, and every choice is mirrored in a
+    forward and a reverse edge index so "who points at X" is never a scan.
+
+    Stored scene dicts are treated as immutable: a change always replaces
+    the dict (put) rather than editing it, so snapshots and the undo history
+    can share scene dicts with the graph instead of copying them.
+    """
+
+    def __init__(self, scenes=None):
+        self._scenes = {}  # scene_id -> scene dict
+        self._order = []  # scene ids in display/export order
+        self._positions = {}  # scene_id -> cached index in self._order, checked on read
+        self._positions_valid = 0  # cached indexes are exact below this position
+        self._forward = {}  # scene_id -> list of next_scene ids (one per choice)
+        self._reverse = {}  # next_scene id -> {source scene_id: choice count}
+        self._copy_counters = {}  # base scene_id -> last suffix tried by unique_id
+        self._listeners = []
+
+        if scenes:
+            self.load(scenes)
+
+    # Change notifications
+    def add_listener(self, callback):
+        """Register callback(event, *args) to be told about every change.
+
+        Events: ("insert", index, id), ("update", index, id, old scene),
+        ("remove", index, id, scene), ("extend", start, count), ("swap", i, j),
+        ("move", old index, new index) and ("reset", previous scenes).
+        """
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, event, *args):
+        for callback in list(self._listeners):
+            callback(event, *args)
+
+    # Read access
+    def __len__(self):
+        return len(self._order)
+
+    def __contains__(self, scene_id):
+        return scene_id in self._scenes
+
+    def __iter__(self):
+        """Iterate over scenes in order."""
+        scenes = self._scenes
+        return (scenes[scene_id] for scene_id in self._order)
+
+    def __getitem__(self, index):
+        return self._scenes[self._order[index]]
+
+    def get(self, scene_id, default=None):
+        return self._scenes.get(scene_id, default)
+
+    def ids(self):
+        """Return the scene ids in order (a copy)."""
+        return list(self._order)
+
+    @property
+    def start_id(self):
+        """The first scene is the starting scene of the story."""
+        return self._order[0] if self._order else None
+
+    def index_of(self, scene_id):
+        """Return the position of scene_id, or -1 if it is not in the graph."""
+        if scene_id not in self._scenes:
+            return -1
+        index = self._positions.get(scene_id)
+        order = self._order
+        if index is not None and index < len(order) and order[index] == scene_id:
+            return index
+        self._reindex()
+        return self._positions[scene_id]
+
+    def _reindex(self):
+        """Refresh cached positions from the first one that went stale."""
+        positions = self._positions
+        order = self._order
+        for index in range(self._positions_valid, len(order)):
+            positions[order[index]] = index
+        self._positions_valid = len(order)
+
+    def _invalidate_positions(self, index):
+        if index < self._positions_valid:
+            self._positions_valid = index
+
+    # Edge indexes
+    def successors(self, scene_id):
+        """Return the next_scene ids of scene_id's choices, in choice order."""
+        return list(self._forward.get(scene_id, ()))
+
+    def predecessors(self, scene_id):
+        """Return the ids of scenes that have a choice leading to scene_id."""
+        return list(self._reverse.get(scene_id, ()))
+
+    def reference_count(self, scene_id):
+        """Number of choices, across all scenes, whose next_scene is scene_id."""
+        return sum(self._reverse.get(scene_id, {}).values())
+
+    def _link(self, scene):
+        scene_id = scene["scene_id"]
+        targets = [choice["next_scene"] for choice in scene.get("choices", [])]
+        self._forward[scene_id] = targets
+        for target in targets:
+            sources = self._reverse.setdefault(target, {})
+            sources[scene_id] = sources.get(scene_id, 0) + 1
+
+    def _unlink(self, scene_id):
+        for target in self._forward.pop(scene_id, ()):
+            sources = self._reverse.get(target)
+            if not sources:
+                continue
+            count = sources.get(scene_id, 0) - 1
+            if count > 0:
+                sources[scene_id] = count
+            else:
+                sources.pop(scene_id, None)
+                if not sources:
+                    del self._reverse[target]
+
+    # Mutation
+    def put(self, scene):
+        """Replace the scene with the same id in place, or append it.
+
+        Returns the scene's index.
+        """
+        scene_id = scene["scene_id"]
+        if scene_id in self._scenes:
+            old_scene = self._scenes[scene_id]
+            self._unlink(scene_id)
+            self._scenes[scene_id] = scene
+            self._link(scene)
+            index = self.index_of(scene_id)
+            self._notify("update", index, scene_id, old_scene)
+            return index
+        return self.insert(len(self._order), scene)
+
+    def insert(self, index, scene):
+        """Insert a new scene at index. Raises ValueError on duplicate ids."""
+        scene_id = scene["scene_id"]
+        if scene_id in self._scenes:
+            raise ValueError(f"Scene '{scene_id}' already exists")
+        index = max(0, min(index, len(self._order)))
+        self._scenes[scene_id] = scene
+        self._link(scene)
+        if index == len(self._order) and self._positions_valid == index:
+            self._order.append(scene_id)
+            self._positions[scene_id] = index
+            self._positions_valid = index + 1
+        else:
+            self._order.insert(index, scene_id)
+            self._invalidate_positions(index)
+        self._notify("insert", index, scene_id)
+        return index
+
+    def extend(self, scenes, index=None):
+        """Add new scenes in order at index (default: the end) as one "extend" event."""
+        if index is not None and index < len(self._order):
+            self._extend_at(max(0, index), scenes)
+            return
+        start = len(self._order)
+        self._reindex()
+        for scene in scenes:
+            scene_id = scene["scene_id"]
+            if scene_id in self._scenes:
+                raise ValueError(f"Scene '{scene_id}' already exists")
+            self._positions[scene_id] = len(self._order)
+            self._order.append(scene_id)
+            self._scenes[scene_id] = scene
+            self._link(scene)
+        self._positions_valid = len(self._order)
+        if len(self._order) > start:
+            self._notify("extend", start, len(self._order) - start)
+
+    def _extend_at(self, index, scenes):
+        new_ids = []
+        batch = set()
+        for scene in scenes:
+            scene_id = scene["scene_id"]
+            if scene_id in self._scenes or scene_id in batch:
+                raise ValueError(f"Scene '{scene_id}' already exists")
+            batch.add(scene_id)
+            new_ids.append(scene_id)
+        if not new_ids:
+            return
+        for scene in scenes:
+            self._scenes[scene["scene_id"]] = scene
+            self._link(scene)
+        self._order[index:index] = new_ids
+        self._invalidate_positions(index)
+        self._notify("extend", index, len(new_ids))
+
+    def remove(self, scene_id):
+        """Remove a scene and return it. Choices pointing at it are left alone."""
+        index = self.index_of(scene_id)
+        if index < 0:
+            raise KeyError(scene_id)
+        scene = self._scenes.pop(scene_id)
+        self._unlink(scene_id)
+        del self._order[index]
+        del self._positions[scene_id]
+        self._invalidate_positions(index)
+        self._notify("remove", index, scene_id, scene)
+        return scene
+
+    def swap(self, i, j):
+        """Swap the scenes at positions i and j."""
+        if i == j:
+            return
+        order = self._order
+        order[i], order[j] = order[j], order[i]
+        self._positions[order[i]] = i
+        self._positions[order[j]] = j
+        self._notify("swap", i, j)
+
+    def move(self, old_index, new_index):
+        """Move the scene at old_index so it ends up at new_index."""
+        if old_index == new_index:
+            return
+        scene_id = self._order.pop(old_index)
+        self._order.insert(new_index, scene_id)
+        self._invalidate_positions(min(old_index, new_index))
+        self._notify("move", old_index, new_index)
+
+    def clear(self):
+        previous = list(self)
+        self._reset()
+        self._notify("reset", previous)
+
+    def _reset(self):
+        self._scenes.clear()
+        self._order.clear()
+        self._positions.clear()
+        self._positions_valid = 0
+        self._forward.clear()
+        self._reverse.clear()
+        self._copy_counters.clear()
+
+    def load(self, scenes):
+        """Replace the whole graph with scenes (an iterable of scene dicts)."""
+        previous = list(self)
+        self._reset()
+        for scene in scenes:
+            scene_id = scene["scene_id"]
+            if scene_id in self._scenes:
+                raise ValueError(f"Scene '{scene_id}' already exists")
+            self._positions[scene_id] = len(self._order)
+            self._order.append(scene_id)
+            self._scenes[scene_id] = scene
+            self._link(scene)
+        self._positions_valid = len(self._order)
+        self._notify("reset", previous)
+
+    # Helpers used by the editor
+    def unique_id(self, base_id):
+        """Return a free id of the form base_copy, base_copy2, base_copy3, ...
+
+        The last suffix handed out per base id is remembered, so duplicating
+        the same scene over and over does not probe every earlier copy again.
+        """
+        count = self._copy_counters.get(base_id, 1)
+        new_id = f"{base_id}_copy" if count == 1 else f"{base_id}_copy{count}"
+        while new_id in self._scenes:
+            count += 1
+            new_id = f"{base_id}_copy{count}"
+        self._copy_counters[base_id] = count
+        return new_id
+
+    def missing_references(self):
+        """Return (scene_id, next_scene) pairs whose target scene does not exist."""
+        scenes = self._scenes
+        missing = []
+        for target, sources in self._reverse.items():
+            if target in scenes:
+                continue
+            for source in sources:
+                missing.append((source, target))
+        missing.sort(key=lambda pair: self.index_of(pair[0]))
+        return missing
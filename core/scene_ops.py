@@ -0,0 +1,142 @@
+"""Operations on scene ids: rename, bulk rename, retarget, delete and merge.
+
+Every choice that points at a scene is found through the SceneGraph's
+reverse edge index, so an operation touches the scene itself and the scenes
+that refer to it, never the rest of the story. Scenes are replaced (put),
+not edited, like everywhere else, so callers can wrap an operation in a
+History group to make it one undo step.
+"""
+import re
+
+
+def _check_new_id(scene_graph, new_id, exists=None):
+    if not new_id or not new_id.strip() or new_id != new_id.strip():
+        raise ValueError(f"Invalid scene id {new_id!r}")
+    if new_id in scene_graph or (exists is not None and exists(new_id)):
+        raise ValueError(f"Scene '{new_id}' already exists")
+
+
+def _with_targets(scene, mapping):
+    """scene with its choices' next_scene renamed through mapping, or scene itself if none changed."""
+    choices = scene.get("choices", [])
+    if not any(choice["next_scene"] in mapping for choice in choices):
+        return scene
+    scene = dict(scene)
+    scene["choices"] = [
+        dict(choice, next_scene=mapping[choice["next_scene"]]) if choice["next_scene"] in mapping else choice
+        for choice in choices
+    ]
+    return scene
+
+
+def _drop_targets(scene, targets):
+    scene = dict(scene)
+    scene["choices"] = [choice for choice in scene.get("choices", []) if choice["next_scene"] not in targets]
+    return scene
+
+
+def retarget(scene_graph, old_id, new_id):
+    """Point every choice leading to old_id at new_id instead; returns the scenes changed."""
+    return _rewrite_referrers(scene_graph, {old_id: new_id})
+
+
+def _rewrite_referrers(scene_graph, mapping, skip=()):
+    sources = set()
+    for old_id in mapping:
+        sources.update(scene_graph.predecessors(old_id))
+    sources.difference_update(skip)
+    changed = []
+    for source in sources:
+        scene = _with_targets(scene_graph.get(source), mapping)
+        scene_graph.put(scene)
+        changed.append(source)
+    return changed
+
+
+def rename_scene(scene_graph, old_id, new_id, exists=None):
+    """Give a scene a new id, in place, and update every choice leading to it.
+
+    exists(scene_id) can report ids taken outside the graph (unloaded
+    chapters). Raises KeyError for an unknown scene and ValueError if the
+    new id is invalid or taken.
+    """
+    return bulk_rename(scene_graph, [(old_id, new_id)], exists)
+
+
+def bulk_rename(scene_graph, renames, exists=None):
+    """Apply (old id, new id) pairs together; returns the ids of the referring scenes updated.
+
+    Pairs may swap or chain ids (a -> b, b -> c) since they are checked and
+    applied as one mapping.
+    """
+    mapping = dict(renames)
+    for old_id, new_id in mapping.items():
+        if old_id not in scene_graph:
+            raise KeyError(old_id)
+    freed = set(mapping)
+    targets = set()
+    for new_id in mapping.values():
+        if new_id in targets:
+            raise ValueError(f"Two scenes would be renamed to '{new_id}'")
+        targets.add(new_id)
+        if new_id not in freed:
+            _check_new_id(scene_graph, new_id, exists)
+    mapping = {old_id: new_id for old_id, new_id in mapping.items() if old_id != new_id}
+    if not mapping:
+        return []
+
+    # Referring scenes first, while the old ids still resolve; renamed scenes are rewritten below
+    updated = _rewrite_referrers(scene_graph, mapping, skip=mapping)
+    # Take every renamed scene out before putting any back, so swapped ids never collide
+    # (last first, so the positions taken down stay valid)
+    positions = sorted((scene_graph.index_of(old_id), old_id) for old_id in mapping)
+    removed = [(index, scene_graph.remove(old_id)) for index, old_id in reversed(positions)]
+    for index, scene in reversed(removed):  # Ascending, so each goes back to its old position
+        scene = _with_targets(scene, mapping)
+        scene = dict(scene, scene_id=mapping[scene["scene_id"]])
+        scene_graph.insert(index, scene)
+    return updated
+
+
+def plan_regex_rename(scene_graph, pattern, replacement):
+    """(old id, new id) pairs for every scene id the regex changes, in scene order.
+
+    Uses re.sub, so the replacement may refer to groups (\\1, \\g<name>).
+    Raises re.error for a bad pattern.
+    """
+    compiled = re.compile(pattern)
+    renames = []
+    for scene_id in scene_graph.ids():
+        new_id = compiled.sub(replacement, scene_id)
+        if new_id != scene_id:
+            renames.append((scene_id, new_id))
+    return renames
+
+
+def delete_scene(scene_graph, scene_id, retarget_to=None):
+    """Remove a scene; choices leading to it are pointed at retarget_to, or dropped.
+
+    Returns the removed scene.
+    """
+    if scene_id not in scene_graph:
+        raise KeyError(scene_id)
+    if retarget_to is not None:
+        if retarget_to == scene_id:
+            raise ValueError("A scene cannot be retargeted to itself")
+        _rewrite_referrers(scene_graph, {scene_id: retarget_to}, skip={scene_id})
+    else:
+        for source in scene_graph.predecessors(scene_id):
+            if source != scene_id:
+                scene_graph.put(_drop_targets(scene_graph.get(source), {scene_id}))
+    return scene_graph.remove(scene_id)
+
+
+def merge_scenes(scene_graph, source_id, target_id):
+    """Fold source_id into target_id: its references move to target_id and it is removed.
+
+    target_id keeps its own video, heading and choices; source_id's choices
+    are dropped with it.
+    """
+    if target_id not in scene_graph:
+        raise KeyError(target_id)
+    return delete_scene(scene_graph, source_id, retarget_to=target_id)
@@ -0,0 +1,281 @@
+"""Compiled binary scene pack for the player runtime.
+
+Layout (all integers little-endian):
+
+    header          see HEADER below
+    string index    string_count x (offset u32, length u32) into string data
+    string data     UTF-8 bytes of every distinct string, stored once
+    scene hash      hash_size x u32 scene numbers (open addressing, crc32 of the id)
+    scene table     scene_count x SCENE records
+    choice table    choice_count x CHOICE records, each scene's choices contiguous
+
+Strings are referenced by number; NO_STRING stands for "absent" (no image,
+null heading). The pack holds exactly what the YAML export holds
+(start/videos/options), so it can be turned back into that structure.
+"""
+import mmap
+import struct
+import zlib
+
+from core.background import BackgroundJob
+from core.yaml_export import EMPTY_YAML, scene_to_yaml
+from core.yaml_writer import atomic_file
+
+MAGIC = b"SCPK"
+VERSION = 1
+NO_STRING = 0xFFFFFFFF
+NO_SCENE = 0xFFFFFFFF
+
+# magic, version, flags, scene_count, choice_count, string_count, hash_size, start_scene,
+# string_index_offset, string_data_offset, hash_offset, scene_offset, choice_offset
+HEADER = struct.Struct("<4sHHIIIIIQQQQQ")
+STRING_ENTRY = struct.Struct("<II")
+# id, video, scene_type, heading, first_choice, choice_count
+SCENE = struct.Struct("<IIIIII")
+# option, next (string), next_scene (scene number or NO_SCENE), image, flags
+CHOICE = struct.Struct("<IIIII")
+FLAG_TEMPORARY = 1
+
+
+class PackFormatError(ValueError):
+    """The file is not a scene pack this reader understands."""
+
+
+def _hash_size(scene_count):
+    size = 8
+    while size < scene_count * 2:
+        size *= 2
+    return size
+
+
+def build_pack(scenes):
+    """Compile an ordered iterable of scenes into pack bytes."""
+    strings = {}
+    string_list = []
+
+    def intern(value):
+        if value is None:
+            return NO_STRING
+        value = str(value)
+        number = strings.get(value)
+        if number is None:
+            number = strings[value] = len(string_list)
+            string_list.append(value)
+        return number
+
+    scenes = list(scenes)
+    scene_numbers = {scene["scene_id"]: number for number, scene in enumerate(scenes)}
+    scene_records = []
+    choice_records = []
+    for scene in scenes:
+        video_path, scene_data = scene_to_yaml(scene)
+        scene_type = scene_data["scene_type"]
+        heading_key = "continue_heading" if scene_type == "Continue" else "question_heading"
+        first_choice = len(choice_records)
+        for option, choice_data in scene_data["choices"].items():
+            choice_records.append(CHOICE.pack(
+                intern(option),
+                intern(choice_data["next"]),
+                scene_numbers.get(choice_data["next"], NO_SCENE),
+                intern(choice_data.get("image")),
+                FLAG_TEMPORARY if choice_data.get("temporary") else 0,
+            ))
+        scene_records.append(SCENE.pack(
+            intern(scene["scene_id"]),
+            intern(video_path),
+            intern(scene_type),
+            intern(scene_data[heading_key]),
+            first_choice,
+            len(choice_records) - first_choice,
+        ))
+
+    string_index = bytearray()
+    string_data = bytearray()
+    encoded = [value.encode("utf-8") for value in string_list]
+    for data in encoded:
+        string_index += STRING_ENTRY.pack(len(string_data), len(data))
+        string_data += data
+
+    hash_size = _hash_size(len(scenes))
+    table = [NO_SCENE] * hash_size
+    mask = hash_size - 1
+    for number, scene in enumerate(scenes):
+        slot = zlib.crc32(encoded[strings[str(scene["scene_id"])]]) & mask
+        while table[slot] != NO_SCENE:
+            slot = (slot + 1) & mask
+        table[slot] = number
+    hash_data = struct.pack(f"<{hash_size}I", *table)
+
+    string_index_offset = HEADER.size
+    string_data_offset = string_index_offset + len(string_index)
+    hash_offset = string_data_offset + len(string_data)
+    hash_offset += -hash_offset % 4  # Align the integer tables
+    scene_offset = hash_offset + len(hash_data)
+    choice_offset = scene_offset + SCENE.size * len(scene_records)
+
+    header = HEADER.pack(
+        MAGIC, VERSION, 0, len(scenes), len(choice_records), len(string_list), hash_size,
+        0 if scenes else NO_SCENE,  # The first scene is the starting scene
+        string_index_offset, string_data_offset, hash_offset, scene_offset, choice_offset,
+    )
+    padding = b"\0" * (hash_offset - string_data_offset - len(string_data))
+    return b"".join([
+        header, bytes(string_index), bytes(string_data), padding, hash_data,
+        b"".join(scene_records), b"".join(choice_records),
+    ])
+
+
+def write_pack(scenes, file_path):
+    """Compile scenes and replace file_path atomically; returns the pack size in bytes."""
+    data = build_pack(scenes)
+    with atomic_file(file_path, "wb") as pack_file:
+        pack_file.write(data)
+    return len(data)
+
+
+class PackWriter(BackgroundJob):
+    """Compile a snapshot of the scenes into a pack on a worker thread ("done" carries the size)."""
+
+    name = "PackWriter"
+
+    def __init__(self, scenes, file_path):
+        super().__init__()
+        self.scenes = list(scenes)  # Snapshot taken on the caller's thread
+        self.file_path = file_path
+
+    def run(self):
+        return write_pack(self.scenes, self.file_path)
+
+
+class ScenePack:
+    """Memory-mapped reader; looking up a scene reads only that scene's records.
+
+        with ScenePack("story.scpk") as pack:
+            scene = pack.scene(pack.start_id)
+    """
+
+    def __init__(self, file_path):
+        self._file = open(file_path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty file
+            self._file.close()
+            raise PackFormatError("Empty scene pack")
+        if len(self._map) < HEADER.size:
+            self.close()
+            raise PackFormatError("Truncated scene pack")
+        (magic, version, _, self.scene_count, self.choice_count, self.string_count, self._hash_size,
+         self._start, self._string_index, self._string_data, self._hash, self._scenes,
+         self._choices) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise PackFormatError("Not a scene pack (or an unsupported version)")
+
+    def close(self):
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.scene_count
+
+    def string(self, number):
+        if number == NO_STRING:
+            return None
+        offset, length = STRING_ENTRY.unpack_from(self._map, self._string_index + number * STRING_ENTRY.size)
+        start = self._string_data + offset
+        return self._map[start:start + length].decode("utf-8")
+
+    def _string_bytes(self, number):
+        offset, length = STRING_ENTRY.unpack_from(self._map, self._string_index + number * STRING_ENTRY.size)
+        start = self._string_data + offset
+        return self._map[start:start + length]
+
+    @property
+    def start_id(self):
+        return None if self._start == NO_SCENE else self.scene_id(self._start)
+
+    def scene_id(self, number):
+        return self.string(SCENE.unpack_from(self._map, self._scenes + number * SCENE.size)[0])
+
+    def find(self, scene_id):
+        """Return the scene number for scene_id, or -1. O(1) expected."""
+        if not self.scene_count:
+            return -1
+        key = scene_id.encode("utf-8")
+        mask = self._hash_size - 1
+        slot = zlib.crc32(key) & mask
+        while True:
+            number = struct.unpack_from("<I", self._map, self._hash + slot * 4)[0]
+            if number == NO_SCENE:
+                return -1
+            id_string = SCENE.unpack_from(self._map, self._scenes + number * SCENE.size)[0]
+            if self._string_bytes(id_string) == key:
+                return number
+            slot = (slot + 1) & mask
+
+    def scene(self, scene_id):
+        """Return the scene as {"scene_id", "video", "scene_type", "heading", "choices"}, or None."""
+        number = self.find(scene_id)
+        return None if number < 0 else self.scene_at(number)
+
+    def scene_at(self, number):
+        id_string, video, scene_type, heading, first_choice, choice_count = SCENE.unpack_from(
+            self._map, self._scenes + number * SCENE.size
+        )
+        choices = []
+        for index in range(first_choice, first_choice + choice_count):
+            option, next_string, next_scene, image, flags = CHOICE.unpack_from(
+                self._map, self._choices + index * CHOICE.size
+            )
+            choices.append({
+                "option": self.string(option),
+                "next": self.string(next_string),
+                "next_index": None if next_scene == NO_SCENE else next_scene,
+                "image": self.string(image),
+                "temporary": bool(flags & FLAG_TEMPORARY),
+            })
+        return {
+            "scene_id": self.string(id_string),
+            "video": self.string(video),
+            "scene_type": self.string(scene_type),
+            "heading": self.string(heading),
+            "choices": choices,
+        }
+
+    def to_yaml_structure(self):
+        """Rebuild the start/videos/options structure the YAML export would contain."""
+        structure = {"start": self.start_id, "videos": {}, "options": {}}
+        for number in range(self.scene_count):
+            scene = self.scene_at(number)
+            scene_id = scene["scene_id"]
+            structure["videos"][scene_id] = scene["video"]
+            heading_key = "continue_heading" if scene["scene_type"] == "Continue" else "question_heading"
+            choices = {}
+            for choice in scene["choices"]:
+                choice_data = {"next": choice["next"]}
+                if choice["image"] is not None:
+                    choice_data["image"] = choice["image"]
+                if choice["temporary"]:
+                    choice_data["temporary"] = True
+                choices[choice["option"]] = choice_data
+            structure["options"][scene_id] = {
+                "scene_type": scene["scene_type"],
+                heading_key: scene["heading"],
+                "choices": choices,
+            }
+        return structure
+
+    def to_yaml(self):
+        """Render the pack back into the exported YAML text."""
+        if not self.scene_count:
+            return EMPTY_YAML
+        import yaml
+        return yaml.dump(self.to_yaml_structure(), sort_keys=False, default_flow_style=False)
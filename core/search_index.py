@@ -0,0 +1,327 @@
+import re
+from bisect import bisect_right
+
+from core import perf
+from core.background import BackgroundJob
+
+FUZZY_MIN_TERM = 6  # Terms this long fall back to typo-tolerant matching when nothing matches
+INCREMENTAL_EXTEND = 500  # Larger batches of new scenes mark the index for a rebuild instead
+SCAN_LIMIT_TERM = 2  # Terms this short may match nearly everything...
+SCAN_TOKENS = 2000  # ...so beyond this many matching tokens they are checked scene by scene instead
+COMPACT_DEAD = 0.5  # Rebuild the vocabulary text once this fraction of it is unused
+
+FIELDS = ("id", "heading", "option", "next", "media")
+_WORD = re.compile(r"\w+")
+_SEPARATOR = "\n"
+
+
+def scene_tokens(scene):
+    """Return the scene's lowercase tokens, one tuple per entry of FIELDS.
+
+    Ids, next-scene targets and media file names are kept whole (substring
+    search finds "4-b" in "scene4-b.mp4"); headings and option text are
+    split into words.
+    """
+    choices = scene.get("choices") or []
+    media = [scene.get("video")] + [choice.get("image") for choice in choices]
+    return (
+        (str(scene["scene_id"]).lower(),),
+        tuple(set(_WORD.findall(str(scene.get("heading") or "").lower()))),
+        tuple(set(_WORD.findall(" ".join(str(choice.get("option", "")) for choice in choices).lower()))),
+        tuple({str(choice["next_scene"]).lower() for choice in choices if choice.get("next_scene")}),
+        tuple({str(name).lower() for name in media if name}),
+    )
+
+
+def _one_edit(a, b):
+    """True if a and b differ by at most one insertion, deletion, substitution or swap."""
+    if abs(len(a) - len(b)) > 1:
+        return False
+    start = 0
+    while start < min(len(a), len(b)) and a[start] == b[start]:
+        start += 1
+    a, b = a[start:], b[start:]
+    if len(a) == len(b):
+        return a[1:] == b[1:] or (len(a) >= 2 and a[0] == b[1] and a[1] == b[0] and a[2:] == b[2:])
+    return a[1:] == b if len(a) > len(b) else a == b[1:]
+
+
+class _Vocabulary:
+    """Every distinct token once, in one string, for C-speed substring search.
+
+    Tokens are appended as they first appear and remembered by start offset;
+    tokens nothing uses any more stay in the text (skipped by callers) until
+    enough of them pile up to rebuild it.
+    """
+
+    def __init__(self):
+        self.uses = {}  # token -> number of (field, token) postings using it
+        self._tokens = []
+        self._starts = []
+        self._text = ""
+        self._pending = []
+        self._dead = 0
+
+    def acquire(self, token):
+        count = self.uses.get(token)
+        if count is None:
+            self._pending.append(token)
+            self.uses[token] = 1
+        else:
+            if count == 0:
+                self._dead -= 1
+            self.uses[token] = count + 1
+
+    def release(self, token):
+        self.uses[token] -= 1
+        if self.uses[token] == 0:
+            self._dead += 1
+
+    def count(self, term):
+        """Occurrences of term in the text (dead tokens included); a cheap selectivity estimate."""
+        self.flush()
+        return self._text.count(term)
+
+    def flush(self):
+        if self._dead > len(self._tokens) * COMPACT_DEAD:
+            live = [token for token in self._tokens if self.uses[token]]
+            for token in self._tokens:
+                if not self.uses[token]:
+                    del self.uses[token]
+            self._tokens, self._starts, self._text, self._dead = [], [], "", 0
+            self._pending = live + [token for token in self._pending if token in self.uses]
+        if self._pending:
+            offset = len(self._text)
+            for token in self._pending:
+                self._tokens.append(token)
+                self._starts.append(offset)
+                offset += len(token) + 1
+            self._text += _SEPARATOR.join(self._pending) + _SEPARATOR
+            self._pending = []
+
+    def containing(self, term):
+        """Return the live tokens that contain term."""
+        self.flush()
+        text, starts, tokens, uses = self._text, self._starts, self._tokens, self.uses
+        found = set()
+        position = text.find(term)
+        while position >= 0:
+            number = bisect_right(starts, position) - 1
+            token = tokens[number]
+            if uses[token]:
+                found.add(token)
+            # Continue after this token; one hit per token is enough
+            position = text.find(term, starts[number] + len(token) + 1)
+        return found
+
+    def similar(self, term):
+        """Tokens containing a stretch within one edit of term (typos, swapped letters)."""
+        half = len(term) // 2
+        found = set()
+        for token in self.containing(term[:half]) | self.containing(term[half:]):
+            for size in (len(term) - 1, len(term), len(term) + 1):
+                if any(_one_edit(term, token[start:start + size]) for start in range(len(token) - size + 1)):
+                    found.add(token)
+                    break
+        return found
+
+
+def build_index(scenes):
+    """Index scenes from scratch; returns the structures a SearchIndex works on."""
+    vocabulary = _Vocabulary()
+    postings = tuple({} for _ in FIELDS)
+    tokens_of = {}
+    for scene in scenes:
+        _add(vocabulary, postings, tokens_of, scene)
+    vocabulary.flush()  # Joining the text is part of the build, not of the first query
+    return vocabulary, postings, tokens_of
+
+
+def _add(vocabulary, postings, tokens_of, scene):
+    scene_id = scene["scene_id"]
+    tokens = scene_tokens(scene)
+    for field_postings, field_tokens in zip(postings, tokens):
+        for token in field_tokens:
+            ids = field_postings.get(token)
+            if ids is None:
+                field_postings[token] = scene_id  # Most tokens (ids, file names) belong to one scene
+                vocabulary.acquire(token)
+            elif isinstance(ids, set):
+                ids.add(scene_id)
+            else:
+                field_postings[token] = {ids, scene_id}
+    tokens_of[scene_id] = tokens
+
+
+class IndexBuilder(BackgroundJob):
+    """Build a search index over a snapshot of the scenes off the UI thread."""
+
+    name = "SearchIndexBuilder"
+
+    def __init__(self, scenes):
+        super().__init__()
+        self.scenes = scenes
+
+    def run(self):
+        return build_index(self.scenes)
+
+
+class SearchIndex:
+    """Incrementally maintained search over scene ids, headings, option text,
+    next-scene targets and media names.
+
+    Each field is an inverted index token -> scene ids; the distinct tokens of
+    all fields share one _Vocabulary for substring matching. Saving, adding
+    or removing a scene re-indexes just that scene. Bulk changes (loading a
+    project) mark the index stale; the GUI rebuilds it with begin_rebuild()
+    in the background, otherwise search() rebuilds it synchronously.
+
+    Queries are whitespace-separated terms that must all match (as substrings
+    of some token). "field:term" limits a term to one of id, heading, option,
+    next or media, e.g. "next:s12" finds the scenes whose choices lead to s12.
+    """
+
+    def __init__(self, scene_graph):
+        self.scene_graph = scene_graph
+        self._vocabulary, self._postings, self._tokens = build_index(())
+        self._stale = len(scene_graph) > 0
+        self._building = None  # IndexBuilder in flight
+        self._changed = set()  # Scenes saved or removed while it runs
+        scene_graph.add_listener(self._on_graph_change)
+
+    @property
+    def ready(self):
+        return not self._stale
+
+    def _on_graph_change(self, event, *args):
+        if event == "extend" and not self._stale and args[1] <= INCREMENTAL_EXTEND:
+            start, count = args
+            for index in range(start, start + count):
+                self._index(self.scene_graph[index]["scene_id"])
+        elif event in ("extend", "reset"):
+            self._stale = True
+            self._building = None  # A running build no longer matches the graph
+        elif event in ("insert", "update", "remove"):
+            if self._stale:
+                if self._building is not None:
+                    self._changed.add(args[1])
+            elif event == "remove":
+                self._unindex(args[1])
+            else:
+                self._index(args[1])
+        # "swap" and "move" do not change what is indexed
+
+    def _index(self, scene_id):
+        self._unindex(scene_id)
+        _add(self._vocabulary, self._postings, self._tokens, self.scene_graph.get(scene_id))
+
+    def _unindex(self, scene_id):
+        tokens = self._tokens.pop(scene_id, None)
+        if not tokens:
+            return
+        for field_postings, field_tokens in zip(self._postings, tokens):
+            for token in field_tokens:
+                ids = field_postings[token]
+                if isinstance(ids, set):
+                    ids.discard(scene_id)
+                    if len(ids) == 1:
+                        field_postings[token] = next(iter(ids))
+                else:
+                    del field_postings[token]
+                    self._vocabulary.release(token)
+
+    # Rebuilding
+    def rebuild(self):
+        self._vocabulary, self._postings, self._tokens = build_index(list(self.scene_graph))
+        self._stale = False
+        self._building = None
+
+    def begin_rebuild(self):
+        """Return a started IndexBuilder over a snapshot of the scenes."""
+        self._changed = set()
+        self._building = IndexBuilder(list(self.scene_graph)).start()
+        return self._building
+
+    def finish_rebuild(self, job, result):
+        """Install a finished build; returns False if the graph was replaced meanwhile."""
+        if job is not self._building:
+            return False
+        self._vocabulary, self._postings, self._tokens = result
+        self._stale = False
+        self._building = None
+        for scene_id in self._changed:
+            if scene_id in self.scene_graph:
+                self._index(scene_id)
+            else:
+                self._unindex(scene_id)
+        self._changed = set()
+        return True
+
+    # Queries
+    @perf.timed("search.query")
+    def search(self, query, limit=None):
+        """Return the ids of matching scenes in scene order (at most limit of them)."""
+        terms = []
+        for term in query.lower().split():
+            field, _, text = term.partition(":")
+            terms.append((FIELDS.index(field), text) if text and field in FIELDS else (None, term))
+        if not terms:
+            return []
+        if self._stale:
+            self.rebuild()
+
+        # Look up the selective terms; very common ones are checked per scene
+        selective, common = [], []
+        for field, text in terms:
+            if len(text) > SCAN_LIMIT_TERM or self._vocabulary.count(text) <= SCAN_TOKENS:
+                selective.append((field, text))
+            else:
+                common.append((field, text))
+        matches = None
+        for field, text in sorted(selective, key=lambda term: -len(term[1])):  # Most selective first
+            ids = self._match(field, text)
+            matches = ids if matches is None else matches & ids
+            if not matches:
+                return []
+        return self._in_order(matches, common, limit)
+
+    def _match(self, field, term):
+        tokens = self._vocabulary.containing(term)
+        if not tokens and len(term) >= FUZZY_MIN_TERM:
+            tokens = self._vocabulary.similar(term)
+        fields = self._postings if field is None else (self._postings[field],)
+        ids = set()
+        for postings in fields:
+            for token in tokens:
+                found = postings.get(token)
+                if found is None:
+                    continue
+                if isinstance(found, set):
+                    ids |= found
+                else:
+                    ids.add(found)
+        return ids
+
+    def _in_order(self, matches, common, limit):
+        """Scenes of matches (None for all) that also have the common terms, in scene order."""
+        graph = self.scene_graph
+        if matches is not None and (limit is None or len(matches) ** 2 < limit * len(graph)):
+            candidates = sorted(matches, key=graph.index_of)
+            if not common:
+                return candidates if limit is None else candidates[:limit]
+        else:
+            # Most scenes match: walking the order until limit beats sorting by position
+            candidates = graph.ids() if matches is None else (i for i in graph.ids() if i in matches)
+        found = []
+        tokens_of = self._tokens
+        for scene_id in candidates:
+            tokens = tokens_of[scene_id]
+            for field, text in common:
+                fields = tokens if field is None else (tokens[field],)
+                if not any(text in token for field_tokens in fields for token in field_tokens):
+                    break
+            else:
+                found.append(scene_id)
+                if limit is not None and len(found) >= limit:
+                    break
+        return found
@@ -0,0 +1,195 @@
+# PyYAML is imported where it is used, not here: importing it is a good
+# part of the editor's startup and nothing is dumped before a project is open
+from core import perf
+
+EMPTY_YAML = "No scenes available."
+
+# libyaml's emitter matches PyYAML's byte for byte except when it has to fold
+# double-quoted or very long scalars, so it is only used for "plain" scenes
+C_SAFE_MAX_LENGTH = 100
+
+
+def scene_to_yaml(scene):
+    """Return (video_path, options_entry) for one scene in the player's schema."""
+    video_path = f"videos/{scene['video']}" if scene["video"] else "videos/default.mp4"
+
+    scene_data = {
+        "scene_type": scene["scene_type"],
+        "continue_heading" if scene["scene_type"] == "Continue" else "question_heading": scene["heading"],
+        "choices": {}
+    }
+
+    # Add choices to the scene
+    for choice in scene.get("choices", []):
+        choice_data = {
+            "next": choice["next_scene"]
+        }
+        if choice["image"]:
+            choice_data["image"] = f"images/{choice['image']}"
+        if choice["temporary"]:
+            choice_data["temporary"] = True
+
+        scene_data["choices"][choice["option"]] = choice_data
+
+    return video_path, scene_data
+
+
+@perf.timed("yaml.generate")
+def generate_yaml(scenes):
+    """Convert an ordered iterable of scenes into the start/videos/options YAML."""
+    scenes = list(scenes)
+    if not scenes:
+        return EMPTY_YAML
+
+    yaml_structure = {
+        "start": scenes[0]["scene_id"],  # First scene becomes the starting scene
+        "videos": {},
+        "options": {}
+    }
+
+    # Fill in the videos and options sections
+    for scene in scenes:
+        scene_id = scene["scene_id"]
+        video_path, scene_data = scene_to_yaml(scene)
+        yaml_structure["videos"][scene_id] = video_path
+        yaml_structure["options"][scene_id] = scene_data
+
+    import yaml
+    return yaml.dump(yaml_structure, sort_keys=False, default_flow_style=False)
+
+
+def __getattr__(name):
+    # CSafeDumper (None without libyaml), resolved on first use
+    if name == "CSafeDumper":
+        import yaml
+        return getattr(yaml, "CSafeDumper", None)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _c_safe(value):
+    """True if libyaml is known to emit value exactly like PyYAML does."""
+    if isinstance(value, str):
+        return 0 < len(value) <= C_SAFE_MAX_LENGTH and value.isascii() and value.isprintable()
+    if isinstance(value, dict):
+        return all(_c_safe(key) and _c_safe(item) for key, item in value.items())
+    return isinstance(value, bool)
+
+
+def dump_entry(section, key, value):
+    """Dump one entry of a top-level section, indented as in the full document."""
+    import yaml
+    entry = {section: {key: value}}
+    perf.count("yaml.dump")
+    c_dumper = getattr(yaml, "CSafeDumper", None)
+    if c_dumper is not None and _c_safe(key) and _c_safe(value):
+        text = yaml.dump(entry, Dumper=c_dumper, sort_keys=False, default_flow_style=False)
+    else:
+        text = yaml.dump(entry, sort_keys=False, default_flow_style=False)
+    return text[len(section) + 2:]  # Drop the "<section>:\n" header line
+
+
+def dump_header(start_id):
+    """The "start:" line that opens the document."""
+    import yaml
+    return yaml.dump({"start": start_id}, sort_keys=False, default_flow_style=False)
+
+
+def render_scene(scene):
+    """Return (videos fragment, options fragment) for one scene."""
+    scene_id = scene["scene_id"]
+    video_path, scene_data = scene_to_yaml(scene)
+    return dump_entry("videos", scene_id, video_path), dump_entry("options", scene_id, scene_data)
+
+
+def render_video(scene):
+    """Return just the videos fragment of a scene."""
+    return dump_entry("videos", scene["scene_id"], scene_to_yaml(scene)[0])
+
+
+def render_options(scene):
+    """Return just the options fragment of a scene."""
+    return dump_entry("options", scene["scene_id"], scene_to_yaml(scene)[1])
+
+
+class YamlFragmentCache:
+    """Per-scene cache of rendered YAML, kept in sync with a SceneGraph.
+
+    Each scene renders to a "videos" line and an "options" block. Because the
+    document is a plain block mapping, dumping one entry at the same
+    indentation gives exactly the text the full yaml.dump would produce, so
+    the cached pieces can be joined instead of re-dumping every scene.
+    """
+
+    def __init__(self, scene_graph):
+        self.scene_graph = scene_graph
+        self._fragments = {}  # scene_id -> (scene dict, videos fragment, options fragment)
+        scene_graph.add_listener(self._on_graph_change)
+
+    def _on_graph_change(self, event, *args):
+        if event == "reset":
+            self._fragments.clear()
+        elif event in ("insert", "update", "remove"):
+            self._fragments.pop(args[1], None)
+        # "swap" and "move" only change the order; "extend" adds scenes whose
+        # fragments, if cached, were pre-rendered from those same scene dicts
+
+    def invalidate(self, scene_id=None):
+        """Forget one scene's fragments, or all of them."""
+        if scene_id is None:
+            self._fragments.clear()
+        else:
+            self._fragments.pop(scene_id, None)
+
+    def scene_fragments(self, scene):
+        """Return (videos fragment, options fragment) for this exact scene dict.
+
+        Entries remember which dict they were rendered from, so a worker
+        thread holding an older snapshot of a scene never gets (or leaves
+        behind) fragments for a different version of it.
+        """
+        cached = self._fragments.get(scene["scene_id"])
+        if cached is not None and cached[0] is scene:
+            return cached[1], cached[2]
+        video_fragment, options_fragment = render_scene(scene)
+        self._fragments[scene["scene_id"]] = (scene, video_fragment, options_fragment)
+        return video_fragment, options_fragment
+
+    def export(self, scenes):
+        """[(videos fragment, options fragment) or None] for scenes, without rendering any.
+
+        With preload() this carries the cache over to the next session.
+        """
+        fragments = []
+        for scene in scenes:
+            cached = self._fragments.get(scene["scene_id"])
+            fragments.append(cached[1:] if cached is not None and cached[0] is scene else None)
+        return fragments
+
+    def preload(self, scenes, fragments):
+        """Take fragments from export() as the rendering of these scene dicts."""
+        for scene, pair in zip(scenes, fragments):
+            if pair is not None:
+                self._fragments[scene["scene_id"]] = (scene, pair[0], pair[1])
+
+    def sections(self):
+        """Return (header, video fragments, options fragments) in document order.
+
+        header is the "start:" line; it is None when there are no scenes.
+        """
+        if not len(self.scene_graph):
+            return None, [], []
+        videos = []
+        options = []
+        with perf.span("yaml.sections"):
+            for scene in self.scene_graph:
+                video_fragment, options_fragment = self.scene_fragments(scene)
+                videos.append(video_fragment)
+                options.append(options_fragment)
+        return dump_header(self.scene_graph.start_id), videos, options
+
+    def render(self):
+        """Return the same text generate_yaml would, reusing cached fragments."""
+        header, videos, options = self.sections()
+        if header is None:
+            return EMPTY_YAML
+        return "".join([header, "videos:\n", *videos, "options:\n", *options])
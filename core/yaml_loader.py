@@ -0,0 +1,167 @@
+import io
+import os
+
+from core import perf
+from core.background import BackgroundJob
+from core.yaml_roundtrip import build_source_map
+
+BATCH_SIZE = 2000  # Scenes handed to the GUI per message
+
+
+class ProjectFormatError(ValueError):
+    """The YAML file is not a start/videos/options scene project."""
+
+
+def scene_from_yaml(scene_id, video_path, scene_data):
+    """Build an editor scene dict from one videos/options entry pair."""
+    scene_type = scene_data.get("scene_type", "Continue")
+    heading = scene_data.get("continue_heading" if scene_type == "Continue" else "question_heading", "")
+
+    # Load choices
+    choices = []
+    for option_text, choice_data in (scene_data.get("choices") or {}).items():
+        choices.append({
+            "option": option_text,
+            "next_scene": choice_data.get("next", ""),
+            "image": choice_data.get("image", "").replace("images/", ""),
+            "temporary": choice_data.get("temporary", False)
+        })
+
+    return {
+        "scene_id": scene_id,
+        "video": video_path.replace("videos/", ""),
+        "scene_type": scene_type,
+        "heading": heading,
+        "choices": choices
+    }
+
+
+def check_structure(loaded_yaml):
+    if not isinstance(loaded_yaml, dict) or any(
+        key not in loaded_yaml for key in ("start", "videos", "options")
+    ):
+        raise ProjectFormatError("The YAML file does not have the required structure.")
+
+
+def iter_scenes(loaded_yaml):
+    """Yield scene dicts, in file order, from a parsed project document."""
+    check_structure(loaded_yaml)
+    options = loaded_yaml["options"] or {}
+    for scene_id, video_path in (loaded_yaml["videos"] or {}).items():
+        yield scene_from_yaml(scene_id, video_path, options.get(scene_id) or {})
+
+
+def safe_loader():
+    """libyaml's C loader when PyYAML was built with it (many times faster), else SafeLoader.
+
+    PyYAML is imported on first use rather than at startup.
+    """
+    import yaml
+    return getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def __getattr__(name):
+    # SafeLoader and HAS_LIBYAML, resolved without importing PyYAML at startup
+    if name == "SafeLoader":
+        return safe_loader()
+    if name == "HAS_LIBYAML":
+        import yaml
+        return safe_loader() is not yaml.SafeLoader
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def parse_yaml(stream):
+    """Parse a YAML stream with the fastest available safe loader."""
+    import yaml
+    return yaml.load(stream, Loader=safe_loader())
+
+
+def load_scenes(file_path):
+    """Read a project file and return its scenes as a list."""
+    with open(file_path, "rb") as yaml_file:
+        return list(iter_scenes(parse_yaml(yaml_file)))
+
+
+class _ProgressReader:
+    """File wrapper that reports how far the parser has read, and can abort it."""
+
+    def __init__(self, raw, total, report, check_cancelled):
+        self.raw = raw
+        self.total = max(total, 1)
+        self.report = report
+        self.check_cancelled = check_cancelled
+        self._reported = 0.0
+
+    def read(self, size=-1):
+        self.check_cancelled()
+        data = self.raw.read(size)
+        fraction = self.raw.tell() / self.total
+        if fraction - self._reported >= 0.01 or not data:
+            self._reported = fraction
+            self.report(fraction)
+        return data
+
+
+class ProjectLoader(BackgroundJob):
+    """Load a project on a worker thread and stream its scenes back in batches.
+
+    Besides the BackgroundJob messages ("done" carries the scene count) it
+    posts:
+
+        ("progress", phase, fraction)  phase is "parse" or "scenes"
+        ("scenes", [scene, ...])       next batch, in file order
+
+    prepare, if given, is called on every scene in the worker before it is
+    posted (e.g. to pre-render its YAML preview fragment). With keep_source,
+    the file's bytes are kept and mapped for round-trip saving, and
+
+        ("source", SourceMap or None)  None if the layout can't be round-tripped
+
+    is posted after the last batch.
+    """
+
+    name = "ProjectLoader"
+
+    def __init__(self, file_path, batch_size=BATCH_SIZE, prepare=None, keep_source=False):
+        super().__init__()
+        self.file_path = file_path
+        self.batch_size = batch_size
+        self.prepare = prepare
+        self.keep_source = keep_source
+
+    def run(self):
+        total = os.path.getsize(self.file_path)
+        data = None
+        if self.keep_source:
+            with open(self.file_path, "rb") as source:
+                data = source.read()
+        with (io.BytesIO(data) if data is not None else open(self.file_path, "rb")) as raw:
+            reader = _ProgressReader(
+                raw, total, lambda fraction: self.post("progress", "parse", fraction), self.check_cancelled
+            )
+            with perf.span("load.parse"):
+                loaded_yaml = parse_yaml(reader)
+
+        check_structure(loaded_yaml)
+        scene_count = len(loaded_yaml["videos"] or {})
+        batch = []
+        done = 0
+        loaded = [] if data is not None else None
+        for scene in iter_scenes(loaded_yaml):
+            if self.prepare:
+                self.prepare(scene)
+            batch.append(scene)
+            if loaded is not None:
+                loaded.append(scene)
+            if len(batch) >= self.batch_size:
+                self.check_cancelled()
+                done += len(batch)
+                self.post("scenes", batch)
+                self.post("progress", "scenes", done / scene_count)
+                batch = []
+        if batch:
+            self.post("scenes", batch)
+        if data is not None:
+            with perf.span("load.source_map"):
+                self.post("source", build_source_map(self.file_path, data, loaded))
+        return scene_count
@@ -0,0 +1,359 @@
+"""Round-trip saving: patch the scenes that changed into the original file text.
+
+At load time scan_source() finds the byte span of the "start:" line and of
+every entry in the videos: and options: sections, and a SourceMap keeps
+them with the file's bytes and the scene dicts that were loaded. Scene
+dicts are never edited in place, so a scene is dirty exactly when the
+graph holds a different dict for its id.
+
+On save only dirty scenes are re-rendered (and only the section whose
+output actually changed), removed scenes' spans are cut out and new scenes
+are appended to the end of each section. Comments, quoting, blank lines and
+the order of the options section survive everywhere else, and a one-scene
+edit of a huge file costs a byte copy instead of a full YAML emit.
+
+The whole document is emitted again (write_yaml) when the patch cannot
+express the change: scenes were reordered or inserted before existing
+ones, more than CHANGE_LIMIT of them changed, or its layout is beyond
+the scanner (flow-style sections, complex keys). If another program
+changed the file since it was read, RoundTripWriter stops with
+ChangedOnDisk instead, unless told to overwrite.
+
+A clean session's source map is carried over to the next start as a
+fingerprint (path, mtime, size and a hash of the bytes); SourceMapReader
+rebuilds the map from it if the file is still the same.
+"""
+import hashlib
+import os
+import re
+
+from core.background import BackgroundJob
+from core.yaml_export import dump_header, render_options, render_video, scene_to_yaml
+from core.yaml_writer import ProjectWriter, atomic_file
+
+CHANGE_LIMIT = 0.5  # Share of scenes changed beyond which the document is emitted again
+SECTIONS = ("videos", "options")
+
+class ChangedOnDisk(Exception):
+    """The file was changed by another program since its SourceMap was taken."""
+
+
+_TOP_LEVEL = re.compile(rb"(start|videos|options)\s*:(.*)")
+_PLAIN_KEY = re.compile(rb"([A-Za-z0-9_][A-Za-z0-9_.\-/]*)\s*:(?:\s|$)")
+_QUOTED_KEY = re.compile(rb"""("(?:[^"\\]|\\.)*"|'(?:[^']|'')*')\s*:(?:\s|$)""")
+
+
+def _entry_key(text):
+    """The scene id an entry line starts with, or None if the scanner can't read it."""
+    match = _PLAIN_KEY.match(text)
+    if match:
+        return match.group(1).decode("utf-8")
+    match = _QUOTED_KEY.match(text)
+    if match:
+        import yaml
+        key = yaml.safe_load(match.group(1))
+        return key if isinstance(key, str) else None
+    return None
+
+
+def scan_source(data):
+    """Find the spans of a start/videos/options document.
+
+    Returns (start span, {"videos": {id: span}, "options": {id: span}}) with
+    spans as (start, end) byte offsets of whole lines, or None if the layout
+    is not one the scanner understands. An entry's span runs from its key
+    line to its last content line; blank and comment lines after it are not
+    part of it, so they stay when the entry is rewritten.
+    """
+    start_span = None
+    spans = {"videos": {}, "options": {}}
+    section = None  # Name of the section being read, or None outside videos/options
+    entry_indent = None
+    entry = None  # [scene_id, start, end] of the entry being read
+    offset = 0
+    for line in data.splitlines(keepends=True):
+        line_start, offset = offset, offset + len(line)
+        content = line.lstrip(b" ")
+        if not content.strip() or content.startswith(b"#"):
+            continue  # Blank or comment line
+        indent = len(line) - len(content)
+        if indent == 0:
+            _close(entry, spans, section)
+            entry = None
+            match = _TOP_LEVEL.match(content)
+            if match is None:
+                if content.startswith((b"---", b"...", b"%")):
+                    return None  # Multi-document files and directives are not round-tripped
+                section = None  # Some other top-level key; kept as it is
+                continue
+            key, rest = match.group(1).decode(), match.group(2).strip()
+            if key == "start":
+                start_span = (line_start, offset)
+                section = None
+            elif rest and not rest.startswith(b"#"):
+                return None  # e.g. "videos: {}" (flow style)
+            else:
+                section, entry_indent = key, None
+            continue
+        if section is None:
+            continue
+        if entry_indent is None:
+            entry_indent = indent
+        if indent == entry_indent:
+            _close(entry, spans, section)
+            scene_id = _entry_key(content)
+            if scene_id is None or scene_id in spans[section]:
+                return None
+            entry = [scene_id, line_start, offset]
+        elif indent > entry_indent and entry is not None:
+            entry[2] = offset
+        else:
+            return None
+    _close(entry, spans, section)
+    if start_span is None:
+        return None
+    return start_span, spans
+
+
+def _close(entry, spans, section):
+    if entry is not None:
+        spans[section][entry[0]] = (entry[1], entry[2])
+
+
+class SourceMap:
+    """A saved file's bytes, the spans of its scenes and the scene dicts they hold."""
+
+    def __init__(self, file_path, data, start_span, spans, scenes):
+        self.file_path = os.path.abspath(file_path)
+        self.data = data
+        self.start_span = start_span
+        self.spans = spans  # {"videos": {id: (start, end)}, "options": {...}}
+        self.scenes = {scene["scene_id"]: scene for scene in scenes}  # As loaded/saved
+        self.order = [scene["scene_id"] for scene in scenes]
+        self.newline = b"\r\n" if data[:data.find(b"\n") + 1].endswith(b"\r\n") else b"\n"
+        self.stat = _file_stat(file_path)
+
+    def covers(self, file_path):
+        return os.path.abspath(file_path) == self.file_path
+
+    def unchanged_on_disk(self):
+        return _file_stat(self.file_path) == self.stat
+
+    def matches(self, scenes):
+        """True if scenes (in order) are exactly the scene dicts the file holds."""
+        return len(scenes) == len(self.order) and all(
+            self.scenes.get(scene["scene_id"]) is scene for scene in scenes
+        ) and [scene["scene_id"] for scene in scenes] == self.order
+
+    def fingerprint(self):
+        """What SourceMapReader needs to tell whether the file is still this one."""
+        return {"path": self.file_path, "stat": self.stat, "digest": hashlib.sha256(self.data).hexdigest()}
+
+
+def _file_stat(file_path):
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _whole_lines(data):
+    # A final line break keeps every span a run of whole lines
+    return data if data.endswith(b"\n") else data + b"\n"
+
+
+def build_source_map(file_path, data, scenes):
+    """SourceMap for file bytes that loaded as scenes (in order), or None if they don't line up."""
+    data = _whole_lines(data)
+    scanned = scan_source(data)
+    if scanned is None:
+        return None
+    start_span, spans = scanned
+    if list(spans["videos"]) != [scene["scene_id"] for scene in scenes]:
+        return None  # e.g. duplicate keys the loader merged
+    return SourceMap(file_path, data, start_span, spans, scenes)
+
+
+def read_source_map(file_path, scenes):
+    with open(file_path, "rb") as source:
+        return build_source_map(file_path, source.read(), scenes)
+
+
+def plan_patch(source_map, scenes, fragment_cache=None):
+    """Edits turning the mapped file into scenes (a list in graph order), or None to emit it all.
+
+    Returns ([(start, end, order, section, scene_id, replacement bytes)], number of scenes changed).
+    """
+    ids = [scene["scene_id"] for scene in scenes]
+    if not ids:
+        return None
+    current = dict(zip(ids, scenes))
+    survivors = [scene_id for scene_id in source_map.order if scene_id in current]
+    if ids[:len(survivors)] != survivors:
+        return None  # Reordered, or new scenes before old ones
+    new_ids = ids[len(survivors):]
+    original = source_map.scenes
+    dirty = [scene_id for scene_id in survivors if current[scene_id] is not original[scene_id]]
+    removed = len(source_map.order) - len(survivors)
+    changed = len(dirty) + len(new_ids) + removed
+    if changed > CHANGE_LIMIT * max(len(ids), len(source_map.order)):
+        return None
+
+    if fragment_cache is not None:
+        render = lambda section, scene: fragment_cache.scene_fragments(scene)[SECTIONS.index(section)]
+    else:
+        render = lambda section, scene: render_video(scene) if section == "videos" else render_options(scene)
+    newline = source_map.newline
+
+    def encode(text):
+        data = text.encode("utf-8")
+        return data if newline == b"\n" else data.replace(b"\n", newline)
+
+    edits = []
+    start, end = source_map.start_span
+    if ids[0] != source_map.order[0]:
+        edits.append((start, end, 0, "start", None, encode(dump_header(ids[0]))))
+    for section in SECTIONS:
+        spans = source_map.spans[section]
+        position = SECTIONS.index(section)
+        for scene_id, (start, end) in spans.items():
+            if scene_id not in original:
+                continue  # An options entry with no video: the loader never saw it; keep it
+            if scene_id not in current:
+                edits.append((start, end, 0, section, scene_id, b""))
+            elif current[scene_id] is not original[scene_id] and \
+                    scene_to_yaml(current[scene_id])[position] != scene_to_yaml(original[scene_id])[position]:
+                edits.append((start, end, 0, section, scene_id, encode(render(section, current[scene_id]))))
+        # New scenes, and dirty scenes that had no entry in this section, go after its last entry
+        appended = new_ids + [scene_id for scene_id in dirty if scene_id not in spans]
+        if appended:
+            end_of_section = _section_end(source_map, section)
+            if end_of_section is None:
+                return None
+            for sequence, scene_id in enumerate(appended):
+                edits.append((end_of_section, end_of_section, 1 + sequence, section, scene_id,
+                              encode(render(section, current[scene_id]))))
+    edits.sort(key=lambda edit: (edit[0], edit[2]))
+    return edits, changed
+
+
+def _section_end(source_map, section):
+    """Offset just past the section's last entry (or its header line if it has none)."""
+    spans = source_map.spans[section]
+    if spans:
+        return max(end for _, end in spans.values())
+    match = re.search(rb"(?m)^" + section.encode() + rb"\s*:[^\n]*\n", source_map.data)
+    return match.end() if match else None
+
+
+def apply_patch(source_map, edits):
+    """Return (new file bytes, start span, section spans) with the edits applied."""
+    data = source_map.data
+    edited = {(section, scene_id) for _, _, _, section, scene_id, _ in edits}
+    # Untouched spans are copied and only shift by the size change of the edits before them
+    kept = [(start, end, section, scene_id)
+            for section in SECTIONS for scene_id, (start, end) in source_map.spans[section].items()
+            if (section, scene_id) not in edited]
+    if ("start", None) not in edited:
+        kept.append((*source_map.start_span, "start", None))
+    kept.sort()
+
+    pieces = []
+    start_span = None
+    spans = {section: {} for section in SECTIONS}
+    cursor = length = 0
+    edit_index = kept_index = 0
+    while edit_index < len(edits) or kept_index < len(kept):
+        if kept_index < len(kept) and (edit_index == len(edits) or kept[kept_index][0] < edits[edit_index][0]):
+            start, end, section, scene_id = kept[kept_index]
+            kept_index += 1
+            replacement = data[start:end]
+        else:
+            start, end, _, section, scene_id, replacement = edits[edit_index]
+            edit_index += 1
+        pieces.append(data[cursor:start])
+        length += start - cursor
+        if replacement:  # Deleted entries get no span
+            span = (length, length + len(replacement))
+            if section == "start":
+                start_span = span
+            else:
+                spans[section][scene_id] = span
+        pieces.append(replacement)
+        length += len(replacement)
+        cursor = end
+    pieces.append(data[cursor:])
+    return b"".join(pieces), start_span, spans
+
+
+def save_patched(source_map, scenes, fragment_cache=None):
+    """Patch the file in place of a full save; returns the new SourceMap, or None if it must be emitted."""
+    if not source_map.unchanged_on_disk():
+        return None
+    plan = plan_patch(source_map, scenes, fragment_cache)
+    if plan is None:
+        return None
+    data, start_span, spans = apply_patch(source_map, plan[0])
+    with atomic_file(source_map.file_path, "wb") as yaml_file:
+        yaml_file.write(data)
+    return SourceMap(source_map.file_path, data, start_span, spans, scenes)
+
+
+class RoundTripWriter(ProjectWriter):
+    """ProjectWriter that patches the file it was loaded from when it can.
+
+    After "done", self.source_map is the map for the next save and
+    self.patched tells whether the file was patched or emitted in full.
+    If the file changed on disk since the map was taken, it posts
+    ("error", ChangedOnDisk) and leaves the file alone unless overwrite.
+    """
+
+    name = "RoundTripWriter"
+
+    def __init__(self, scenes, source_map, fragment_cache=None, overwrite=False):
+        super().__init__(scenes, source_map.file_path, fragment_cache)
+        self.previous = source_map
+        self.overwrite = overwrite
+        self.source_map = None
+        self.patched = False
+
+    def run(self):
+        if not self.overwrite and not self.previous.unchanged_on_disk():
+            raise ChangedOnDisk(f"{self.file_path} was changed by another program")
+        self.source_map = save_patched(self.previous, self.scenes, self.fragment_cache)
+        if self.source_map is not None:
+            self.patched = True
+            self.post("progress", 1.0)
+            return len(self.scenes)
+        count = super().run()
+        # The emitted file becomes the base for the next save
+        self.source_map = read_source_map(self.file_path, self.scenes)
+        return count
+
+
+class SourceMapReader(BackgroundJob):
+    """Rebuild a SourceMap from a fingerprint taken in an earlier session.
+
+    "done" carries the map, or None if the file changed (same mtime and
+    size, or else the same hash, counts as unchanged) or no longer maps.
+    """
+
+    name = "SourceMapReader"
+
+    def __init__(self, fingerprint, scenes):
+        super().__init__()
+        self.fingerprint = fingerprint
+        self.file_path = fingerprint["path"]
+        self.scenes = list(scenes)  # Snapshot taken on the caller's thread
+
+    def run(self):
+        stat = _file_stat(self.file_path)
+        if stat is None:
+            return None
+        with open(self.file_path, "rb") as source:
+            data = _whole_lines(source.read())
+        if stat != tuple(self.fingerprint["stat"] or ()) and \
+                hashlib.sha256(data).hexdigest() != self.fingerprint["digest"]:
+            return None
+        return build_source_map(self.file_path, data, self.scenes)
@@ -0,0 +1,125 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+from core import perf
+from core.background import BackgroundJob
+from core.yaml_export import EMPTY_YAML, dump_header, render_options, render_video
+
+PROGRESS_EVERY = 1000  # Scenes written between progress messages
+
+# Mode for brand-new files, i.e. what open(..., "w") would have used
+_umask = os.umask(0)
+os.umask(_umask)
+NEW_FILE_MODE = 0o666 & ~_umask
+
+
+def _fsync_directory(directory):
+    """Make the rename itself durable (not possible/needed on Windows)."""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_file(file_path, mode="w", encoding=None):
+    """Open a temporary file next to file_path that replaces it on success.
+
+    The data is fsynced before the rename and the directory after it, so a
+    crash leaves either the old file or the new one. The permissions of the
+    file being replaced are kept. On error the target is left untouched.
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, temp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(file_path)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, mode, encoding=encoding) as temp_file:
+            yield temp_file
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+
+        try:
+            file_mode = os.stat(file_path).st_mode & 0o7777
+        except FileNotFoundError:
+            file_mode = NEW_FILE_MODE
+        os.chmod(temp_path, file_mode)
+
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+    _fsync_directory(directory)
+
+
+@perf.timed("save.write_yaml")
+def write_yaml(scenes, file_path, fragment_cache=None, progress=None, check_cancelled=None):
+    """Stream scenes to file_path exactly as generate_yaml would, replacing it atomically.
+
+    The document is written fragment by fragment through atomic_file, so a
+    crash leaves either the old file or the new one. With a YamlFragmentCache,
+    fragments the preview already rendered are reused.
+    """
+    scenes = list(scenes)
+    if fragment_cache is not None:
+        sections = (
+            ("videos", lambda scene: fragment_cache.scene_fragments(scene)[0]),
+            ("options", lambda scene: fragment_cache.scene_fragments(scene)[1]),
+        )
+    else:
+        sections = (("videos", render_video), ("options", render_options))
+
+    with atomic_file(file_path) as yaml_file:
+        if not scenes:
+            yaml_file.write(EMPTY_YAML)
+        else:
+            total = 2 * len(scenes)
+            done = 0
+            yaml_file.write(dump_header(scenes[0]["scene_id"]))
+            for section, render in sections:
+                yaml_file.write(f"{section}:\n")
+                for scene in scenes:
+                    yaml_file.write(render(scene))
+                    done += 1
+                    if done % PROGRESS_EVERY == 0:
+                        if check_cancelled:
+                            check_cancelled()
+                        if progress:
+                            progress(done / total)
+
+    if progress:
+        progress(1.0)
+    return len(scenes)
+
+
+class ProjectWriter(BackgroundJob):
+    """Save a snapshot of the scenes on a worker thread with write_yaml.
+
+    Besides the BackgroundJob messages ("done" carries the scene count) it
+    posts ("progress", fraction). Cancelling leaves the existing file alone.
+    """
+
+    name = "ProjectWriter"
+
+    def __init__(self, scenes, file_path, fragment_cache=None):
+        super().__init__()
+        self.scenes = list(scenes)  # Snapshot taken on the caller's thread
+        self.file_path = file_path
+        self.fragment_cache = fragment_cache
+
+    def run(self):
+        return write_yaml(
+            self.scenes,
+            self.file_path,
+            self.fragment_cache,
+            progress=lambda fraction: self.post("progress", fraction),
+            check_cancelled=self.check_cancelled,
+        )
@@ -0,0 +1,55 @@
+import tkinter as tk
+
+MAX_ROWS = 1000  # Issues listed at most; the summary line always has the full counts
+
+
+class AnalysisPanel:
+    """Summary line plus a list of story-graph issues; double-click opens the scene."""
+
+    def __init__(self, parent, open_scene):
+        self.open_scene = open_scene
+        self._row_scene_ids = []
+
+        self.frame = tk.Frame(parent)
+        tk.Label(self.frame, text="Story Check", font=("Arial", 12)).pack(anchor="w")
+        self.summary_label = tk.Label(self.frame, text="No scenes yet", anchor="w", justify=tk.LEFT)
+        self.summary_label.pack(fill=tk.X)
+
+        list_frame = tk.Frame(self.frame)
+        list_frame.pack(fill=tk.BOTH, expand=True)
+        self.issue_listbox = tk.Listbox(list_frame, height=6)
+        scrollbar = tk.Scrollbar(list_frame, orient="vertical", command=self.issue_listbox.yview)
+        self.issue_listbox.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.issue_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.issue_listbox.bind("<Double-Button-1>", self._on_open)
+
+    def show(self, report):
+        self.summary_label.config(text=report.summary())
+
+        rows = []
+        for scene_id, target in report.missing:
+            rows.append((f"Missing: {scene_id} → {target}", scene_id))
+        for scene_id in report.dead_ends:
+            rows.append((f"Dead end: question {scene_id} has no choices", scene_id))
+        orphans = set(report.orphans)
+        for scene_id in report.unreachable:
+            note = " (nothing points here)" if scene_id in orphans else ""
+            rows.append((f"Unreachable: {scene_id}{note}", scene_id))
+        for members in report.cycles:
+            preview = " → ".join(members[:4]) + (" → ..." if len(members) > 4 else "")
+            rows.append((f"Loop ({len(members)} scenes): {preview}", members[0]))
+
+        extra = len(rows) - MAX_ROWS
+        rows = rows[:MAX_ROWS]
+        self.issue_listbox.delete(0, tk.END)
+        for text, _ in rows:
+            self.issue_listbox.insert(tk.END, text)
+        if extra > 0:
+            self.issue_listbox.insert(tk.END, f"... and {extra} more")
+        self._row_scene_ids = [scene_id for _, scene_id in rows]
+
+    def _on_open(self, event):
+        selection = self.issue_listbox.curselection()
+        if selection and selection[0] < len(self._row_scene_ids):
+            self.open_scene(self._row_scene_ids[selection[0]])
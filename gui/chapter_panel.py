@@ -0,0 +1,49 @@
+import tkinter as tk
+
+
+class ChapterPanel:
+    """Chapters of the open project; click picks the chapter new scenes go to,
+    double-click loads a chapter that is not loaded yet."""
+
+    def __init__(self, parent, open_chapter, select_chapter):
+        self.open_chapter = open_chapter
+        self.select_chapter = select_chapter
+        self.project = None
+
+        self.frame = tk.Frame(parent)
+        tk.Label(self.frame, text="Chapters", font=("Arial", 12)).pack(anchor="w")
+        self.chapter_listbox = tk.Listbox(self.frame, height=5, exportselection=False)
+        self.chapter_listbox.pack(fill=tk.X)
+        self.chapter_listbox.bind("<<ListboxSelect>>", self._on_select)
+        self.chapter_listbox.bind("<Double-Button-1>", self._on_open)
+
+    def show(self, project):
+        """Redraw the chapter rows (● loaded, ○ not loaded, * unsaved changes)."""
+        self.project = project
+        self.chapter_listbox.delete(0, tk.END)
+        if project is None:
+            return
+        for index, chapter in enumerate(project.chapters):
+            if chapter.loaded:
+                text = f"● {chapter.name} ({chapter.size}){' *' if chapter.dirty else ''}"
+            else:
+                text = f"○ {chapter.name} ({len(chapter.scene_ids)}, not loaded)"
+            self.chapter_listbox.insert(tk.END, text)
+            if chapter is project.current:
+                self.chapter_listbox.selection_set(index)
+
+    def _selected(self):
+        selection = self.chapter_listbox.curselection()
+        if self.project is None or not selection:
+            return None
+        return self.project.chapters[selection[0]]
+
+    def _on_select(self, event):
+        chapter = self._selected()
+        if chapter is not None:
+            self.select_chapter(chapter)
+
+    def _on_open(self, event):
+        chapter = self._selected()
+        if chapter is not None and not chapter.loaded:
+            self.open_chapter(chapter)
@@ -0,0 +1,277 @@
+import tkinter as tk
+
+from core import perf
+from core.graph_layout import CELL_SIZE, NODE_HEIGHT, NODE_WIDTH, LayoutJob
+
+LAYOUT_DELAY_MS = 500  # Let edits settle before laying the graph out again
+REDRAW_MS = 40  # Redraw at most this often while panning
+MIN_SCALE = 0.0005
+MAX_SCALE = 3.0
+ZOOM_STEP = 1.25
+CLICK_SLOP = 4  # Pixels the pointer may move for a press to still count as a click
+
+# Level of detail, by zoom
+LABEL_SCALE = 0.45  # Scene ids from here on...
+HEADING_SCALE = 1.0  # ...and headings from here
+BOX_SCALE = 0.12  # Below this scenes are dots and choices are not drawn
+NODE_LIMIT = 2500  # More scenes in view than this are drawn as density cells
+EDGE_LIMIT = 3000  # Choices are skipped when more than this many are in view
+
+NODE_COLORS = {"start": "#b7e4b0", "incomplete": "#e4e4e4", "scene": "#cfe0ff"}
+
+
+class GraphView:
+    """Story graph on a canvas: scenes as boxes, choices as arrows.
+
+    The layout is computed by a LayoutJob in the background whenever the
+    scenes change. Only what is in view is drawn, looked up in the layout's
+    spatial grid, so pan and zoom cost O(visible items) whatever the size
+    of the story. Click a scene to open it in the editor.
+    """
+
+    def __init__(self, parent, scene_graph, open_scene, poll_job):
+        self.scene_graph = scene_graph
+        self.open_scene = open_scene
+        self.poll_job = poll_job
+        self.layout = None
+        self.selected_id = None
+        self.scale = 1.0
+        self.origin = (0.0, 0.0)  # Layout point at the canvas's top-left corner
+        self._job = None
+        self._changes = 0  # Graph changes seen
+        self._job_changes = 0  # ...when the running layout took its snapshot
+        self._layout_pending = None
+        self._redraw_pending = None
+        self._press = None  # Pointer position at the last button press
+        self._pan_from = None
+
+        self.frame = tk.Frame(parent)
+        toolbar = tk.Frame(self.frame)
+        toolbar.pack(fill=tk.X)
+        tk.Button(toolbar, text="Fit", command=self.fit).pack(side=tk.LEFT, padx=2)
+        tk.Button(toolbar, text="Start", command=lambda: self.center_on(scene_graph.start_id)).pack(
+            side=tk.LEFT, padx=2)
+        self.status_label = tk.Label(toolbar, text="", anchor="w")
+        self.status_label.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+
+        self.canvas = tk.Canvas(self.frame, bg="white", highlightthickness=0)
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+        self.canvas.bind("<ButtonPress-1>", self._on_press)
+        self.canvas.bind("<B1-Motion>", self._on_drag)
+        self.canvas.bind("<ButtonRelease-1>", self._on_release)
+        self.canvas.bind("<MouseWheel>", lambda event: self.zoom(ZOOM_STEP if event.delta > 0 else 1 / ZOOM_STEP,
+                                                                 event.x, event.y))
+        self.canvas.bind("<Button-4>", lambda event: self.zoom(ZOOM_STEP, event.x, event.y))
+        self.canvas.bind("<Button-5>", lambda event: self.zoom(1 / ZOOM_STEP, event.x, event.y))
+        self.canvas.bind("<Configure>", lambda event: self.schedule_redraw())
+
+        scene_graph.add_listener(self._on_graph_change)
+        self._start_layout()
+
+    def close(self):
+        self.scene_graph.remove_listener(self._on_graph_change)
+        for pending in (self._layout_pending, self._redraw_pending):
+            if pending is not None:
+                self.frame.after_cancel(pending)
+        if self._job is not None:
+            self._job.cancel()
+        self.frame.destroy()
+
+    # Layout
+    def _on_graph_change(self, event, *args):
+        self._changes += 1
+        if self._layout_pending is None:
+            self._layout_pending = self.frame.after(LAYOUT_DELAY_MS, self._start_layout)
+
+    def _start_layout(self):
+        self._layout_pending = None
+        if self._job is not None:
+            return  # _finish_layout starts another one if the graph changed meanwhile
+        self._job = LayoutJob(self.scene_graph).start()
+        self._job_changes = self._changes
+        self.status_label.config(text=f"Laying out {len(self.scene_graph)} scenes...")
+        self.poll_job(self._job, lambda message: None, self._finish_layout)
+
+    def _finish_layout(self, message):
+        self._job = None
+        if not self.frame.winfo_exists():
+            return
+        if message[0] == "done":
+            first = self.layout is None
+            self.layout = message[1]
+            self.status_label.config(
+                text=f"{len(self.layout)} scenes, {len(self.layout.edges)} choices "
+                     f"(layout {self.layout.seconds:.2f} s)"
+            )
+            if first:
+                self.fit()
+            else:
+                self.redraw()
+        elif message[0] == "error":
+            self.status_label.config(text=f"Layout failed: {message[1]}")
+        if self._job_changes != self._changes and self._layout_pending is None:
+            self._layout_pending = self.frame.after(LAYOUT_DELAY_MS, self._start_layout)
+
+    # View
+    def _view(self):
+        """Visible rectangle in layout units."""
+        x, y = self.origin
+        return (x, y, x + max(self.canvas.winfo_width(), 1) / self.scale,
+                y + max(self.canvas.winfo_height(), 1) / self.scale)
+
+    def fit(self):
+        """Zoom out (or in, up to 1:1) to show the whole story."""
+        if not self.layout:
+            return
+        x0, y0, x1, y1 = self.layout.bounds
+        width, height = max(self.canvas.winfo_width(), 1), max(self.canvas.winfo_height(), 1)
+        self.scale = max(MIN_SCALE, min(1.0, width / (x1 - x0), height / (y1 - y0)))
+        # Centre the story in the canvas
+        self.origin = ((x0 + x1) / 2 - width / 2 / self.scale, (y0 + y1) / 2 - height / 2 / self.scale)
+        self.redraw()
+
+    def center_on(self, scene_id, scale=None):
+        if not self.layout or scene_id not in self.layout.positions:
+            return
+        if scale is not None:
+            self.scale = scale
+        elif self.scale < LABEL_SCALE:
+            self.scale = 1.0  # Close enough to read
+        x, y = self.layout.positions[scene_id]
+        self.origin = (x - self.canvas.winfo_width() / 2 / self.scale,
+                       y - self.canvas.winfo_height() / 2 / self.scale)
+        self.redraw()
+
+    def select(self, scene_id):
+        """Highlight the scene being edited, scrolling it into view if needed."""
+        self.selected_id = scene_id
+        if self.layout and scene_id in self.layout.positions:
+            x0, y0, x1, y1 = self._view()
+            x, y = self.layout.positions[scene_id]
+            if not (x0 <= x <= x1 and y0 <= y <= y1):
+                self.center_on(scene_id)
+                return
+        self.schedule_redraw()
+
+    def zoom(self, factor, x, y):
+        """Zoom by factor around the canvas point (x, y)."""
+        scale = max(MIN_SCALE, min(MAX_SCALE, self.scale * factor))
+        factor = scale / self.scale
+        if factor == 1:
+            return
+        # Keep the layout point under the pointer where it is
+        origin_x, origin_y = self.origin
+        self.origin = (origin_x + x / self.scale - x / scale, origin_y + y / self.scale - y / scale)
+        self.scale = scale
+        self.canvas.scale("all", x, y, factor, factor)  # Immediate feedback until the redraw
+        self.schedule_redraw()
+
+    def schedule_redraw(self):
+        if self._redraw_pending is None:
+            self._redraw_pending = self.frame.after(REDRAW_MS, self.redraw)
+
+    @perf.timed("graph.redraw")
+    def redraw(self):
+        """Draw what is in view at the current level of detail."""
+        if self._redraw_pending is not None:
+            self.frame.after_cancel(self._redraw_pending)
+            self._redraw_pending = None
+        canvas = self.canvas
+        canvas.delete("all")
+        if self.layout is None:
+            return
+        view = self._view()
+        nodes = self.layout.nodes_in(*view)
+        if len(nodes) > NODE_LIMIT:
+            self._draw_density(view)
+            return
+        if self.scale >= BOX_SCALE:
+            edges = self.layout.edges_in(*view)
+            if len(edges) <= EDGE_LIMIT:
+                self._draw_edges(edges)
+        for scene_id in nodes:
+            self._draw_node(scene_id)
+
+    def _to_canvas(self, x, y):
+        return (x - self.origin[0]) * self.scale, (y - self.origin[1]) * self.scale
+
+    def _draw_edges(self, numbers):
+        positions = self.layout.positions
+        offset = NODE_HEIGHT / 2
+        for number in numbers:
+            source, target, back = self.layout.edges[number]
+            source_x, source_y = positions[source]
+            target_x, target_y = positions[target]
+            if back:  # Loops run back up; leave from the side so they stand out
+                start = self._to_canvas(source_x + NODE_WIDTH / 2, source_y)
+                end = self._to_canvas(target_x + NODE_WIDTH / 2, target_y)
+                self.canvas.create_line(*start, *end, fill="#d08060", dash=(4, 3), arrow=tk.LAST)
+            else:
+                start = self._to_canvas(source_x, source_y + offset)
+                end = self._to_canvas(target_x, target_y - offset)
+                self.canvas.create_line(*start, *end, fill="#8090a0", arrow=tk.LAST)
+
+    def _draw_node(self, scene_id):
+        scene = self.scene_graph.get(scene_id)
+        if scene is None:
+            return  # Removed since the layout was made
+        if scene_id == self.scene_graph.start_id:
+            color = NODE_COLORS["start"]
+        elif scene.get("auto_created"):
+            color = NODE_COLORS["incomplete"]
+        else:
+            color = NODE_COLORS["scene"]
+        selected = scene_id == self.selected_id
+        x, y = self._to_canvas(*self.layout.positions[scene_id])
+        if self.scale < BOX_SCALE:
+            size = 4 if selected else 2
+            self.canvas.create_rectangle(x - size, y - size, x + size, y + size, fill=color,
+                                         outline="#d04000" if selected else "")
+            return
+        half_width, half_height = NODE_WIDTH / 2 * self.scale, NODE_HEIGHT / 2 * self.scale
+        self.canvas.create_rectangle(
+            x - half_width, y - half_height, x + half_width, y + half_height, fill=color,
+            outline="#d04000" if selected else "#506070", width=2 if selected else 1,
+        )
+        if self.scale >= LABEL_SCALE:
+            text = scene_id
+            if self.scale >= HEADING_SCALE and scene.get("heading"):
+                text += "\n" + scene["heading"]
+            self.canvas.create_text(x, y, text=text, font=("Arial", 9), width=2 * half_width - 4)
+
+    def _draw_density(self, view):
+        """Zoomed far out: one shaded square per grid cell, darker the more scenes it holds."""
+        cells = self.layout.grid.density(*view)
+        busiest = max(count for _, _, count in cells)
+        size = CELL_SIZE * self.scale
+        for column, row, count in cells:
+            x, y = self._to_canvas(column * CELL_SIZE, row * CELL_SIZE)
+            shade = int(220 - 160 * count / busiest)
+            self.canvas.create_rectangle(x, y, x + size, y + size, outline="",
+                                         fill=f"#{shade:02x}{shade:02x}ff")
+
+    # Pointer
+    def _on_press(self, event):
+        self._press = self._pan_from = (event.x, event.y)
+
+    def _on_drag(self, event):
+        if self._pan_from is None:
+            return
+        dx, dy = event.x - self._pan_from[0], event.y - self._pan_from[1]
+        self._pan_from = (event.x, event.y)
+        self.canvas.move("all", dx, dy)  # Cheap; the redraw fills in what scrolled into view
+        self.origin = (self.origin[0] - dx / self.scale, self.origin[1] - dy / self.scale)
+        self.schedule_redraw()
+
+    def _on_release(self, event):
+        press, self._press, self._pan_from = self._press, None, None
+        if press is None or self.layout is None:
+            return
+        if abs(event.x - press[0]) > CLICK_SLOP or abs(event.y - press[1]) > CLICK_SLOP:
+            self.redraw()
+            return
+        scene_id = self.layout.node_at(event.x / self.scale + self.origin[0], event.y / self.scale + self.origin[1])
+        if scene_id is not None and scene_id in self.scene_graph:
+            self.selected_id = scene_id
+            self.redraw()
+            self.open_scene(scene_id)
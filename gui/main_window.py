@@ -1,8 +1,41 @@
+import os
+import queue
+import re
+import time
 import tkinter as tk
-from tkinter import filedialog, messagebox
-import yaml  # Import PyYAML to handle YAML formatting
+from tkinter import filedialog, messagebox, simpledialog
+from core import perf
 from core.folder_manager import FolderManager
+from core.file_watcher import FolderWatcher
+from core.graph_analysis import StoryAnalyzer
+from core.hot_reload import ReloadJob, merge_reload
+from core.history import History
+from core.journal import Journal
+from core.media_audit import MediaAudit
+from core.media_metadata import MetadataCache
+from core.project import PROJECT_SUFFIX, Project, read_root
+from core.publish import Publisher
+from core.scene_graph import SceneGraph
+from core.scene_ops import bulk_rename, delete_scene, merge_scenes, plan_regex_rename
+from core.scene_pack import PackWriter
+from core.search_index import SearchIndex
+from core.yaml_export import YamlFragmentCache
+from core.yaml_loader import ProjectFormatError, ProjectLoader
+from core.yaml_roundtrip import ChangedOnDisk, RoundTripWriter, SourceMapReader
+from core.yaml_writer import ProjectWriter
 from gui.scene_editor import SceneEditor
+from gui.analysis_panel import AnalysisPanel
+from gui.chapter_panel import ChapterPanel
+from gui.progress_panel import ProgressPanel
+from gui.scene_list import SceneList
+from gui.search_panel import SearchPanel
+from gui.yaml_preview import YamlPreview
+
+JOB_POLL_MS = 30  # How often the UI picks up messages from background jobs
+JOB_SLICE_SECONDS = 0.02  # Max time spent handling job messages per poll
+ANALYSIS_DELAY_MS = 250  # Let edits settle before refreshing the story check
+HEARTBEAT_MS = 100  # UI responsiveness probe
+STALL_MS = 50  # A heartbeat this late is recorded as a UI stall
 
 
 class MainWindow:
@@ -12,31 +45,107 @@ class MainWindow:
         self.root.geometry("1200x700")
 
         self.folder_manager = FolderManager()
-        self.scenes = []  # List to store scenes
+        self.media_metadata = MetadataCache()  # Durations/resolutions, cached on disk
+        self.scenes = SceneGraph()  # Ordered, indexed scene store
+        self.yaml_fragments = YamlFragmentCache(self.scenes)  # Rendered YAML per scene
+        self.loader = None  # Background ProjectLoader while a file is loading
+        self.writer = None  # Background ProjectWriter while a file is saving
+        self.source_map = None  # Spans of the loaded YAML file, so saving it patches only changed scenes
+        self.analyzer = StoryAnalyzer(self.scenes)  # Reachability, loops, dead ends
+        self.analysis_job = None
+        self.analysis_pending = None
+        self.scenes.add_listener(lambda *args: self.schedule_analysis())
+        with perf.span("startup.restore"):
+            self.journal = Journal(self.scenes)  # Autosave; restores the last session's scenes
+        self.history = History(self.scenes)  # Undo/redo over scene changes
+        self.search_index = SearchIndex(self.scenes)  # Filter-as-you-type over ids, text and media
+        self.search_job = None  # Background IndexBuilder after a bulk load
+        self.project = None  # Open multi-file Project, if any
+        self.scene_to_open = None  # Scene to show once its chapter has loaded
+        self.graph_view = None  # Story graph window, while open
+        self.perf_overlay = None  # Timings window, while open
+        self.audit_job = None  # Background MediaAudit while one runs
+        self.audit_window = None  # Media audit results, while open
+        self.publish_folder = None  # Last bundle folder; publishing into it again copies only changes
+        self.watcher = FolderWatcher().start()  # Changes other programs make to the YAML file and media folders
+        self.reload_job = None  # Background ReloadJob after the YAML file changed on disk
+        self.reload_pending = False  # It changed again while that job, a load or a save ran
+        self.profile = perf.ProfileCapture()  # cProfile started from the Performance menu
 
         self.setup_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+        self._heartbeat(time.perf_counter())
+        self.poll_job(self.watcher, self.handle_watch_message, lambda message: None)
+        if self.journal.recovered:
+            self._restore_session_cache(self.journal.cached_extra)
+            self.update_yaml_preview()
+
+    def close(self):
+        """Flush the autosave journal and quit."""
+        if self.loader:
+            self.loader.cancel()
+        self.watcher.cancel()
+        self.journal.close(self._session_cache())
+        self.media_metadata.close()
+        self.root.destroy()
+
+    def _session_cache(self):
+        """What the next start needs to skip rendering the YAML again and re-reading the file."""
+        scenes = list(self.scenes)
+        source = None
+        if self.source_map and not self.project and self.source_map.matches(scenes):
+            source = self.source_map.fingerprint()  # Saving there can keep patching it
+        return {"fragments": self.yaml_fragments.export(scenes), "source": source}
+
+    def _restore_session_cache(self, cached):
+        """Take back the rendered YAML and, if the file is unchanged, its source map."""
+        if not cached:
+            return  # Restored from the journal after a crash: everything is rendered again
+        self.yaml_fragments.preload(self.scenes, cached["fragments"])
+        if cached["source"]:
+            job = SourceMapReader(cached["source"], self.scenes).start()
+            self.poll_job(job, lambda message: None, self._finish_source_check)
+
+    def _finish_source_check(self, message):
+        # A file loaded in the meantime brings its own map
+        if message[0] == "done" and self.source_map is None and not self.loader and not self.project:
+            self.source_map = message[1]
+            self._watch_source()
 
     def scene_exists(self, scene_id):
-        """Check if a scene with the given ID already exists."""
-        return any(scene["scene_id"] == scene_id for scene in self.scenes)
+        """Check if a scene with the given ID already exists (in any chapter)."""
+        if self.project:
+            return self.project.knows(scene_id)
+        return scene_id in self.scenes
 
     def edit_selected_scene(self, event):
         selection = self.scene_listbox.curselection()  # Get the selected scene index
         if selection:
             index = selection[0]
             selected_scene = self.scenes[index]  # Fetch the scene details
+            self.open_editor(selected_scene)
 
-            # Clear the existing editor if open
-            if self.scene_editor:
-                self.scene_editor.frame.destroy()
-
-            # Open the selected scene in the editor
+    def open_editor(self, scene_data=None):
+        """Show scene_data (None for a new scene) in the editor, built once and then reused."""
+        if self.scene_editor is None:
             self.scene_editor = SceneEditor(
-                self.middle_frame,
-                self.folder_manager,
-                self.save_scene,
-                scene_data=selected_scene  # Pass existing data for editing
+                self.middle_frame, self.folder_manager, self.save_scene,
+                scene_data=scene_data, scene_graph=self.scenes, media_metadata=self.media_metadata
             )
+        else:
+            self.scene_editor.load(scene_data)
+        if self.graph_view and scene_data:
+            self.graph_view.select(scene_data["scene_id"])
+
+    def open_scene(self, scene_id):
+        """Select a scene in the list and open it in the editor."""
+        if self.project and self.project.is_unloaded(scene_id):
+            self.open_chapter(self.project.chapter_of(scene_id), scene_id)
+            return
+        index = self.scenes.index_of(scene_id)
+        if index >= 0:
+            self.scene_listbox.selection_set(index)
+            self.edit_selected_scene(None)
 
     def setup_ui(self):
         # Main layout frames
@@ -84,9 +193,16 @@ class MainWindow:
         )
         add_scene_btn.pack(pady=10)
 
-        self.scene_listbox = tk.Listbox(self.left_frame, width=40)
+        # Search over every loaded scene
+        self.search_panel = SearchPanel(self.left_frame, self.scenes, self.search_scenes, self.open_scene)
+        self.search_panel.frame.pack(fill=tk.X, pady=5)
+
+        # Chapters of an open project (hidden otherwise)
+        self.chapter_panel = ChapterPanel(self.left_frame, self.open_chapter, self.select_chapter)
+
+        self.scene_listbox = SceneList(self.left_frame, self.scenes, width=40)
         self.scene_listbox.bind("<<ListboxSelect>>", self.edit_selected_scene)
-        self.scene_listbox.pack(fill=tk.BOTH, expand=True, pady=10)
+        self.scene_listbox.frame.pack(fill=tk.BOTH, expand=True, pady=10)
 
         # Enable Drag-and-Drop for reordering
         self.scene_listbox.bind("<ButtonPress-1>", self.start_drag)
@@ -102,6 +218,11 @@ class MainWindow:
 
         self.yaml_preview = tk.Text(self.right_frame, state=tk.DISABLED, bg="#f4f4f4")
         self.yaml_preview.pack(fill=tk.BOTH, expand=True, pady=10)
+        self.preview = YamlPreview(self.yaml_preview, self.yaml_fragments)
+
+        # Story graph check (unreachable scenes, dead ends, loops, missing references)
+        self.analysis_panel = AnalysisPanel(self.right_frame, self.open_scene)
+        self.analysis_panel.frame.pack(side=tk.BOTTOM, fill=tk.X, pady=5, before=self.yaml_preview)
         
 
         # Save YAML Button
@@ -109,10 +230,21 @@ class MainWindow:
             self.left_frame, text="Save YAML", command=self.save_yaml_file
         )
         save_yaml_btn.pack(pady=5)
+
+        # Export Scene Pack Button (compiled binary for the player)
+        export_pack_btn = tk.Button(
+            self.left_frame, text="Export Scene Pack", command=self.export_scene_pack
+        )
+        export_pack_btn.pack(pady=5)
         
         # Right-click context menu
         self.context_menu = tk.Menu(self.root, tearoff=0)
         self.context_menu.add_command(label="Duplicate Scene", command=self.duplicate_scene)
+        self.context_menu.add_command(label="Rename Scene...", command=self.rename_selected_scene)
+        self.context_menu.add_command(label="Merge Into...", command=self.merge_selected_scene)
+        self.context_menu.add_command(label="Delete Scene...", command=self.delete_selected_scene)
+        self.context_menu.add_separator()
+        self.context_menu.add_command(label="Rename Matching IDs...", command=self.regex_rename_scenes)
         
         # Bind right-click event
         self.scene_listbox.bind("<Button-3>", self.show_context_menu)
@@ -124,11 +256,48 @@ class MainWindow:
         )
         load_yaml_btn.pack(pady=5)
 
+        # Multi-file project Buttons
+        project_frame = tk.Frame(self.left_frame)
+        project_frame.pack(pady=5)
+        tk.Button(project_frame, text="Open Project", command=self.open_project).pack(side=tk.LEFT, padx=2)
+        tk.Button(project_frame, text="Save Project", command=self.save_project).pack(side=tk.LEFT, padx=2)
+        tk.Button(project_frame, text="New Chapter", command=self.new_chapter).pack(side=tk.LEFT, padx=2)
+
+        # Undo / Redo Buttons
+        history_frame = tk.Frame(self.left_frame)
+        history_frame.pack(pady=5)
+        tk.Button(history_frame, text="Undo", command=self.undo).pack(side=tk.LEFT, padx=2)
+        tk.Button(history_frame, text="Redo", command=self.redo).pack(side=tk.LEFT, padx=2)
+        tk.Button(history_frame, text="Story Graph", command=self.show_graph_view).pack(side=tk.LEFT, padx=2)
+        self.root.bind("<Control-z>", lambda event: self.undo())
+        self.root.bind("<Control-y>", lambda event: self.redo())
+        self.root.bind("<Control-Z>", lambda event: self.redo())  # Ctrl+Shift+Z
+
+        # Progress for background load/save jobs (hidden when idle)
+        self.progress = ProgressPanel(self.left_frame)
+
+        menubar = tk.Menu(self.root)
+        media_menu = tk.Menu(menubar, tearoff=0)
+        media_menu.add_command(label="Audit Media Folders...", command=self.audit_media)
+        media_menu.add_command(label="Publish Bundle...", command=self.publish_bundle)
+        menubar.add_cascade(label="Media", menu=media_menu)
+
+        # Performance menu: timings overlay, trace export and cProfile captures
+        self.perf_menu = tk.Menu(menubar, tearoff=0)
+        self.perf_menu.add_command(label="Show Timings", accelerator="F12", command=self.toggle_perf_overlay)
+        self.perf_menu.add_command(label="Start Profile Capture", command=self.toggle_profile)
+        self.perf_menu.add_command(label="Export Chrome Trace...", command=self.export_trace)
+        self.perf_menu.add_command(label="Reset Timings", command=perf.RECORDER.reset)
+        menubar.add_cascade(label="Performance", menu=self.perf_menu)
+        self.root.config(menu=menubar)
+        self.root.bind("<F12>", lambda event: self.toggle_perf_overlay())
+
     # Drag-and-Drop Event Handlers
     def start_drag(self, event):
         """Start dragging a scene with highlight."""
         self.dragging_index = self.scene_listbox.nearest(event.y)
         self.scene_listbox.itemconfig(self.dragging_index, bg="lightblue")
+        self.history.begin("Reorder scenes")  # The whole drag is one undo step
     
     def drag_motion(self, event):
         """Handle the dragging motion and auto-scroll."""
@@ -141,17 +310,14 @@ class MainWindow:
             self.scene_listbox.yview_scroll(1, "units")
     
         if new_index != self.dragging_index:
-            # Swap scenes in the list
-            self.scenes[self.dragging_index], self.scenes[new_index] = (
-                self.scenes[new_index],
-                self.scenes[self.dragging_index]
-            )
-            self.update_scene_list()
+            # Swap scenes in the list; the scene list redraws just those two rows
+            self.scenes.swap(self.dragging_index, new_index)
             self.dragging_index = new_index
     
     def end_drag(self, event):
         """End dragging, remove highlight, and update YAML preview."""
         self.scene_listbox.itemconfig(self.dragging_index, bg="white")
+        self.history.end()
         self.update_yaml_preview()
     
 
@@ -161,6 +327,14 @@ class MainWindow:
             valid = self.folder_manager.validate_folder_structure(folder_path)
             if valid:
                 self.folder_label.config(text=f"Selected Folder: {folder_path}")
+                for subfolder in ("videos", "images"):
+                    self.watcher.watch(subfolder, os.path.join(folder_path, subfolder))
+                # Warm the metadata cache so the editor can show it right away
+                for subfolder in ("videos", "images"):
+                    self.media_metadata.prefetch(
+                        os.path.join(folder_path, subfolder, name)
+                        for name in self.folder_manager.media.files(subfolder)
+                    )
             else:
                 messagebox.showerror("Invalid Folder", "The selected folder must contain 'videos/' and 'images/' subfolders.")
 
@@ -169,22 +343,29 @@ class MainWindow:
             messagebox.showerror("No Source Folder", "Please select a valid source folder first.")
             return
 
-        # Clear any existing editor
-        if self.scene_editor:
-            self.scene_editor.frame.destroy()
-
-        # Display a new editor inside the middle frame
-        self.scene_editor = SceneEditor(self.middle_frame, self.folder_manager, self.save_scene)
+        self.open_editor()  # Empty form for a new scene
 
     def save_scene(self, updated_scene):
-        # Replace the scene if it already exists
-        for i, scene in enumerate(self.scenes):
-            if scene["scene_id"] == updated_scene["scene_id"]:
-                self.scenes[i] = updated_scene  # Update the existing scene
-                break
-        else:
-            # If it doesn't exist yet, add it as a new scene
-            self.scenes.append(updated_scene)
+        chapter = None
+        if self.project:
+            scene_id = updated_scene["scene_id"]
+            chapter = self.project.chapter_of(scene_id)
+            if self.project.is_unloaded(scene_id):
+                messagebox.showerror(
+                    "Chapter Not Loaded",
+                    f"Scene '{scene_id}' belongs to chapter '{chapter.name}'. Open that chapter first."
+                )
+                return False  # Keep the editor open
+            # An edited scene's placeholders join its chapter; a new scene joins the one picked in the panel
+            chapter = chapter or self.project.current
+
+        with self.history.group("Save scene"):
+            self._put_scene(updated_scene, chapter)
+        self.update_yaml_preview()
+
+    def _put_scene(self, updated_scene, chapter=None):
+        # Replace the scene if it already exists, otherwise add it (to the end of chapter's block in a project)
+        self._add_scene(updated_scene, chapter)
 
         # Automatically create new scenes for referenced next_scene_id
         for choice in updated_scene.get("choices", []):
@@ -198,74 +379,201 @@ class MainWindow:
                     "choices": [],
                     "auto_created": True
                 }
-                self.scenes.append(auto_created_scene)
+                self._add_scene(auto_created_scene, chapter)
 
-        self.update_scene_list()
-        self.update_yaml_preview()
+    def _add_scene(self, scene, chapter=None, index=None):
+        """Put scene; a new one goes at index, or the end of chapter's block (or of the graph)."""
+        if scene["scene_id"] in self.scenes:
+            self.scenes.put(scene)
+        elif self.project and chapter:
+            self.project.insert_scene(scene, chapter, index)
+        else:
+            self.scenes.insert(len(self.scenes) if index is None else index, scene)
+
+    def show_graph_view(self):
+        """Open the story graph in its own window (or raise it if already open)."""
+        if self.graph_view:
+            self.graph_view.frame.winfo_toplevel().lift()
+            return
+        window = tk.Toplevel(self.root)
+        window.title("Story Graph")
+        window.geometry("900x700")
+        from gui.graph_view import GraphView  # Loaded on first use, not at startup
+        self.graph_view = GraphView(window, self.scenes, self.open_scene, self.poll_job)
+        self.graph_view.frame.pack(fill=tk.BOTH, expand=True)
+        window.protocol("WM_DELETE_WINDOW", self.close_graph_view)
+
+    def close_graph_view(self):
+        window = self.graph_view.frame.winfo_toplevel()
+        self.graph_view.close()
+        self.graph_view = None
+        window.destroy()
+
+    # Performance
+    def _heartbeat(self, expected):
+        """Record how late the Tk loop runs a timer: a stall in redraws or event handling."""
+        now = time.perf_counter()
+        late = now - expected
+        if late * 1e3 >= STALL_MS:
+            perf.record("ui.stall", late, expected)
+        self.root.after(HEARTBEAT_MS, self._heartbeat, now + HEARTBEAT_MS / 1e3)
+
+    def toggle_perf_overlay(self):
+        if self.perf_overlay:
+            self.perf_overlay.close()
+        else:
+            from gui.perf_overlay import PerfOverlay
+            self.perf_overlay = PerfOverlay(self.root, on_close=self._perf_overlay_closed)
+
+    def _perf_overlay_closed(self):
+        self.perf_overlay = None
+
+    def toggle_profile(self):
+        """Start a cProfile capture of the UI thread, or stop it and show the hottest calls."""
+        if not self.profile.running:
+            self.profile.start()
+            self.perf_menu.entryconfig(1, label="Stop Profile Capture")
+            return
+        self.perf_menu.entryconfig(1, label="Start Profile Capture")
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".prof", filetypes=[("cProfile stats", "*.prof")],
+            title="Save Profile (Cancel to just view it)"
+        )
+        summary = self.profile.stop(file_path or None)
+        window = tk.Toplevel(self.root)
+        window.title("Profile Capture")
+        text = tk.Text(window, font=("Courier", 9), wrap=tk.NONE)
+        text.insert(tk.END, summary)
+        text.config(state=tk.DISABLED)
+        text.pack(fill=tk.BOTH, expand=True)
+
+    def export_trace(self):
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".json", filetypes=[("Chrome trace", "*.json")], title="Export Chrome Trace"
+        )
+        if not file_path:
+            return
+        try:
+            count = perf.RECORDER.export_chrome_trace(file_path)
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to write trace:\n{e}")
+            return
+        messagebox.showinfo("Trace Exported", f"{count} spans written to {file_path}.\n"
+                                              "Open it in chrome://tracing or ui.perfetto.dev.")
+
+    # Media audit
+    def audit_media(self):
+        """Find unused, missing and duplicate files in the source folder's videos/ and images/."""
+        if self.loader or self.writer or self.audit_job:
+            messagebox.showinfo("Busy", "Please wait for the current load, save or audit to finish.")
+            return
+        if not self.folder_manager.source_folder:
+            messagebox.showerror("No Source Folder", "Please select a valid source folder first.")
+            return
+        if self.project and not self.project.fully_loaded:
+            messagebox.showinfo(
+                "Chapters Not Loaded", "Open every chapter first; media used only by unloaded chapters "
+                                       "would be reported as unused."
+            )
+            return
+        self.audit_job = MediaAudit(self.scenes, self.folder_manager.source_folder).start()
+        self.progress.show("Auditing media files...", self.audit_job.cancel)
+        self.poll_job(self.audit_job, self.handle_audit_message, self.finish_audit)
+
+    def handle_audit_message(self, message):
+        # A load or save started meanwhile takes over the progress panel
+        if message[0] == "progress" and not (self.loader or self.writer):
+            self.progress.update(message[1])
+
+    def finish_audit(self, message):
+        source_folder = self.audit_job.source_folder
+        self.audit_job = None
+        if not (self.loader or self.writer):
+            self.progress.hide()
+        if message[0] == "done":
+            if self.audit_window:
+                self.audit_window.close()
+            from gui.media_audit_window import MediaAuditWindow
+            self.audit_window = MediaAuditWindow(self.root, message[1], source_folder, self.open_scene,
+                                                 on_close=self._audit_window_closed)
+        elif message[0] == "error":
+            messagebox.showerror("Error", f"Media audit failed:\n{message[1]}")
+
+    def _audit_window_closed(self):
+        self.audit_window = None
+
+    # Publishing
+    def publish_bundle(self):
+        """Write the story and exactly the media it uses into a folder the player can ship."""
+        if self.loader or self.writer:
+            messagebox.showinfo("Busy", "Please wait for the current load or save to finish.")
+            return
+        if not self.folder_manager.source_folder:
+            messagebox.showerror("No Source Folder", "Please select a valid source folder first.")
+            return
+        if self.project and not self.project.fully_loaded:
+            messagebox.showinfo("Chapters Not Loaded", "Open every chapter first; the bundle holds the whole story.")
+            return
+        if not self.validate_scene_references():
+            return
+
+        bundle_dir = filedialog.askdirectory(title="Publish Into Folder", initialdir=self.publish_folder)
+        if not bundle_dir:
+            return
+        archive = messagebox.askyesno("Publish Bundle", "Also write a .zip of the bundle?")
+        self.publish_folder = bundle_dir
+        yaml_name = "story.yaml"
+        if self.source_map:
+            yaml_name = os.path.basename(self.source_map.file_path)
+        self.writer = Publisher(self.scenes, self.folder_manager.source_folder, bundle_dir, self.yaml_fragments,
+                                yaml_name=yaml_name, archive=archive).start()
+        self.progress.show(f"Publishing to {os.path.basename(bundle_dir)}...", self.writer.cancel)
+        self.poll_job(self.writer, self.handle_writer_message, self.finish_publish)
+
+    def finish_publish(self, message):
+        bundle_dir = self.writer.bundle_dir
+        self.writer = None
+        self.progress.hide()
+        self._catch_up_reload()
+        if message[0] == "done":
+            result = message[1]
+            if result.missing:
+                shown = "\n".join(result.missing[:20])
+                more = f"\n... and {len(result.missing) - 20} more" if len(result.missing) > 20 else ""
+                messagebox.showwarning("Missing Media", f"Published to {bundle_dir}, but these files were not "
+                                                        f"found in the source folder:\n{shown}{more}")
+            else:
+                messagebox.showinfo("Published", f"Published to {bundle_dir}\n{result.summary()}")
+        elif message[0] == "error":
+            messagebox.showerror("Error", f"Failed to publish:\n{message[1]}")
+
+    def undo(self):
+        if self.history.undo() is not None:
+            self.update_yaml_preview()
+
+    def redo(self):
+        if self.history.redo() is not None:
+            self.update_yaml_preview()
 
     def update_scene_list(self):
-        self.scene_listbox.delete(0, tk.END)  # Clear the list
-        for scene in self.scenes:
-            display_text = f"{scene['scene_id']} - {scene['scene_type']}"
-            if scene.get("auto_created"):
-                display_text += " [Incomplete]"
-            self.scene_listbox.insert(tk.END, display_text)
+        """Redraw the visible scene rows (changes are otherwise applied as they happen)."""
+        self.scene_listbox.refresh()
 
     def update_yaml_preview(self):
-        yaml_data = self.generate_yaml()
-        self.yaml_preview.config(state=tk.NORMAL)  # Enable editing for update
-        self.yaml_preview.delete(1.0, tk.END)  # Clear the text
-        self.yaml_preview.insert(tk.END, yaml_data)  # Insert new YAML
-        self.yaml_preview.config(state=tk.DISABLED)  # Make read-only again
+        """Schedule a preview refresh; only scenes that changed are re-rendered."""
+        self.preview.schedule()
+        if self.project:
+            self.chapter_panel.show(self.project)  # Scene counts and unsaved markers
 
     def generate_yaml(self):
         """Convert scenes list into YAML format."""
-        if not self.scenes:
-            return "No scenes available."
-
-        yaml_structure = {
-            "start": self.scenes[0]["scene_id"],  # First scene becomes the starting scene
-            "videos": {},
-            "options": {}
-        }
-
-        # Fill in the videos and options sections
-        for scene in self.scenes:
-            scene_id = scene["scene_id"]
-            video_path = f"videos/{scene['video']}" if scene["video"] else "videos/default.mp4"
-            yaml_structure["videos"][scene_id] = video_path
-
-            scene_data = {
-                "scene_type": scene["scene_type"],
-                "continue_heading" if scene["scene_type"] == "Continue" else "question_heading": scene["heading"],
-                "choices": {}
-            }
-
-            # Add choices to the scene
-            for choice in scene.get("choices", []):
-                choice_data = {
-                    "next": choice["next_scene"]
-                }
-                if choice["image"]:
-                    choice_data["image"] = f"images/{choice['image']}"
-                if choice["temporary"]:
-                    choice_data["temporary"] = True
-
-                scene_data["choices"][choice["option"]] = choice_data
-
-            yaml_structure["options"][scene_id] = scene_data
-
-        return yaml.dump(yaml_structure, sort_keys=False, default_flow_style=False)
+        return self.yaml_fragments.render()
         
     def validate_scene_references(self):
         """Highlight choices with non-existent next scene references."""
-        valid_scene_ids = {scene["scene_id"] for scene in self.scenes}
-        invalid_references = []
-    
-        for scene in self.scenes:
-            for choice in scene.get("choices", []):
-                if choice["next_scene"] not in valid_scene_ids:
-                    invalid_references.append((scene["scene_id"], choice["next_scene"]))
+        invalid_references = [
+            pair for pair in self.scenes.missing_references() if not self.scene_exists(pair[1])
+        ]
     
         if invalid_references:
             message = "Invalid scene references found:\n"
@@ -277,6 +585,10 @@ class MainWindow:
     
 
     def save_yaml_file(self):
+        if self.loader or self.writer:
+            messagebox.showinfo("Busy", "Please wait for the current load or save to finish.")
+            return
+
         # Validate scene references first
         if not self.validate_scene_references():
             return  # Abort saving if validation fails
@@ -289,16 +601,93 @@ class MainWindow:
         )
     
         if file_path:
-            yaml_data = self.generate_yaml()
-            try:
-                with open(file_path, "w") as yaml_file:
-                    yaml_file.write(yaml_data)
-                messagebox.showinfo("Success", f"YAML saved successfully to {file_path}")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to save YAML file:\n{e}")
-    
+            # Write a snapshot on a worker thread; the file is replaced atomically when done.
+            # A project is exported as one flat file with every chapter merged in order.
+            if self.project:
+                self.writer = self.project.export_job(file_path, self.yaml_fragments)
+            elif self.source_map and self.source_map.covers(file_path):
+                self.writer = RoundTripWriter(self.scenes, self.source_map, self.yaml_fragments).start()
+            else:
+                self.writer = ProjectWriter(self.scenes, file_path, self.yaml_fragments).start()
+            self._show_save()
+
+    def _show_save(self):
+        self.progress.show(f"Saving {os.path.basename(self.writer.file_path)}...", self.writer.cancel)
+        self.poll_job(self.writer, self.handle_writer_message, self.finish_save)
+
+    def handle_writer_message(self, message):
+        if message[0] == "progress":
+            self.progress.update(message[1])
+
+    def finish_save(self, message):
+        job = self.writer
+        file_path = job.file_path
+        self.writer = None
+        self.progress.hide()
+        if message[0] == "done":
+            detail = ""
+            if isinstance(job, RoundTripWriter):
+                self.source_map = job.source_map
+                self._watch_source()  # Our own save is not an outside change
+                if job.patched:
+                    detail = "\nOnly the scenes that changed were rewritten."
+            self._catch_up_reload()
+            messagebox.showinfo("Success", f"YAML saved successfully to {file_path}{detail}")
+        elif message[0] == "error" and isinstance(message[1], ChangedOnDisk):
+            self.reload_pending = False  # Asked about below instead
+            answer = messagebox.askyesnocancel(
+                "File Changed on Disk",
+                f"{os.path.basename(file_path)} was changed by another program since it was loaded.\n\n"
+                "Yes: merge those changes into the scenes here first (then save again).\n"
+                "No: overwrite them with the scenes here.\n"
+                "Cancel: don't save."
+            )
+            if answer:
+                self.reload_source()
+            elif answer is False and self.source_map is job.previous:
+                self.writer = RoundTripWriter(
+                    self.scenes, self.source_map, self.yaml_fragments, overwrite=True
+                ).start()
+                self._show_save()
+        else:
+            self._catch_up_reload()
+            if message[0] == "error":
+                messagebox.showerror("Error", f"Failed to save YAML file:\n{message[1]}")
+
+    def export_scene_pack(self):
+        if self.loader or self.writer:
+            messagebox.showinfo("Busy", "Please wait for the current load or save to finish.")
+            return
+
+        if not self.validate_scene_references():
+            return
+
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".scpk",
+            filetypes=[("Scene packs", "*.scpk")],
+            title="Export Scene Pack"
+        )
+
+        if file_path:
+            self.writer = PackWriter(self.scenes, file_path).start()
+            self.progress.show(f"Exporting {os.path.basename(file_path)}...")
+            self.poll_job(self.writer, lambda message: None, self.finish_export)
+
+    def finish_export(self, message):
+        file_path = self.writer.file_path
+        self.writer = None
+        self.progress.hide()
+        self._catch_up_reload()
+        if message[0] == "done":
+            messagebox.showinfo("Success", f"Scene pack exported to {file_path}")
+        elif message[0] == "error":
+            messagebox.showerror("Error", f"Failed to export scene pack:\n{message[1]}")
 
     def load_yaml_file(self):
+        if self.loader or self.writer:
+            messagebox.showinfo("Busy", "Please wait for the current load or save to finish.")
+            return
+
         # Ask the user to select a YAML file
         file_path = filedialog.askopenfilename(
             filetypes=[("YAML files", "*.yaml")],
@@ -306,58 +695,328 @@ class MainWindow:
         )
 
         if file_path:
+            self.close_project()
+
+            # The whole load is one undo step; a cancelled or failed load is rolled back
+            self.history.begin("Load project")
+            self.scenes.clear()
+            self.source_map = None
+            self._watch_source()
+
+            # Parse on a worker thread; scenes stream back in batches, then the file's scene spans
+            self.loader = ProjectLoader(
+                file_path, prepare=self.yaml_fragments.scene_fragments, keep_source=True
+            ).start()
+            self.progress.show(f"Loading {os.path.basename(file_path)}...", self.loader.cancel)
+            self.poll_job(self.loader, self.handle_loader_message, self.finish_load)
+
+    def handle_loader_message(self, message):
+        kind = message[0]
+        if kind == "progress":
+            phase, fraction = message[1], message[2]
+            text = "Parsing YAML..." if phase == "parse" else f"Loading scenes... {len(self.scenes)}"
+            self.progress.update(fraction, text)
+        elif kind == "scenes":
+            try:
+                with perf.span("load.extend"):
+                    self.scenes.extend(message[1])
+            except ValueError as e:
+                # A scene with the same ID was created while loading
+                self.loader.cancel()
+                return ("error", e)
+        elif kind == "source":
+            self.source_map = message[1]
+
+    def finish_load(self, message):
+        file_path = self.loader.file_path
+        self.loader = None
+        self.progress.hide()
+        kind = message[0]
+
+        if kind == "done":
+            self.history.end()
+        else:
+            self.history.abort()  # Put the previous project back
+            self.source_map = None
+        self._watch_source()
+        self.update_yaml_preview()
+
+        if kind == "done":
+            messagebox.showinfo("Success", f"YAML loaded successfully from {file_path}")
+        elif kind == "error":
+            error = message[1]
+            if isinstance(error, ProjectFormatError):
+                messagebox.showerror("Invalid YAML", str(error))
+            else:
+                messagebox.showerror("Error", f"Failed to load YAML file:\n{error}")
+
+    # Changes made by other programs
+    def handle_watch_message(self, message):
+        key = message[1]
+        if key == "project":
+            self.reload_source()
+        else:
+            # New, removed or replaced clips and images: rescan that folder and refill the dropdowns
+            self.folder_manager.media.refresh(key)
+            if self.scene_editor is not None:
+                self.scene_editor.refresh_dropdown(key)
+
+    def _watch_source(self):
+        """Watch the YAML file the source map covers, from its current state on."""
+        if self.source_map and not self.project:
+            self.watcher.watch("project", self.source_map.file_path)
+        else:
+            self.watcher.unwatch("project")
+
+    def reload_source(self):
+        """Merge the loaded YAML file into the scenes after another program changed it."""
+        if self.reload_job:
+            self.reload_pending = True
+            return
+        if self.writer:
+            self.reload_pending = True  # Merged once the save is done, against the map it leaves
+            return
+        if self.loader or not self.source_map or self.source_map.unchanged_on_disk():
+            return  # A load replaces everything anyway; an unchanged file was our own save
+        self.reload_job = ReloadJob(self.source_map).start()
+        self.poll_job(self.reload_job, lambda message: None, self.finish_reload)
+
+    def finish_reload(self, message):
+        job = self.reload_job
+        self.reload_job = None
+        if message[0] == "done" and self.writer:
+            self.reload_pending = True  # A save started meanwhile; merge once it is done
+        elif message[0] == "done" and self.source_map is job.base and not self.loader:
+            scenes, source_map = message[1]
+            with self.history.group("Reload from disk"):
+                result = merge_reload(self.scenes, job.base, scenes)
+            self.source_map = source_map
+            if source_map is None:
+                self.watcher.unwatch("project")  # Nothing to merge against next time
+            if result.changed:
+                self._after_id_change()
+            if result.conflicts:
+                shown = ", ".join(result.conflicts[:10]) + (" ..." if len(result.conflicts) > 10 else "")
+                messagebox.showwarning(
+                    "Reloaded With Conflicts",
+                    f"{os.path.basename(job.file_path)} changed on disk ({result.summary()}).\n"
+                    f"These scenes were also edited here and kept as they are: {shown}"
+                )
+        elif message[0] == "error":
+            messagebox.showwarning(
+                "Reload Failed",
+                f"{os.path.basename(job.file_path)} changed on disk but could not be read:\n{message[1]}\n"
+                "The scenes here were left as they are."
+            )
+        if self.reload_pending:
+            self.reload_pending = False
+            self.reload_source()
+
+    def _catch_up_reload(self):
+        """After a save or export: merge outside changes that arrived while it ran, or right after it wrote."""
+        self.reload_pending = False
+        self.reload_source()  # Nothing to do if the file is as the source map has it
+
+    # Multi-file projects
+    def open_project(self):
+        if self.loader or self.writer:
+            messagebox.showinfo("Busy", "Please wait for the current load or save to finish.")
+            return
+        if self.project and self.project.dirty and not messagebox.askyesno(
+            "Unsaved Chapters", "Some chapters have unsaved changes. Open another project anyway?"
+        ):
+            return
+
+        file_path = filedialog.askopenfilename(
+            filetypes=[("Scene projects", "*" + PROJECT_SUFFIX)],
+            title="Open Project"
+        )
+        if not file_path:
+            return
+        try:
+            chapters = read_root(file_path)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to open project:\n{e}")
+            return
+
+        self.close_project()
+        self.scenes.clear()
+        self.history.clear()
+        self.source_map = None
+        self._watch_source()
+        self.project = Project(self.scenes, file_path, chapters)
+        self.chapter_panel.frame.pack(fill=tk.X, pady=5, before=self.scene_listbox.frame)
+        self.chapter_panel.show(self.project)
+        self.update_yaml_preview()
+        if chapters:
+            self.open_chapter(chapters[0])  # The story starts in the first chapter
+
+    def close_project(self):
+        if self.project:
+            self.project.close()
+            self.project = None
+            self.chapter_panel.show(None)
+            self.chapter_panel.frame.pack_forget()
+
+    def open_chapter(self, chapter, scene_id=None):
+        """Load a chapter's scenes in the background, then optionally open scene_id."""
+        if self.loader or self.writer:
+            messagebox.showinfo("Busy", "Please wait for the current load or save to finish.")
+            return
+        self.scene_to_open = scene_id
+        self.loader = self.project.begin_load(chapter, prepare=self.yaml_fragments.scene_fragments)
+        self.progress.show(f"Loading chapter {chapter.name}...", self.loader.cancel)
+        self.poll_job(self.loader, self.handle_chapter_message, self.finish_chapter_load)
+
+    def handle_chapter_message(self, message):
+        if message[0] == "progress":
+            self.progress.update(message[2])
+        elif message[0] == "scenes":
+            try:
+                self.project.add_loaded(message[1])
+            except ValueError as e:
+                # The chapter has a scene ID that already exists elsewhere
+                self.loader.cancel()
+                return ("error", e)
+
+    def finish_chapter_load(self, message):
+        self.loader = None
+        self.progress.hide()
+        self.project.finish_load(message[0] == "done")
+        # Undo steps hold scene positions, which the chapter's scenes just shifted
+        self.history.clear()
+        self.update_yaml_preview()
+
+        scene_id, self.scene_to_open = self.scene_to_open, None
+        if message[0] == "done" and scene_id:
+            self.open_scene(scene_id)
+        elif message[0] == "error":
+            messagebox.showerror("Error", f"Failed to load chapter:\n{message[1]}")
+
+    def select_chapter(self, chapter):
+        """Make chapter the one new scenes are added to (only loaded chapters qualify)."""
+        if chapter.loaded:
+            self.project.current = chapter
+        self.chapter_panel.show(self.project)
+
+    def new_chapter(self):
+        if not self.project:
+            messagebox.showinfo("No Project", "Use Save Project first to turn the current scenes into a project.")
+            return
+        name = simpledialog.askstring("New Chapter", "Chapter name:", parent=self.root)
+        if name and name.strip():
+            self.project.add_chapter(name.strip())
+            self.chapter_panel.show(self.project)
+
+    def save_project(self):
+        """Write the chapters that changed (and the root file); asks for a root file the first time."""
+        if self.loader or self.writer:
+            messagebox.showinfo("Busy", "Please wait for the current load or save to finish.")
+            return
+
+        if not self.project:
+            file_path = filedialog.asksaveasfilename(
+                defaultextension=PROJECT_SUFFIX,
+                filetypes=[("Scene projects", "*" + PROJECT_SUFFIX)],
+                title="Save Project"
+            )
+            if not file_path:
+                return
+            if not file_path.endswith(PROJECT_SUFFIX):
+                file_path = os.path.splitext(file_path)[0] + PROJECT_SUFFIX
+            self.project = Project.create(self.scenes, file_path)
+            self.chapter_panel.frame.pack(fill=tk.X, pady=5, before=self.scene_listbox.frame)
+            self.chapter_panel.show(self.project)
+
+        self.writer = self.project.save_job()
+        if self.writer is None:
+            messagebox.showinfo("Save Project", "No chapter has unsaved changes.")
+            return
+        self.progress.show(f"Saving {os.path.basename(self.project.root_path)}...")
+        self.poll_job(self.writer, lambda message: None, self.finish_project_save)
+
+    def finish_project_save(self, message):
+        job = self.writer
+        self.writer = None
+        self.progress.hide()
+        if message[0] == "done":
+            self.project.finish_save(job)
+            self.chapter_panel.show(self.project)
+            messagebox.showinfo("Success", f"Saved {message[1]} changed chapter(s).")
+        elif message[0] == "error":
+            messagebox.showerror("Error", f"Failed to save project:\n{message[1]}")
+
+    def schedule_analysis(self):
+        """Refresh the story check shortly after the scenes stop changing."""
+        if self.analysis_pending is None:
+            self.analysis_pending = self.root.after(ANALYSIS_DELAY_MS, self.update_analysis)
+
+    def update_analysis(self):
+        self.analysis_pending = None
+        if self.analyzer.needs_full and self.analysis_job is None:
+            # Structural change the incremental update can't settle: full pass off the UI thread
+            self.analysis_job = self.analyzer.begin_full()
+            self.poll_job(self.analysis_job, lambda message: None, self.finish_analysis)
+        report = self.analyzer.report()
+        if self.project:
+            # Targets in chapters that are not loaded yet are not missing
+            report.missing = [pair for pair in report.missing if not self.project.knows(pair[1])]
+        self.analysis_panel.show(report)
+
+    def finish_analysis(self, message):
+        job = self.analysis_job
+        self.analysis_job = None
+        if message[0] == "done":
+            # Ignored if the scenes changed while it ran; the next update starts another pass
+            self.analyzer.finish_full(job, message[1])
+            self.schedule_analysis()
+
+    def search_scenes(self, query, limit):
+        """Matching scene ids for the search panel; None while the index is rebuilt."""
+        if self.search_index.ready:
+            return self.search_index.search(query, limit)
+        if self.search_job is None:
+            self.search_job = self.search_index.begin_rebuild()
+            self.poll_job(self.search_job, lambda message: None, self.finish_search_index)
+        return None
+
+    def finish_search_index(self, message):
+        job, self.search_job = self.search_job, None
+        if message[0] == "done":
+            self.search_index.finish_rebuild(job, message[1])
+            self.search_panel.refresh()  # Shows results, or starts over if the scenes were replaced meanwhile
+        else:
+            self.search_panel.count_label.config(text="Search failed")
+
+    def poll_job(self, job, handle_message, finish):
+        """Drain a BackgroundJob's messages from the Tk loop, a short slice at a time.
+
+        handle_message gets every intermediate message and may return a final
+        message to stop early; finish gets the final ("done"/"cancelled"/"error") one.
+        """
+        deadline = time.perf_counter() + JOB_SLICE_SECONDS
+        while time.perf_counter() < deadline:
             try:
-                with open(file_path, "r") as yaml_file:
-                    loaded_yaml = yaml.safe_load(yaml_file)
-
-                # Validate the structure
-                if "start" not in loaded_yaml or "videos" not in loaded_yaml or "options" not in loaded_yaml:
-                    messagebox.showerror("Invalid YAML", "The YAML file does not have the required structure.")
-                    return
-
-                # Clear the current scenes
-                self.scenes.clear()
-
-                # Load scenes from YAML
-                for scene_id, video_path in loaded_yaml["videos"].items():
-                    scene_data = loaded_yaml["options"].get(scene_id, {})
-                    scene_type = scene_data.get("scene_type", "Continue")
-                    heading = scene_data.get("continue_heading" if scene_type == "Continue" else "question_heading", "")
-
-                    # Load choices
-                    choices = []
-                    for option_text, choice_data in scene_data.get("choices", {}).items():
-                        choices.append({
-                            "option": option_text,
-                            "next_scene": choice_data.get("next", ""),
-                            "image": choice_data.get("image", "").replace("images/", ""),
-                            "temporary": choice_data.get("temporary", False)
-                        })
-
-                    # Add scene to the list
-                    scene = {
-                        "scene_id": scene_id,
-                        "video": video_path.replace("videos/", ""),
-                        "scene_type": scene_type,
-                        "heading": heading,
-                        "choices": choices
-                    }
-                    self.scenes.append(scene)
-
-                # Update the GUI
-                self.update_scene_list()
-                self.update_yaml_preview()
-                messagebox.showinfo("Success", f"YAML loaded successfully from {file_path}")
-
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to load YAML file:\n{e}")
+                message = job.messages.get_nowait()
+            except queue.Empty:
+                break
+
+            if message[0] in ("done", "cancelled", "error"):
+                finish(message)
+                return
+            final = handle_message(message)
+            if final:
+                finish(final)
+                return
+
+        self.root.after(JOB_POLL_MS, self.poll_job, job, handle_message, finish)
 
 
     def show_context_menu(self, event):
         """Show right-click context menu on scene list."""
         selection = self.scene_listbox.nearest(event.y)
         if selection >= 0:
-            self.scene_listbox.selection_clear(0, tk.END)
+            self.scene_listbox.selection_clear()
             self.scene_listbox.selection_set(selection)
             self.context_menu.post(event.x_root, event.y_root)
     
@@ -366,18 +1025,124 @@ class MainWindow:
         selection = self.scene_listbox.curselection()
         if selection:
             index = selection[0]
-            original_scene = self.scenes[index].copy()
-    
+            original_scene = self.scenes[index]
+
+            # New dicts for the copy and its choices, so the two scenes never share state
+            duplicate = dict(original_scene)
+            duplicate["choices"] = [dict(choice) for choice in original_scene.get("choices", [])]
+
             # Generate a new unique scene ID
-            base_id = original_scene["scene_id"]
-            new_id = f"{base_id}_copy"
-            count = 1
-            while self.scene_exists(new_id):
-                count += 1
-                new_id = f"{base_id}_copy{count}"
-    
-            original_scene["scene_id"] = new_id
-            self.scenes.insert(index + 1, original_scene)
-            self.update_scene_list()
+            duplicate["scene_id"] = self.scenes.unique_id(original_scene["scene_id"])
+            chapter = self.project.chapter_of(original_scene["scene_id"]) if self.project else None
+            with self.history.group("Duplicate scene"):
+                self._add_scene(duplicate, chapter, index + 1)  # Right after the original, in its chapter
             self.update_yaml_preview()
-    
\ No newline at end of file
+    
+
+    # Scene id operations (references are found through the graph's reverse index)
+    def _selected_scene_id(self):
+        selection = self.scene_listbox.curselection()
+        return self.scenes[selection[0]]["scene_id"] if selection else None
+
+    def _can_change_ids(self):
+        # Choices in chapters that are not loaded could not be updated
+        if self.project and not self.project.fully_loaded:
+            messagebox.showerror("Chapters Not Loaded", "Open every chapter before renaming, merging or deleting scenes.")
+            return False
+        return True
+
+    def _apply_renames(self, renames, label):
+        chapters = {old_id: self.project.chapter_of(old_id) for old_id, _ in renames} if self.project else {}
+        try:
+            with self.history.group(label):
+                updated = bulk_rename(self.scenes, renames, self.scene_exists)
+                for old_id, new_id in renames:
+                    if old_id in chapters:
+                        self.project.reassign(new_id, chapters[old_id])
+        except (KeyError, ValueError) as e:
+            messagebox.showerror("Rename Failed", str(e))
+            return None
+        self._after_id_change(dict(renames))
+        return updated
+
+    def _after_id_change(self, renamed=None, removed=None):
+        """Refresh the editor and the preview after scene ids changed."""
+        editor = self.scene_editor
+        if editor is not None and editor.visible and editor.scene_data:
+            scene_id = editor.scene_data["scene_id"]
+            scene_id = (renamed or {}).get(scene_id, scene_id)
+            if scene_id == removed or scene_id not in self.scenes:
+                editor.close()
+            elif self.scenes.get(scene_id) is not editor.scene_data:
+                self.open_editor(self.scenes.get(scene_id))  # Renamed, or one of its choices was
+        self.update_yaml_preview()
+
+    def rename_selected_scene(self):
+        scene_id = self._selected_scene_id()
+        if scene_id is None or not self._can_change_ids():
+            return
+        new_id = simpledialog.askstring(
+            "Rename Scene",
+            f"New ID for '{scene_id}' ({self.scenes.reference_count(scene_id)} choice(s) lead here):",
+            initialvalue=scene_id, parent=self.root,
+        )
+        if new_id is None or new_id.strip() == scene_id:
+            return
+        self._apply_renames([(scene_id, new_id.strip())], "Rename scene")
+
+    def regex_rename_scenes(self):
+        """Rename every scene whose id matches a regular expression."""
+        if not self._can_change_ids():
+            return
+        pattern = simpledialog.askstring("Rename Matching IDs", "Regular expression:", parent=self.root)
+        if not pattern:
+            return
+        replacement = simpledialog.askstring(
+            "Rename Matching IDs", "Replace with (\\1, \\g<name> refer to groups):", parent=self.root
+        )
+        if replacement is None:
+            return
+        try:
+            renames = plan_regex_rename(self.scenes, pattern, replacement)
+        except (re.error, IndexError) as e:  # Bad pattern, or a group the pattern does not have
+            messagebox.showerror("Rename Failed", f"Invalid expression: {e}")
+            return
+        if not renames:
+            messagebox.showinfo("Rename Matching IDs", "No scene ID matches.")
+            return
+        sample = "\n".join(f"{old_id} -> {new_id}" for old_id, new_id in renames[:10])
+        if len(renames) > 10:
+            sample += f"\n... and {len(renames) - 10} more"
+        if not messagebox.askyesno("Rename Matching IDs", f"Rename {len(renames)} scene(s)?\n\n{sample}"):
+            return
+        self._apply_renames(renames, "Rename scenes")
+
+    def merge_selected_scene(self):
+        """Send every choice leading to the selected scene to another one, then remove it."""
+        scene_id = self._selected_scene_id()
+        if scene_id is None or not self._can_change_ids():
+            return
+        target_id = simpledialog.askstring("Merge Into", f"Merge '{scene_id}' into scene:", parent=self.root)
+        if not target_id or target_id.strip() == scene_id:
+            return
+        target_id = target_id.strip()
+        if target_id not in self.scenes:
+            messagebox.showerror("Merge Failed", f"Scene '{target_id}' does not exist.")
+            return
+        with self.history.group("Merge scenes"):
+            merge_scenes(self.scenes, scene_id, target_id)
+        self._after_id_change(removed=scene_id)
+
+    def delete_selected_scene(self):
+        scene_id = self._selected_scene_id()
+        if scene_id is None or not self._can_change_ids():
+            return
+        references = self.scenes.reference_count(scene_id)
+        question = f"Delete scene '{scene_id}'?"
+        if references:
+            question += f"\n\nThe {references} choice(s) leading to it will be removed as well."
+        if not messagebox.askyesno("Delete Scene", question):
+            return
+        with self.history.group("Delete scene"):
+            delete_scene(self.scenes, scene_id)
+        self._after_id_change(removed=scene_id)
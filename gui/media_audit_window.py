@@ -0,0 +1,59 @@
+import os
+import tkinter as tk
+
+MAX_ROWS = 2000  # Rows listed per audit; the summary line always has the full counts
+
+
+class MediaAuditWindow:
+    """Results of a media audit in their own window; double-click a missing file to open its scene."""
+
+    def __init__(self, root, report, source_folder, open_scene, on_close=None):
+        self.open_scene = open_scene
+        self.on_close = on_close
+        self.window = tk.Toplevel(root)
+        self.window.title("Media Audit")
+        self.window.geometry("700x500")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        tk.Label(self.window, text=report.summary(), anchor="w", justify=tk.LEFT).pack(fill=tk.X, padx=5, pady=5)
+        list_frame = tk.Frame(self.window)
+        list_frame.pack(fill=tk.BOTH, expand=True)
+        self.listbox = tk.Listbox(list_frame, font=("Courier", 9))
+        scrollbar = tk.Scrollbar(list_frame, orient="vertical", command=self.listbox.yview)
+        self.listbox.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.listbox.bind("<Double-Button-1>", self._on_open)
+
+        rows = []  # (text, scene id to open or None)
+        for subfolder, missing in report.missing.items():
+            for name, users in sorted(missing.items()):
+                scene_ids = [user if isinstance(user, str) else user[0] for user in users]
+                more = f" (+{len(scene_ids) - 3})" if len(scene_ids) > 3 else ""
+                rows.append((f"Missing {subfolder}/{name}: used by {', '.join(scene_ids[:3])}{more}", scene_ids[0]))
+        for group in report.duplicates:
+            size = report.sizes[group[0]]
+            rows.append((f"Identical ({size / (1 << 20):.1f} MB each):", None))
+            rows.extend((f"    {os.path.relpath(path, source_folder)}", None) for path in group)
+        for subfolder, names in report.unused.items():
+            rows.extend((f"Unused {subfolder}/{name}", None) for name in names)
+
+        extra = len(rows) - MAX_ROWS
+        rows = rows[:MAX_ROWS]
+        for text, _ in rows:
+            self.listbox.insert(tk.END, text)
+        if extra > 0:
+            self.listbox.insert(tk.END, f"... and {extra} more")
+        if not rows:
+            self.listbox.insert(tk.END, "Every media file is used, present and unique.")
+        self._row_scene_ids = [scene_id for _, scene_id in rows]
+
+    def close(self):
+        self.window.destroy()
+        if self.on_close:
+            self.on_close()
+
+    def _on_open(self, event):
+        selection = self.listbox.curselection()
+        if selection and selection[0] < len(self._row_scene_ids) and self._row_scene_ids[selection[0]]:
+            self.open_scene(self._row_scene_ids[selection[0]])
@@ -0,0 +1,44 @@
+import tkinter as tk
+
+from core import perf
+
+REFRESH_MS = 500
+
+
+class PerfOverlay:
+    """Small always-on-top window with p50/p99 per timed operation and the counters."""
+
+    def __init__(self, root, recorder=perf.RECORDER, on_close=None):
+        self.recorder = recorder
+        self.on_close = on_close
+        self.window = tk.Toplevel(root)
+        self.window.title("Performance")
+        self.window.geometry("520x320")
+        self.window.attributes("-topmost", True)
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.text = tk.Text(self.window, font=("Courier", 9), bg="#202020", fg="#e0e0e0", state=tk.DISABLED)
+        self.text.pack(fill=tk.BOTH, expand=True)
+        self._pending = None
+        self.refresh()
+
+    def close(self):
+        if self._pending is not None:
+            self.window.after_cancel(self._pending)
+        self.window.destroy()
+        if self.on_close:
+            self.on_close()
+
+    def refresh(self):
+        lines = [f"{'operation':<24}{'calls':>7}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}{'total s':>9}"]
+        for name, (calls, total, p50, p99, slowest) in sorted(self.recorder.stats().items()):
+            lines.append(f"{name[:23]:<24}{calls:>7}{p50 * 1e3:>9.2f}{p99 * 1e3:>9.2f}"
+                         f"{slowest * 1e3:>9.1f}{total:>9.2f}")
+        counters = self.recorder.counters()
+        if counters:
+            lines.append("")
+            lines.extend(f"{name[:23]:<24}{value:>7}" for name, value in sorted(counters.items()))
+        self.text.config(state=tk.NORMAL)
+        self.text.delete(1.0, tk.END)
+        self.text.insert(tk.END, "\n".join(lines))
+        self.text.config(state=tk.DISABLED)
+        self._pending = self.window.after(REFRESH_MS, self.refresh)
@@ -0,0 +1,47 @@
+import tkinter as tk
+from tkinter import ttk
+
+
+class ProgressPanel:
+    """Status line, progress bar and Cancel button for a background job."""
+
+    def __init__(self, parent):
+        self.frame = tk.Frame(parent)
+        self.status_label = tk.Label(self.frame, anchor="w", justify=tk.LEFT)
+        self.status_label.pack(fill=tk.X)
+        self.progress_bar = ttk.Progressbar(self.frame, mode="determinate", maximum=100)
+        self.progress_bar.pack(fill=tk.X, pady=2)
+        self.cancel_btn = tk.Button(self.frame, text="Cancel", command=self._cancel)
+        self.cancel_btn.pack(pady=2)
+        self.on_cancel = None
+        self.visible = False
+
+    def show(self, text, on_cancel=None, **pack_options):
+        """Show the panel; the Cancel button is only offered when on_cancel is given."""
+        self.status_label.config(text=text)
+        self.progress_bar["value"] = 0
+        self.on_cancel = on_cancel
+        if on_cancel:
+            self.cancel_btn.config(state=tk.NORMAL)
+            self.cancel_btn.pack(pady=2)
+        else:
+            self.cancel_btn.pack_forget()
+        if not self.visible:
+            self.frame.pack(fill=tk.X, pady=5, **pack_options)
+            self.visible = True
+
+    def _cancel(self):
+        self.cancel_btn.config(state=tk.DISABLED)
+        self.status_label.config(text="Cancelling...")
+        if self.on_cancel:
+            self.on_cancel()
+
+    def update(self, fraction, text=None):
+        self.progress_bar["value"] = max(0.0, min(fraction, 1.0)) * 100
+        if text is not None:
+            self.status_label.config(text=text)
+
+    def hide(self):
+        if self.visible:
+            self.frame.pack_forget()
+            self.visible = False
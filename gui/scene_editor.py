@@ -1,22 +1,129 @@
+import os
+import time
 import tkinter as tk
+from collections import deque
 from tkinter import ttk, messagebox
-import os
+from core import perf
+from core.media_metadata import describe
+
+MEDIA_INFO_RETRY_MS = 150  # Poll interval while metadata is being extracted
+MEDIA_INFO_RETRIES = 40
+ROW_SPACING = 5  # Pixels between choice rows
+SWITCH_SAMPLES = 100  # Recent scene-switch timings kept for switch_stats()
+
+
+def blank_choice():
+    return {"option": "", "next_scene": "", "image": "", "temporary": False}
+
+
+def editable_choice(choice):
+    """Copy of a scene's choice with text fields as strings, like an Entry would hold them.
+
+    YAML may load an option key or next value as a number or boolean
+    (`Yes:`, `next: 5`), and rows that never scroll into view never pass
+    through a StringVar.
+    """
+    return {
+        "option": _text(choice.get("option")),
+        "next_scene": _text(choice.get("next_scene")),
+        "image": _text(choice.get("image")),
+        "temporary": bool(choice.get("temporary")),
+    }
+
+
+def _text(value):
+    return "" if value is None else str(value)
+
+
+class ChoiceRow:
+    """The widgets for one choice. Rows are pooled: scrolling or switching
+    scenes rebinds a row to another choice dict instead of building a new one."""
+
+    def __init__(self, editor, parent):
+        self.choice = None  # Choice dict shown; edits are written straight into it
+        self.item = None  # Canvas window holding the frame
+
+        self.frame = tk.Frame(parent, bd=1, relief=tk.SOLID, padx=5, pady=5)
+
+        # Full-width Option Text Entry
+        tk.Label(self.frame, text="Option:", font=("Arial", 10)).pack(anchor="w")
+        self.option_var = tk.StringVar()
+        self.option_entry = tk.Entry(self.frame, textvariable=self.option_var)
+        self.option_entry.pack(fill=tk.X, padx=5, pady=5)
+
+        # Sub-frame for Next Scene ID, Image Dropdown, and Temporary Flag (side-by-side)
+        details_frame = tk.Frame(self.frame)
+        details_frame.pack(fill=tk.X, padx=5, pady=5)
+
+        # Next Scene ID
+        tk.Label(details_frame, text="Next ID:", font=("Arial", 10)).pack(side=tk.LEFT, padx=(0, 5))
+        self.next_scene_var = tk.StringVar()
+        tk.Entry(details_frame, textvariable=self.next_scene_var, width=10).pack(side=tk.LEFT, padx=(0, 10))
+
+        # Image Dropdown
+        tk.Label(details_frame, text="Image:", font=("Arial", 10)).pack(side=tk.LEFT, padx=(0, 5))
+        self.image_var = tk.StringVar()
+        self.image_dropdown = ttk.Combobox(
+            details_frame, textvariable=self.image_var, values=editor.image_files, width=20
+        )
+        self.image_dropdown.pack(side=tk.LEFT, padx=(0, 10))
+
+        # Temporary Flag Checkbox
+        self.temporary_var = tk.BooleanVar()
+        tk.Checkbutton(details_frame, text="Temporary", variable=self.temporary_var).pack(side=tk.LEFT)
+
+        # Resolution / size of the selected image
+        image_info_label = tk.Label(self.frame, font=("Arial", 9), fg="gray")
+        image_info_label.pack(anchor="w", padx=5)
+        editor._track_media_info(self.image_var, image_info_label, "images")
+
+        for key, variable in (("option", self.option_var), ("next_scene", self.next_scene_var),
+                              ("image", self.image_var), ("temporary", self.temporary_var)):
+            variable.trace_add("write", lambda *args, key=key, variable=variable: self._store(key, variable))
+
+    def show(self, choice):
+        self.choice = None  # Don't write the previous choice's values into this one
+        self.option_var.set(choice["option"])
+        self.next_scene_var.set(choice["next_scene"])
+        self.image_var.set(choice["image"])
+        self.temporary_var.set(choice["temporary"])
+        self.choice = choice
+
+    def _store(self, key, variable):
+        if self.choice is not None:
+            self.choice[key] = variable.get()
 
 
 class SceneEditor:
-    def __init__(self, parent, folder_manager, save_callback, scene_data=None):
+    """Form for one scene. It is built once and rebound with load(); choice
+    rows are virtualized, so only the rows scrolled into view exist as widgets.
+    """
+
+    def __init__(self, parent, folder_manager, save_callback, scene_data=None, scene_graph=None,
+                 media_metadata=None):
         self.folder_manager = folder_manager
         self.save_callback = save_callback
+        self.scene_graph = scene_graph  # Shared SceneGraph, used to look up existing IDs
+        self.media_metadata = media_metadata  # Shared MetadataCache for duration/size hints
         self.new_scene = None
-        self.scene_data = scene_data  # Existing scene data for editing
+        self.scene_data = None  # Existing scene data for editing (None for a new scene)
+        self.visible = False
+
+        self.choices = []  # Choice dicts of the scene being edited
+        self.image_files = self._get_files("images")
+        self._rows = {}  # Choice index -> ChoiceRow on screen
+        self._spare_rows = []  # Built rows not showing anything
+        self._row_step = None  # Row height plus spacing, measured on the first row
+        self._layout_pending = None
+        self._scroll_size = None
+        self.switch_times = deque(maxlen=SWITCH_SAMPLES)  # Seconds from load() until laid out
 
         self.frame = tk.Frame(parent)
-        self.frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         self.frame.grid_rowconfigure(0, weight=1)
         self.frame.grid_columnconfigure(0, weight=1)
-        
 
         self.setup_ui()
+        self.load(scene_data)
 
     def setup_ui(self):
         # Save Button at the Top
@@ -28,11 +135,6 @@ class SceneEditor:
         self.scene_id_entry = tk.Entry(self.frame)
         self.scene_id_entry.pack(pady=5)
 
-        # Pre-fill scene ID if editing
-        if self.scene_data:
-            self.scene_id_entry.insert(0, self.scene_data["scene_id"])
-            self.scene_id_entry.config(state='disabled')  # Prevent changing ID
-
         # Video Selection Dropdown with Dynamic Refresh
         tk.Label(self.frame, text="Select Video:").pack(pady=5)
         self.video_var = tk.StringVar()
@@ -41,11 +143,11 @@ class SceneEditor:
         
         # Refresh videos dynamically on click
         self.video_dropdown.bind("<Button-1>", lambda event: self.refresh_dropdown("videos"))
-        
 
-        # Pre-fill video if editing
-        if self.scene_data and self.scene_data["video"]:
-            self.video_var.set(self.scene_data["video"])
+        # Duration / resolution / size of the selected video
+        self.video_info_label = tk.Label(self.frame, font=("Arial", 9), fg="gray")
+        self.video_info_label.pack()
+        self._track_media_info(self.video_var, self.video_info_label, "videos")
 
         # Scene Type
         tk.Label(self.frame, text="Scene Type:").pack(pady=5)
@@ -57,140 +159,206 @@ class SceneEditor:
         )
         self.scene_type_dropdown.pack(pady=5)
 
-        if self.scene_data:
-            self.scene_type_var.set(self.scene_data["scene_type"])
-
         # Scene Heading
         self.heading_label = tk.Label(self.frame, text="Scene Heading:")
         self.heading_label.pack(pady=5)
         self.heading_entry = tk.Entry(self.frame)
         self.heading_entry.pack(pady=5)
 
-        if self.scene_data:
-            self.heading_entry.insert(0, self.scene_data["heading"])
-
-        # Choices Section (Scrollable Frame)
+        # Choices Section (Scrollable Canvas holding only the rows in view)
         choices_container = tk.Frame(self.frame)
         choices_container.pack(fill=tk.BOTH, expand=True, pady=10)
-        choices_container.grid_rowconfigure(0, weight=1)
-        choices_container.grid_columnconfigure(0, weight=1)
-        
-
-        # Add a canvas for scrolling
-        canvas = tk.Canvas(choices_container)
-        scrollbar = tk.Scrollbar(choices_container, orient="vertical", command=canvas.yview)
-        scrollable_frame = tk.Frame(canvas)
 
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(
-                scrollregion=canvas.bbox("all")
-            )
+        self.choices_canvas = tk.Canvas(choices_container, highlightthickness=0)
+        self.choices_scrollbar = tk.Scrollbar(
+            choices_container, orient="vertical", command=self.choices_canvas.yview
         )
-
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-
-        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-
-        self.choices_frame = scrollable_frame
-        self.choices = []
-
-        # Pre-fill existing choices if editing
-        if self.scene_data and "choices" in self.scene_data:
-            for existing_choice in self.scene_data["choices"]:
-                self.add_choice(existing_choice)
-        else:
-            self.add_choice()  # Add one empty choice if new
+        self.choices_canvas.configure(yscrollcommand=self._on_choices_scroll)
+        self.choices_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.choices_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.choices_canvas.bind("<Configure>", self._on_choices_resize)
 
         # Add Choice Button
         add_choice_btn = tk.Button(self.frame, text="Add Choice", command=self.add_choice)
         add_choice_btn.pack(pady=10)
         
         # Refresh Media Files Button
-        refresh_media_btn = tk.Button(self.frame, text="Refresh Media Files", command=lambda: self.refresh_dropdown("videos"))
+        refresh_media_btn = tk.Button(self.frame, text="Refresh Media Files", command=self.refresh_media)
         refresh_media_btn.pack(pady=10)
-        
-        
-    def add_choice(self, existing_choice=None):
-        # Create the main frame for each choice
-        choice_frame = tk.Frame(self.choices_frame, bd=1, relief=tk.SOLID, padx=5, pady=5)
-        choice_frame.pack(fill=tk.X, pady=5)
-    
-        # Full-width Option Text Entry
-        tk.Label(choice_frame, text="Option:", font=("Arial", 10)).pack(anchor="w")
-        option_entry = tk.Entry(choice_frame)
-        option_entry.pack(fill=tk.X, padx=5, pady=5)
-    
-        # Sub-frame for Next Scene ID, Image Dropdown, and Temporary Flag (side-by-side)
-        details_frame = tk.Frame(choice_frame)
-        details_frame.pack(fill=tk.X, padx=5, pady=5)
-    
-        # Next Scene ID
-        tk.Label(details_frame, text="Next ID:", font=("Arial", 10)).pack(side=tk.LEFT, padx=(0, 5))
-        next_scene_entry = tk.Entry(details_frame, width=10)
-        next_scene_entry.pack(side=tk.LEFT, padx=(0, 10))
-    
-        # Image Dropdown
-        tk.Label(details_frame, text="Image:", font=("Arial", 10)).pack(side=tk.LEFT, padx=(0, 5))
-        image_var = tk.StringVar()
+
+    def load(self, scene_data=None):
+        """Show scene_data (None for a new scene), reusing the existing widgets."""
+        started = time.perf_counter()
+        self.scene_data = scene_data
+        self.new_scene = None
+
+        self.scene_id_entry.config(state="normal")
+        self.scene_id_entry.delete(0, tk.END)
+        self.heading_entry.delete(0, tk.END)
+        if scene_data:
+            self.scene_id_entry.insert(0, scene_data["scene_id"])
+            self.scene_id_entry.config(state="disabled")  # Prevent changing ID
+            self.video_var.set(scene_data["video"] or "")
+            self.scene_type_var.set(scene_data["scene_type"])
+            self.heading_entry.insert(0, scene_data["heading"] or "")
+        else:
+            self.video_var.set("")
+            self.scene_type_var.set("")
+
+        # Copies, so edits never touch the scene dicts shared with the SceneGraph
+        if scene_data and "choices" in scene_data:
+            self.choices = [editable_choice(choice) for choice in scene_data["choices"]]
+        else:
+            self.choices = [blank_choice()]  # One empty choice for a new scene
+
         image_files = self._get_files("images")
-        image_dropdown = ttk.Combobox(details_frame, textvariable=image_var, values=image_files, width=20)
-        image_dropdown.pack(side=tk.LEFT, padx=(0, 10))
-    
-        # Temporary Flag Checkbox
-        temp_flag = tk.BooleanVar()
-        temp_checkbox = tk.Checkbutton(details_frame, text="Temporary", variable=temp_flag)
-        temp_checkbox.pack(side=tk.LEFT)
-    
-        # Pre-fill existing data if editing
-        if existing_choice:
-            option_entry.insert(0, existing_choice["option"])
-            next_scene_entry.insert(0, existing_choice["next_scene"])
-            if existing_choice.get("image"):
-                image_var.set(existing_choice["image"])
-            if existing_choice.get("temporary"):
-                temp_flag.set(existing_choice["temporary"])
-    
-        # Store the choice data
-        choice_data = {
-            "option_entry": option_entry,
-            "next_scene_entry": next_scene_entry,
-            "image_var": image_var,
-            "temporary_flag": temp_flag
-        }
-    
-        self.choices.append(choice_data)
-    
-    
-    
+        if image_files != self.image_files:
+            self.refresh_dropdown("images", image_files)
+        self.choices_canvas.yview_moveto(0)
+        self._layout_choices(rebind=True)
+        if not self.visible:
+            self.frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+            self.visible = True
+        # Idle callbacks run after the geometry pass the changes above queued
+        self.frame.after_idle(self._record_switch, started)
+
+    def close(self):
+        """Hide the editor; it stays built for the next load()."""
+        self.frame.pack_forget()
+        self.visible = False
+
+    def _record_switch(self, started):
+        seconds = time.perf_counter() - started
+        self.switch_times.append(seconds)
+        perf.record("editor.switch", seconds, started)
+
+    def switch_stats(self):
+        """(last, median, slowest) scene-switch time in ms over recent loads, or None."""
+        if not self.switch_times:
+            return None
+        ordered = sorted(self.switch_times)
+        return (self.switch_times[-1] * 1e3, ordered[len(ordered) // 2] * 1e3, ordered[-1] * 1e3)
+
+    # Choice rows
+    def add_choice(self, existing_choice=None):
+        choice = editable_choice(existing_choice) if existing_choice else blank_choice()
+        self.choices.append(choice)
+        self._layout_choices()
+        self.choices_canvas.yview_moveto(1.0)  # Bring the new row into view
+
+    def _new_row(self):
+        row = ChoiceRow(self, self.choices_canvas)
+        row.item = self.choices_canvas.create_window(
+            0, 0, window=row.frame, anchor="nw", width=self.choices_canvas.winfo_width()
+        )
+        if self._row_step is None:
+            row.frame.update_idletasks()
+            self._row_step = row.frame.winfo_reqheight() + ROW_SPACING
+        return row
+
+    def _layout_choices(self, rebind=False):
+        """Place rows for the choices in view; rows that scrolled out are reused."""
+        self._layout_pending = None
+        canvas = self.choices_canvas
+        if not canvas.winfo_exists():
+            return  # Destroyed before an idle re-layout ran
+        if self._row_step is None:
+            if not self.choices:
+                return
+            self._spare_rows.append(self._new_row())
+            canvas.itemconfigure(self._spare_rows[-1].item, state="hidden")
+        step = self._row_step
+        scroll_size = (canvas.winfo_width(), len(self.choices) * step)
+        if scroll_size != self._scroll_size:  # Reconfiguring triggers another scroll callback
+            self._scroll_size = scroll_size
+            canvas.configure(scrollregion=(0, 0) + scroll_size)
+
+        top = canvas.canvasy(0)
+        first = max(0, int(top // step))
+        last = min(len(self.choices), int((top + max(canvas.winfo_height(), 1)) // step) + 1)
+        for index in list(self._rows):
+            if not first <= index < last:
+                row = self._rows.pop(index)
+                row.choice = None
+                canvas.itemconfigure(row.item, state="hidden")
+                self._spare_rows.append(row)
+        for index in range(first, last):
+            row = self._rows.get(index)
+            if row is None:
+                row = self._spare_rows.pop() if self._spare_rows else self._new_row()
+                self._rows[index] = row
+                row.show(self.choices[index])
+                canvas.coords(row.item, 0, index * step)
+                canvas.itemconfigure(row.item, state="normal")
+            elif rebind:
+                row.show(self.choices[index])
+
+    def _on_choices_scroll(self, first, last):
+        self.choices_scrollbar.set(first, last)
+        if self._layout_pending is None:
+            self._layout_pending = self.frame.after_idle(self._layout_choices)
 
+    def _on_choices_resize(self, event):
+        for row in list(self._rows.values()) + self._spare_rows:
+            self.choices_canvas.itemconfigure(row.item, width=event.width)
+        self._layout_choices()
+
+    @perf.timed("editor.get_files")
     def _get_files(self, subfolder):
-        """Get files from the given subfolder, ensuring the folder exists."""
+        """Get files from the given subfolder (served from the shared media catalog)."""
         if not self.folder_manager or not self.folder_manager.source_folder:
             return []
-    
-        folder_path = os.path.join(self.folder_manager.source_folder, subfolder)
-        return os.listdir(folder_path) if os.path.exists(folder_path) else []
+        return self.folder_manager.media.files(subfolder)
     
     
 
-    def refresh_dropdown(self, media_type):
+    def refresh_dropdown(self, media_type, file_list=None):
         """Refresh the dropdown list for videos or images dynamically."""
-        folder_path = os.path.join(self.folder_manager.source_folder, media_type)
-        file_list = os.listdir(folder_path) if os.path.exists(folder_path) else []
+        if file_list is None:
+            file_list = self._get_files(media_type)
     
         if media_type == "videos":
             self.video_dropdown['values'] = file_list
         elif media_type == "images":
-            for choice in self.choices:
-                if "image_dropdown" in choice:
-                    choice["image_dropdown"]['values'] = file_list
+            self.image_files = file_list
+            for row in list(self._rows.values()) + self._spare_rows:
+                row.image_dropdown['values'] = file_list
     
     
     
 
+    def _track_media_info(self, variable, label, subfolder):
+        """Keep label showing metadata for whatever file variable names."""
+        if self.media_metadata:
+            variable.trace_add("write", lambda *args: self._show_media_info(variable, label, subfolder))
+
+    def _show_media_info(self, variable, label, subfolder, attempts=MEDIA_INFO_RETRIES):
+        """Show cached metadata, polling briefly while it is extracted in the background."""
+        if not label.winfo_exists():
+            return  # Editor was closed
+        name = variable.get()
+        if not name or not self.folder_manager.source_folder:
+            label.config(text="")
+            return
+        info = self.media_metadata.get(os.path.join(self.folder_manager.source_folder, subfolder, name))
+        if info:
+            label.config(text=describe(info))
+        elif attempts > 0:
+            label.config(text="...")
+            label.after(MEDIA_INFO_RETRY_MS, self._poll_media_info, variable, label, subfolder, name, attempts - 1)
+        else:
+            label.config(text="")
+
+    def _poll_media_info(self, variable, label, subfolder, name, attempts):
+        if label.winfo_exists() and variable.get() == name:  # Ignore if the selection moved on
+            self._show_media_info(variable, label, subfolder, attempts)
+
+    def refresh_media(self):
+        """Rescan the media folders and update every dropdown."""
+        self.folder_manager.media.refresh()
+        self.refresh_dropdown("videos")
+        self.refresh_dropdown("images")
+
     def save_scene(self):
         scene_id = self.scene_id_entry.get().strip()
         video = self.video_var.get()
@@ -201,6 +369,13 @@ class SceneEditor:
             messagebox.showerror("Missing Information", "Please fill in all required fields.")
             return
 
+        # A new scene must not silently replace a finished one (auto-created placeholders are fine)
+        if not self.scene_data and self.scene_graph is not None:
+            existing = self.scene_graph.get(scene_id)
+            if existing and not existing.get("auto_created"):
+                if not messagebox.askyesno("Scene Exists", f"Scene '{scene_id}' already exists. Replace it?"):
+                    return
+
         # Create a new scene object
         new_scene = {
             "scene_id": scene_id,
@@ -212,10 +387,10 @@ class SceneEditor:
 
         # Save all choices
         for choice in self.choices:
-            option_text = choice["option_entry"].get().strip()
-            next_scene = choice["next_scene_entry"].get().strip()
-            image = choice["image_var"].get()
-            temporary = choice["temporary_flag"].get()
+            option_text = choice["option"].strip()
+            next_scene = choice["next_scene"].strip()
+            image = choice["image"]
+            temporary = bool(choice["temporary"])
 
             if not option_text or not next_scene:
                 messagebox.showerror("Missing Information", "Each choice must have an option text and a next scene ID.")
@@ -231,5 +406,6 @@ class SceneEditor:
 
         # Pass the scene data to the main window
         self.new_scene = new_scene
-        self.save_callback(new_scene)  # Send the scene back for storage
-        self.frame.destroy()  # Close the editor
+        if self.save_callback(new_scene) is False:  # Send the scene back for storage
+            return  # Rejected; keep the editor open
+        self.close()
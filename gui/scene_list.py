@@ -0,0 +1,221 @@
+import tkinter as tk
+import tkinter.font as tkfont
+
+from core import perf
+
+
+def scene_label(scene):
+    """Text shown for a scene in the list."""
+    display_text = f"{scene['scene_id']} - {scene['scene_type']}"
+    if scene.get("auto_created"):
+        display_text += " [Incomplete]"
+    return display_text
+
+
+class SceneList:
+    """Virtualized scene list backed by a SceneGraph.
+
+    The inner Listbox only ever holds the rows that fit on screen; a separate
+    scrollbar moves that window over the graph. Graph changes arrive as
+    events and are applied as single-row inserts, deletes and replacements,
+    so a drag swap touches two rows and a save touches one.
+
+    Indexes taken and returned by the public methods are scene indexes in the
+    graph, not Listbox row numbers.
+    """
+
+    def __init__(self, parent, scene_graph, **listbox_options):
+        self.scene_graph = scene_graph
+        self.top = 0  # Graph index of the first visible row
+        self.visible_rows = 1
+        self._row_height = None
+        self._selected_id = None  # Selection follows the scene, not the row
+        self._item_options = {}  # scene_id -> itemconfig options (drag highlight)
+
+        self.frame = tk.Frame(parent)
+        self.listbox = tk.Listbox(self.frame, **listbox_options)
+        self.scrollbar = tk.Scrollbar(self.frame, orient="vertical", command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.listbox.bind("<Configure>", self._on_resize)
+        self.listbox.bind("<<ListboxSelect>>", self._on_select)
+        self.listbox.bind("<MouseWheel>", self._on_mousewheel)
+        self.listbox.bind("<Button-4>", lambda event: self.yview_scroll(-3, "units"))
+        self.listbox.bind("<Button-5>", lambda event: self.yview_scroll(3, "units"))
+
+        scene_graph.add_listener(self._on_graph_change)
+
+    # Listbox-like interface used by MainWindow
+    def bind(self, sequence, func):
+        self.listbox.bind(sequence, func, add="+")
+
+    def winfo_height(self):
+        return self.listbox.winfo_height()
+
+    def curselection(self):
+        return tuple(self.top + row for row in self.listbox.curselection())
+
+    def nearest(self, y):
+        row = self.listbox.nearest(y)
+        if row < 0:
+            return -1
+        return min(self.top + row, len(self.scene_graph) - 1)
+
+    def selection_clear(self):
+        self._selected_id = None
+        self.listbox.selection_clear(0, tk.END)
+
+    def selection_set(self, index):
+        self.selection_clear()
+        self._selected_id = self.scene_graph[index]["scene_id"]
+        self.see(index)
+        self.listbox.selection_set(index - self.top)
+
+    def itemconfig(self, index, **options):
+        """Set row options (e.g. bg) for the scene at index; they follow the scene."""
+        if not 0 <= index < len(self.scene_graph):
+            return
+        scene_id = self.scene_graph[index]["scene_id"]
+        self._item_options.setdefault(scene_id, {}).update(options)
+        if self._is_visible(index):
+            self.listbox.itemconfig(index - self.top, **options)
+
+    def see(self, index):
+        """Scroll so the scene at index is visible."""
+        if index < self.top:
+            self._scroll_to(index)
+        elif index >= self.top + self.visible_rows:
+            self._scroll_to(index - self.visible_rows + 1)
+
+    def yview_scroll(self, number, what):
+        step = self.visible_rows if what == "pages" else 1
+        self._scroll_to(self.top + number * step)
+
+    def refresh(self):
+        """Redraw the visible rows from the graph."""
+        self._render()
+
+    # Rendering
+    def _is_visible(self, index):
+        return self.top <= index < self.top + self.listbox.size()
+
+    def _max_top(self):
+        return max(0, len(self.scene_graph) - self.visible_rows)
+
+    def _scroll_to(self, top):
+        top = max(0, min(int(top), self._max_top()))
+        if top != self.top:
+            self.top = top
+            self._render()
+
+    @perf.timed("scene_list.render")
+    def _render(self):
+        """Rebuild the window of visible rows; costs O(visible rows)."""
+        self.top = min(self.top, self._max_top())
+        self.listbox.delete(0, tk.END)
+        end = min(self.top + self.visible_rows, len(self.scene_graph))
+        for index in range(self.top, end):
+            self._insert_row(index)
+        self._update_scrollbar()
+
+    def _insert_row(self, index):
+        """Insert the row for the scene at index at its place in the window."""
+        scene = self.scene_graph[index]
+        row = index - self.top
+        self.listbox.insert(row, scene_label(scene))
+        options = self._item_options.get(scene["scene_id"])
+        if options:
+            self.listbox.itemconfig(row, **options)
+        if scene["scene_id"] == self._selected_id:
+            self.listbox.selection_set(row)
+
+    def _replace_row(self, index):
+        self.listbox.delete(index - self.top)
+        self._insert_row(index)
+
+    def _update_scrollbar(self):
+        total = len(self.scene_graph)
+        if total <= self.visible_rows:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.top / total, (self.top + self.visible_rows) / total)
+
+    # Model changes
+    def _on_graph_change(self, event, *args):
+        if event == "reset":
+            self.top = 0
+            self._selected_id = None
+            self._item_options.clear()
+            self._render()
+        elif event == "insert":
+            self._on_insert(args[0])
+        elif event == "extend":
+            if args[0] < self.top:
+                self.top += args[1]  # Keep the same scenes on screen
+            elif args[0] < self.top + self.visible_rows:
+                self._render()
+        elif event == "remove":
+            self._on_remove(args[0], args[1])
+        elif event == "update":
+            if self._is_visible(args[0]):
+                self._replace_row(args[0])
+        elif event == "swap":
+            for index in args:
+                if self._is_visible(index):
+                    self._replace_row(index)
+        elif event == "move":
+            first, last = min(args), max(args)
+            for index in range(max(first, self.top), min(last + 1, self.top + self.listbox.size())):
+                self._replace_row(index)
+        self._update_scrollbar()
+
+    def _on_insert(self, index):
+        if index < self.top:
+            self.top += 1  # Keep the same scenes on screen
+        elif index - self.top < self.visible_rows and index <= self.top + self.listbox.size():
+            self._insert_row(index)
+            if self.listbox.size() > self.visible_rows:
+                self.listbox.delete(tk.END)
+
+    def _on_remove(self, index, scene_id):
+        self._item_options.pop(scene_id, None)
+        if scene_id == self._selected_id:
+            self._selected_id = None
+        if index < self.top:
+            self.top -= 1
+        elif self._is_visible(index):
+            self.listbox.delete(index - self.top)
+            # Pull the next scene up into the freed bottom row
+            below = self.top + self.listbox.size()
+            if below < len(self.scene_graph):
+                self._insert_row(below)
+        if self.top > self._max_top():
+            self._render()
+
+    # Tk events
+    def _on_select(self, event):
+        selection = self.listbox.curselection()
+        if selection:
+            self._selected_id = self.scene_graph[self.top + selection[0]]["scene_id"]
+        else:
+            self._selected_id = None
+
+    def _on_resize(self, event):
+        if self._row_height is None:
+            font = tkfont.Font(font=self.listbox.cget("font"))
+            self._row_height = font.metrics("linespace") + 1 + 2 * int(self.listbox.cget("selectborderwidth"))
+        border = 2 * (int(self.listbox.cget("borderwidth")) + int(self.listbox.cget("highlightthickness")))
+        visible_rows = max(1, (event.height - border) // self._row_height)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self._render()
+
+    def _on_mousewheel(self, event):
+        self.yview_scroll(-1 if event.delta > 0 else 1, "units")
+
+    def _on_scrollbar(self, action, *args):
+        if action == "moveto":
+            self._scroll_to(float(args[0]) * len(self.scene_graph))
+        elif action == "scroll":
+            self.yview_scroll(int(args[0]), args[1])
@@ -0,0 +1,75 @@
+import tkinter as tk
+
+MAX_RESULTS = 200  # Rows listed at most; the count says when there are more
+REFRESH_DELAY_MS = 150  # Re-run the query this long after the scenes last changed
+
+
+class SearchPanel:
+    """Search box that filters scenes as you type; click a result to open it.
+
+    search(query, limit) returns matching scene ids, or None while the index
+    is still being built (the caller calls refresh() once it is ready).
+    """
+
+    def __init__(self, parent, scene_graph, search, open_scene):
+        self.scene_graph = scene_graph
+        self.search = search
+        self.open_scene = open_scene
+        self._row_scene_ids = []
+        self._refresh_pending = None
+
+        self.frame = tk.Frame(parent)
+        self.query = tk.StringVar()
+        entry_frame = tk.Frame(self.frame)
+        entry_frame.pack(fill=tk.X)
+        tk.Label(entry_frame, text="Search").pack(side=tk.LEFT)
+        self.entry = tk.Entry(entry_frame, textvariable=self.query)
+        self.entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self.count_label = tk.Label(entry_frame, text="")
+        self.count_label.pack(side=tk.LEFT)
+
+        # Shown only while there is a query
+        self.result_listbox = tk.Listbox(self.frame, height=6, exportselection=False)
+        self.result_listbox.bind("<<ListboxSelect>>", self._on_open)
+        self.result_listbox.bind("<Return>", self._on_open)
+        self.entry.bind("<Return>", self._open_first)
+        self.entry.bind("<Escape>", lambda event: self.query.set(""))
+        self.query.trace_add("write", lambda *args: self.refresh())
+        scene_graph.add_listener(self._on_graph_change)
+
+    def refresh(self):
+        """Run the current query again and redraw the results."""
+        self._refresh_pending = None
+        query = self.query.get().strip()
+        self.result_listbox.delete(0, tk.END)
+        self._row_scene_ids = []
+        if not query:
+            self.count_label.config(text="")
+            self.result_listbox.pack_forget()
+            return
+        self.result_listbox.pack(fill=tk.X, pady=(2, 0))
+
+        found = self.search(query, MAX_RESULTS + 1)
+        if found is None:
+            self.count_label.config(text="Indexing...")
+            return
+        more = len(found) > MAX_RESULTS
+        self._row_scene_ids = found[:MAX_RESULTS]
+        for scene_id in self._row_scene_ids:
+            heading = self.scene_graph.get(scene_id).get("heading") or ""
+            self.result_listbox.insert(tk.END, f"{scene_id} — {heading}" if heading else scene_id)
+        self.count_label.config(text=f"{MAX_RESULTS}+" if more else str(len(found)))
+
+    def _on_graph_change(self, event, *args):
+        # Coalesce bursts (loading, multi-scene saves) into one re-run
+        if self.query.get().strip() and self._refresh_pending is None:
+            self._refresh_pending = self.frame.after(REFRESH_DELAY_MS, self.refresh)
+
+    def _open_first(self, event):
+        if self._row_scene_ids:
+            self.open_scene(self._row_scene_ids[0])
+
+    def _on_open(self, event):
+        selection = self.result_listbox.curselection()
+        if selection and selection[0] < len(self._row_scene_ids):
+            self.open_scene(self._row_scene_ids[selection[0]])
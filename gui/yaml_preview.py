@@ -0,0 +1,115 @@
+import tkinter as tk
+from core import perf
+from core.yaml_export import EMPTY_YAML
+
+FRAME_MS = 16  # Coalesce bursts of changes into at most one render per frame
+
+
+def _changed_runs(old, new, old_base=0, new_base=0):
+    """Return (old_start, old_end, new_start, new_end) runs where new differs from old."""
+    start = 0
+    limit = min(len(old), len(new))
+    while start < limit and old[start] == new[start]:
+        start += 1
+    old_end, new_end = len(old), len(new)
+    while old_end > start and new_end > start and old[old_end - 1] == new[new_end - 1]:
+        old_end -= 1
+        new_end -= 1
+
+    if old_end - start != new_end - start:
+        # Something was inserted or removed: replace the whole middle at once
+        return [(old_base + start, old_base + old_end, new_base + start, new_base + new_end)]
+
+    # Same length (edits, swaps): only replace the entries that differ
+    runs = []
+    index = start
+    while index < old_end:
+        if old[index] == new[index]:
+            index += 1
+            continue
+        run_start = index
+        while index < old_end and old[index] != new[index]:
+            index += 1
+        runs.append((old_base + run_start, old_base + index, new_base + run_start, new_base + index))
+    return runs
+
+
+class YamlPreview:
+    """Read-only Text widget showing the project YAML, patched in place.
+
+    The widget keeps track of which fragments it currently shows. A render
+    diffs the new fragment list against that, section by section, and only
+    deletes and inserts the lines of the fragments that changed.
+    """
+
+    def __init__(self, text_widget, fragment_cache):
+        self.text = text_widget
+        self.fragment_cache = fragment_cache
+        self._pending = None  # after() id of a scheduled render
+        self._shown = None  # (header fragments, video fragments, options fragments)
+        self._line_counts = []  # lines per fragment currently in the widget, in order
+
+    def schedule(self):
+        """Render on the next frame; repeated calls before then are merged."""
+        if self._pending is None:
+            self._pending = self.text.after(FRAME_MS, self._flush)
+
+    def refresh(self):
+        """Render right away, dropping any scheduled render."""
+        if self._pending is not None:
+            self.text.after_cancel(self._pending)
+            self._pending = None
+        self.render()
+
+    def _flush(self):
+        self._pending = None
+        self.render()
+
+    @perf.timed("preview.render")
+    def render(self):
+        header, videos, options = self.fragment_cache.sections()
+        if header is None:
+            new = None
+        else:
+            new = ([header, "videos:\n"], videos, ["options:\n"] + options)
+
+        self.text.config(state=tk.NORMAL)  # Enable editing for update
+        full = new is None or self._shown is None
+        if full:
+            self.text.delete(1.0, tk.END)  # Clear the text
+            self.text.insert(tk.END, EMPTY_YAML if new is None else "".join(
+                [*new[0], *new[1], *new[2]]
+            ))
+        else:
+            self._patch(new)
+        self.text.config(state=tk.DISABLED)  # Make read-only again
+
+        self._shown = new
+        if new is None:
+            self._line_counts = []
+        elif full:
+            self._line_counts = [fragment.count("\n") for section in new for fragment in section]
+
+    def _patch(self, new):
+        old = self._shown
+        runs = []
+        old_base = new_base = 0
+        for old_section, new_section in zip(old, new):
+            runs.extend(_changed_runs(old_section, new_section, old_base, new_base))
+            old_base += len(old_section)
+            new_base += len(new_section)
+        if not runs:
+            return
+
+        new_flat = [fragment for section in new for fragment in section]
+        line_counts = self._line_counts
+
+        # Work from the bottom up so earlier line numbers stay valid
+        for old_start, old_end, new_start, new_end in reversed(runs):
+            first_line = 1 + sum(line_counts[:old_start])
+            last_line = first_line + sum(line_counts[old_start:old_end])
+            self.text.delete(f"{first_line}.0", f"{last_line}.0")
+            self.text.insert(f"{first_line}.0", "".join(new_flat[new_start:new_end]))
+            line_counts[old_start:old_end] = [
+                fragment.count("\n") for fragment in new_flat[new_start:new_end]
+            ]
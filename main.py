@@ -1,12 +1,35 @@
-import tkinter as tk
-from gui.main_window import MainWindow
+import json
+import sys
+import time
 
-def main():
+STARTED = time.perf_counter()  # Time-to-interactive is measured from here, before the app's modules load
+
+def main(report_startup=False):
+    import tkinter as tk
+    from core import perf
+    from gui.main_window import MainWindow
+
+    marks = {}  # startup.* name -> seconds since STARTED
+
+    def mark(name):
+        marks[name] = time.perf_counter() - STARTED
+        perf.record(name, marks[name], STARTED)
+
+    def interactive():
+        mark("startup.interactive")
+        if report_startup:  # --startup-timing (benchmarks): print the marks and quit
+            print(json.dumps(marks), flush=True)
+            app.close()
+
+    mark("startup.imports")
     root = tk.Tk()  # Creates the main application window
     app = MainWindow(root)  # Initialize our custom main window
     root.rowconfigure(0, weight=1)
     root.columnconfigure(0, weight=1)
+    mark("startup.window")
+    # The first idle moment after the window is built is when it starts taking input
+    root.after_idle(interactive)
     root.mainloop()  # Run the app
 
 if __name__ == "__main__":
-    main()
+    main(report_startup="--startup-timing" in sys.argv[1:])
@@ -0,0 +1,50 @@
+from core.scene_pack import ScenePack, build_pack
+from core.yaml_export import generate_yaml
+
+
+def make_scene(scene_id, choices=(), scene_type="Question", heading="", video=None):
+    return {
+        "scene_id": scene_id,
+        "video": video,
+        "scene_type": scene_type,
+        "heading": heading,
+        "choices": [dict(choice) for choice in choices],
+    }
+
+
+def choice(option, next_scene, image=None, temporary=False):
+    return {"option": option, "next_scene": next_scene, "image": image, "temporary": temporary}
+
+
+def open_pack(tmp_path, scenes):
+    pack_path = tmp_path / "story.scpk"
+    pack_path.write_bytes(build_pack(scenes))
+    return ScenePack(str(pack_path))
+
+
+def test_round_trip_to_the_same_yaml(tmp_path):
+    scenes = [
+        make_scene("s1", [choice("Links", "s2", image="1-A.jpg"), choice("Rechts", "s3", temporary=True)],
+                   heading="Wohin gehst du?", video="Scene1.mp4"),
+        make_scene("s2", [choice("Weiter", "s3")], scene_type="Continue",
+                   heading="Weiter zu Szene 2 — ça va", video="Scene2.mp4"),
+        make_scene("s3", scene_type="Continue", heading="Ende", video="Scene3.mp4"),
+        make_scene("s4", [choice("Zurück", "s1", image="4-B.jpg", temporary=True)], video="Scene1.mp4"),
+    ]
+    with open_pack(tmp_path, scenes) as pack:
+        assert pack.to_yaml() == generate_yaml(scenes)
+
+
+def test_lookup_by_id(tmp_path):
+    scenes = [make_scene("s1", [choice("Go", "s2")]), make_scene("s2", scene_type="Continue")]
+    with open_pack(tmp_path, scenes) as pack:
+        assert pack.start_id == "s1"
+        for scene in scenes:
+            assert pack.scene(scene["scene_id"])["scene_id"] == scene["scene_id"]
+        assert pack.scene("no-such-scene") is None
+
+
+def test_empty_story(tmp_path):
+    with open_pack(tmp_path, []) as pack:
+        assert pack.to_yaml() == generate_yaml([])
+        assert pack.scene("s1") is None